@@ -6,13 +6,13 @@ import glob
 import threading
 import math
 from contextlib import asynccontextmanager
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Iterator, Tuple
 from datetime import datetime, timedelta
 
-from fastapi import FastAPI, HTTPException, Body, Depends, status
+from fastapi import FastAPI, HTTPException, Body, Depends, status, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, StreamingResponse
 from pydantic import BaseModel
 
 # Ensure src is in path
@@ -27,9 +27,13 @@ from src.analysis.dashboard import DashboardService
 from src.data_sources.akshare_api import search_funds
 from src.storage.db import init_db, get_active_funds, get_all_funds, upsert_fund, delete_fund, get_fund_by_code, get_all_stocks, upsert_stock, delete_stock, get_stock_by_code
 from src.scheduler.manager import scheduler_manager
+from src.scheduler.job_queue import PRIORITY_USER
 from src.report_gen import save_report, save_stock_report
 # Updated import
-from src.data_sources.akshare_api import get_all_fund_list, get_stock_realtime_quote, get_all_stock_spot_map, get_stock_history
+from src.data_sources.akshare_api import get_all_fund_list, get_stock_realtime_quote, get_stock_realtime_quotes, get_all_stock_spot_map, get_stock_history
+from src.data_sources.market_snapshot import market_snapshot
+from src.data_sources.quote_stream import QuoteHub
+from src.cache.ttl_policy import ttl_policy, GLOBAL_INDEX, RECOMMENDATION
 import akshare as ak
 import pandas as pd
 from src.auth import Token, UserCreate, User, create_access_token, get_password_hash, verify_password, get_current_user, create_user, get_user_by_username
@@ -217,13 +221,43 @@ class CommodityAnalyzeRequest(BaseModel):
     asset: str # "gold" or "silver"
 
 # --- Helpers ---
+def _sse_event(event: str, data: Any) -> str:
+    """One server-sent event; data is JSON-encoded."""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+def sse_response(events: Iterator[Tuple[str, Any]]) -> StreamingResponse:
+    """
+    Stream (event, payload) tuples as text/event-stream.
+
+    A 'status' event goes out immediately, then 'status' / 'token' / 'done' /
+    'error' events from the producer, and finally 'end'. The producer is a
+    blocking generator; Starlette iterates it in its thread pool.
+    """
+    def body():
+        yield _sse_event("status", "started")
+        try:
+            for event, payload in events:
+                yield _sse_event(event, payload)
+        except Exception as e:
+            import traceback
+            traceback.print_exc()
+            yield _sse_event("error", str(e))
+        yield _sse_event("end", None)
+
+    return StreamingResponse(
+        body(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 def sanitize_data(data):
     """Recursively replace NaN/Inf and non-JSON types (like pd.NA) for JSON compliance."""
     import math
     import pandas as pd
     import numpy as np
+    from collections.abc import Mapping
     
-    if isinstance(data, dict):
+    if isinstance(data, Mapping):  # dicts and snapshot SpotRow views
         return {k: sanitize_data(v) for k, v in data.items()}
     elif isinstance(data, list):
         return [sanitize_data(v) for v in data]
@@ -277,14 +311,13 @@ def save_env_file(updates: Dict[str, str]):
 
 # --- Endpoints ---
 
-from src.llm.client import get_llm_client
+from src.llm.client import get_llm_client, clear_llm_clients
 
 @app.post("/api/system/test-llm")
 async def test_llm_connection(current_user: User = Depends(get_current_user)):
     try:
         client = get_llm_client()
-        # Use asyncio.to_thread for network call
-        response = await asyncio.to_thread(client.generate_content, "Ping. Reply with 'Pong'.")
+        response = await client.agenerate_content("Ping. Reply with 'Pong'.")
         
         if "Error:" in response:
              return {"status": "error", "message": response}
@@ -293,6 +326,18 @@ async def test_llm_connection(current_user: User = Depends(get_current_user)):
     except Exception as e:
         return {"status": "error", "message": str(e)}
 
+@app.get("/api/system/llm-cache/stats")
+async def get_llm_cache_stats(current_user: User = Depends(get_current_user)):
+    """Hit/miss counters and stored entries of the LLM response cache."""
+    from src.llm.response_cache import llm_response_cache
+    return await asyncio.to_thread(llm_response_cache.get_stats)
+
+@app.get("/api/system/jobs/stats")
+async def get_job_stats(current_user: User = Depends(get_current_user)):
+    """Analysis queue depth/wait/run times and per-upstream concurrency."""
+    from src.data_sources.rate_limit import upstream_limiter
+    return {"queue": scheduler_manager.job_queue.get_stats(), "upstreams": upstream_limiter.get_stats()}
+
 from src.data_sources.web_search import WebSearch
 
 @app.post("/api/system/test-search")
@@ -379,6 +424,12 @@ async def analyze_commodity(request: CommodityAnalyzeRequest, current_user: User
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/api/commodities/analyze/stream")
+async def analyze_commodity_stream(request: CommodityAnalyzeRequest, current_user: User = Depends(get_current_user)):
+    """SSE variant of /api/commodities/analyze: pushes report tokens as the LLM writes them."""
+    analyst = GoldSilverAnalyst()
+    return sse_response(analyst.analyze_stream(request.asset, current_user.id))
+
 @app.get("/api/reports", response_model=List[ReportSummary])
 async def list_reports(current_user: User = Depends(get_current_user)):
     user_report_dir = get_user_report_dir(current_user.id)
@@ -604,15 +655,19 @@ async def generate_report_endpoint(mode: str, request: GenerateRequest = None, c
             # For true async (fire-and-forget), use BackgroundTasks.
             # But here the user likely wants to wait for completion? 
             # The current implementation returns a message *after* completion (sync).
-            # So we use await asyncio.to_thread to keep server responsive for others.
-            await asyncio.to_thread(scheduler_manager.run_analysis_task, fund_code, mode, user_id=current_user.id)
+            # The job runs on the analysis worker pool, ahead of queued cron work.
+            await asyncio.wrap_future(scheduler_manager.job_queue.submit(
+                f"{mode}:fund:{fund_code}", scheduler_manager.run_analysis_task,
+                fund_code, mode, user_id=current_user.id, priority=PRIORITY_USER))
             return {"status": "success", "message": f"Task triggered for {fund_code}"}
         else:
             funds = get_active_funds(user_id=current_user.id)
             results = []
             for fund in funds:
                 try:
-                    await asyncio.to_thread(scheduler_manager.run_analysis_task, fund['code'], mode, user_id=current_user.id)
+                    await asyncio.wrap_future(scheduler_manager.job_queue.submit(
+                        f"{mode}:fund:{fund['code']}", scheduler_manager.run_analysis_task,
+                        fund['code'], mode, user_id=current_user.id, priority=PRIORITY_USER))
                     results.append(fund['code'])
                 except:
                     pass
@@ -623,6 +678,29 @@ async def generate_report_endpoint(mode: str, request: GenerateRequest = None, c
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/api/generate/{mode}/stream")
+async def generate_report_stream_endpoint(mode: str, request: GenerateRequest = None, current_user: User = Depends(get_current_user)):
+    """
+    SSE variant of /api/generate/{mode}. Without fund_code, active funds are
+    streamed one after another, each preceded by an 'item' event.
+    """
+    if mode not in ["pre", "post"]:
+        raise HTTPException(status_code=400, detail="Invalid mode. Use 'pre' or 'post'.")
+
+    fund_code = request.fund_code if request else None
+    user_id = current_user.id
+
+    def events():
+        if fund_code:
+            yield from scheduler_manager.stream_analysis_task(fund_code, mode, user_id=user_id)
+            return
+        for fund in get_active_funds(user_id=user_id):
+            yield "item", {"code": fund['code'], "name": fund.get('name')}
+            yield from scheduler_manager.stream_analysis_task(fund['code'], mode, user_id=user_id)
+
+    print(f"Streaming {mode}-market report for User {user_id}... (Fund: {fund_code if fund_code else 'ALL'})")
+    return sse_response(events())
+
 # --- Cache ---
 _INDICES_CACHE = {
     "data": [],
@@ -632,25 +710,11 @@ _INDICES_CACHE = {
 @app.get("/api/market/indices")
 def get_market_indices():
     import time
-    from datetime import datetime
     global _INDICES_CACHE
     
     now_ts = time.time()
-    now_dt = datetime.now()
-    current_hm = now_dt.hour * 100 + now_dt.minute
-    
-    # Active Hours: 08:00 - 15:00 OR 21:30 - 05:00
-    # Inactive Hours: 15:00 - 21:30 AND 05:00 - 08:00
     
-    is_active_session_1 = 800 <= current_hm < 1500
-    is_active_session_2 = (2130 <= current_hm) or (current_hm < 500)
-    is_active = is_active_session_1 or is_active_session_2
-
-    # If inactive and we have data, use it indefinitely
-    if not is_active and _INDICES_CACHE["data"]:
-        return _INDICES_CACHE["data"]
-    
-    # Otherwise (Active OR Empty Cache), check standard expiry
+    # Expiry set from the session-aware TTL policy when the data was fetched
     if _INDICES_CACHE["data"] and now_ts < _INDICES_CACHE["expiry"]:
         return _INDICES_CACHE["data"]
 
@@ -684,8 +748,7 @@ def get_market_indices():
         
         if data:
             _INDICES_CACHE["data"] = data
-            # Cache for 60 seconds during active time
-            _INDICES_CACHE["expiry"] = now_ts + 60
+            _INDICES_CACHE["expiry"] = ttl_policy.expires_at(GLOBAL_INDEX, now_ts)
             
         return data
     except Exception as e:
@@ -694,6 +757,66 @@ def get_market_indices():
             return _INDICES_CACHE["data"]
         return []
 
+# --- Realtime quote stream ---
+
+def _stream_quotes(codes: List[str]) -> Dict[str, Dict]:
+    """QuoteHub loader: one shared snapshot refresh per tick, single fetches only for codes it lacks."""
+    return get_stock_realtime_quotes(codes, cache_ttl_seconds=QuoteHub.interval(), refresh_snapshot=True)
+
+quote_hub = QuoteHub(_stream_quotes, get_market_indices)
+
+@app.websocket("/api/ws/quotes")
+async def quotes_websocket(websocket: WebSocket, token: str = ""):
+    """
+    Push-based quotes. Connect with ?token=<JWT>, then send
+    {"action": "subscribe" | "unsubscribe", "codes": [...], "indices": true}.
+    One server-side refresher serves all connections (see QuoteHub).
+    """
+    try:
+        await get_current_user(token)
+    except HTTPException:
+        await websocket.close(code=1008)
+        return
+
+    await websocket.accept()
+    sub_id = quote_hub.connect()
+    queue = quote_hub.queue(sub_id)
+
+    async def receive():
+        while True:
+            message = await websocket.receive_json()
+            action = message.get("action")
+            codes = message.get("codes") or []
+            if action == "subscribe":
+                quote_hub.subscribe(sub_id, codes, message.get("indices"))
+            elif action == "unsubscribe":
+                quote_hub.unsubscribe(sub_id, codes, message.get("indices"))
+
+    async def send():
+        while True:
+            await websocket.send_json(sanitize_data(await queue.get()))
+
+    tasks = [asyncio.create_task(receive()), asyncio.create_task(send())]
+    try:
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            if task.exception() and not isinstance(task.exception(), WebSocketDisconnect):
+                print(f"Quote stream connection error: {task.exception()}")
+    finally:
+        for task in tasks:
+            task.cancel()
+        quote_hub.disconnect(sub_id)
+
+@app.get("/api/system/cache/stats")
+async def get_cache_stats(current_user: User = Depends(get_current_user)):
+    """Shared cache size/hit/eviction numbers and the TTL each data category gets right now."""
+    from src.cache import cache_manager
+    return {"cache": cache_manager.get_stats(), "ttl_policy": ttl_policy.describe()}
+
+@app.get("/api/system/quote-stream/stats")
+async def get_quote_stream_stats(current_user: User = Depends(get_current_user)):
+    return quote_hub.get_stats()
+
 @app.get("/api/funds")
 async def get_funds_endpoint(current_user: User = Depends(get_current_user)):
     try:
@@ -795,6 +918,9 @@ async def update_settings(settings: SettingsUpdate):
         if v is not None:
             os.environ[k] = v
 
+    # Release pooled LLM clients built with the previous keys/endpoints
+    clear_llm_clients()
+
     return {"status": "success"}
 
 @app.post("/api/sentiment/analyze")
@@ -1022,47 +1148,41 @@ async def get_stocks_endpoint(current_user: User = Depends(get_current_user)):
     try:
         stocks = get_all_stocks(user_id=current_user.id)
         
-        def fetch_single_quote(stock):
-            item = dict(stock)
-            try:
-                # Use stock_bid_ask_em for fast single stock query
-                # This returns a DF with [item, value] columns
-                df = ak.stock_bid_ask_em(symbol=stock['code'])
-                if not df.empty:
-                    info = dict(zip(df['item'], df['value']))
-                    
-                    # Try keys from stock_bid_ask_em (Commonly: 最新, 涨幅, 总手)
-                    price = info.get('最新') or info.get('最新价')
-                    change = info.get('涨幅') or info.get('涨跌幅')
-                    vol = info.get('总手') or info.get('成交量')
-                    
-                    # Safe conversion
-                    if price is not None and str(price) != '': 
-                        item['price'] = float(price)
-                    if change is not None and str(change) != '': 
-                        item['change_pct'] = float(change)
-                    if vol is not None and str(vol) != '': 
-                        v = float(vol)
-                        # If came from '总手' (Hands), convert to shares for consistency
-                        if info.get('总手') is not None:
-                            v = v * 100
-                        item['volume'] = v
-            except Exception:
-                # Silently fail for individual stock fetch errors to not break the whole list
-                pass
-            return StockItem(**item)
+        # One bulk lookup: shared spot snapshot first, single-stock fetches only for misses
+        quotes = await asyncio.to_thread(get_stock_realtime_quotes, [s['code'] for s in stocks])
 
-        # Execute in parallel
-        # Note: akshare calls are blocking/sync, so ThreadPool is appropriate
-        loop = asyncio.get_event_loop()
-        with ThreadPoolExecutor(max_workers=10) as executor:
-             results = await loop.run_in_executor(None, lambda: list(executor.map(fetch_single_quote, stocks)))
-             
+        results = []
+        for stock in stocks:
+            item = dict(stock)
+            quote = quotes.get(str(stock['code']).zfill(6))
+            if quote:
+                item['price'] = quote['price']
+                item['change_pct'] = quote['change_pct']
+                item['volume'] = quote['volume']
+            results.append(StockItem(**item))
         return results
     except Exception as e:
         print(f"Error reading stocks: {e}")
         return []
 
+class QuoteBatchRequest(BaseModel):
+    codes: List[str]
+
+QUOTE_BATCH_MAX_CODES = 500
+
+@app.post("/api/quotes/batch")
+async def get_quotes_batch(request: QuoteBatchRequest, current_user: User = Depends(get_current_user)):
+    """Realtime quotes for many codes at once (shared snapshot first, single fetches for misses)."""
+    if len(request.codes) > QUOTE_BATCH_MAX_CODES:
+        raise HTTPException(status_code=400, detail=f"At most {QUOTE_BATCH_MAX_CODES} codes per request")
+    quotes = await asyncio.to_thread(get_stock_realtime_quotes, request.codes)
+    requested = list(dict.fromkeys(str(c).strip() for c in request.codes if str(c).strip()))
+    return {
+        "quotes": quotes,
+        "missing": [c for c in requested if c not in quotes and c.zfill(6) not in quotes],
+        "snapshot": market_snapshot.get_stats(),
+    }
+
 @app.post("/api/stocks")
 async def save_stocks(stocks: List[StockItem], current_user: User = Depends(get_current_user)):
     try:
@@ -1114,7 +1234,9 @@ async def analyze_stock_endpoint(code: str, request: StockAnalyzeRequest, curren
             raise HTTPException(status_code=404, detail=f"Stock {code} not found")
 
         print(f"Triggering {request.mode}-market analysis for stock {code} (User: {current_user.id})")
-        await asyncio.to_thread(scheduler_manager.run_stock_analysis_task, code, request.mode, user_id=current_user.id)
+        await asyncio.wrap_future(scheduler_manager.job_queue.submit(
+            f"{request.mode}:stock:{code}", scheduler_manager.run_stock_analysis_task,
+            code, request.mode, user_id=current_user.id, priority=PRIORITY_USER))
         return {"status": "success", "message": f"Stock {request.mode}-market analysis triggered for {code}"}
     except HTTPException:
         raise
@@ -1124,6 +1246,20 @@ async def analyze_stock_endpoint(code: str, request: StockAnalyzeRequest, curren
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/api/stocks/{code}/analyze/stream")
+async def analyze_stock_stream_endpoint(code: str, request: StockAnalyzeRequest, current_user: User = Depends(get_current_user)):
+    """SSE variant of /api/stocks/{code}/analyze: pushes report tokens as the LLM writes them."""
+    if request.mode not in ["pre", "post"]:
+        raise HTTPException(status_code=400, detail="Invalid mode. Use 'pre' or 'post'.")
+
+    stock = get_stock_by_code(code, user_id=current_user.id)
+    if not stock:
+        raise HTTPException(status_code=404, detail=f"Stock {code} not found")
+
+    print(f"Streaming {request.mode}-market analysis for stock {code} (User: {current_user.id})")
+    return sse_response(scheduler_manager.stream_stock_analysis_task(code, request.mode, user_id=current_user.id))
+
+
 @app.get("/api/stocks/reports")
 async def list_stock_reports(current_user: User = Depends(get_current_user)):
     """List all stock analysis reports for the current user"""
@@ -1347,11 +1483,24 @@ def _run_recommendation_task(task_id: str, mode: str, user_id: int, user_prefere
             cache_manager=cache_manager
         )
 
+        def publish_partial(partial_results: Dict):
+            # Deliver each finished block (short/long term) before the other one is done
+            ready = [k for k in ("short_term", "long_term") if partial_results.get(k)]
+            cache_manager.set(cache_key, {
+                "status": "running",
+                "progress": f"AI analysis ready: {', '.join(ready)}",
+                "started_at": datetime.now().isoformat(),
+                "user_id": user_id,
+                "mode": mode,
+                "partial": sanitize_for_json(partial_results)
+            }, ttl=3600)
+
         # Generate recommendations
         results = engine.generate_recommendations(
             mode=mode,
             use_llm=True,
-            user_preferences=user_preferences
+            user_preferences=user_preferences,
+            on_partial=publish_partial
         )
 
         # Sanitize results
@@ -1360,7 +1509,7 @@ def _run_recommendation_task(task_id: str, mode: str, user_id: int, user_prefere
         # Cache the recommendation results
         prefs_hash = "personalized" if user_preferences else "default"
         result_cache_key = f"recommendations:{user_id}:{mode}:{prefs_hash}"
-        cache_manager.set(result_cache_key, results, ttl=14400)  # 4 hours
+        cache_manager.set(result_cache_key, results, ttl=ttl_policy.ttl(RECOMMENDATION))
 
         # Save to database
         from src.storage.db import save_recommendation_report
@@ -1514,6 +1663,9 @@ async def get_recommendation_task_status(
             "mode": task_data.get("mode")
         }
 
+        if task_data.get("status") == "running" and task_data.get("partial"):
+            response["partial"] = task_data.get("partial")
+
         if task_data.get("status") == "completed":
             response["result"] = task_data.get("result")
             response["completed_at"] = task_data.get("completed_at")
@@ -1798,15 +1950,12 @@ async def get_stock_details(
     try:
         import akshare as ak
 
-        # Get basic info
-        spot_df = ak.stock_zh_a_spot_em()
-        stock_info = spot_df[spot_df['代码'] == code]
+        # Get basic info from the shared market snapshot
+        stock_data = await asyncio.to_thread(market_snapshot.get_row, code)
 
-        if stock_info.empty:
+        if not stock_data:
             raise HTTPException(status_code=404, detail="Stock not found")
 
-        stock_data = stock_info.iloc[0].to_dict()
-
         # Get historical data (last 60 days)
         try:
             hist_df = ak.stock_zh_a_hist(symbol=code, period="daily", adjust="qfq")
@@ -1922,13 +2071,12 @@ async def compare_stocks(
         if len(codes) < 2 or len(codes) > 5:
             raise HTTPException(status_code=400, detail="Please select 2-5 stocks to compare")
 
-        spot_df = ak.stock_zh_a_spot_em()
+        spot_by_code = await asyncio.to_thread(market_snapshot.get_by_code) or {}
         comparisons = []
 
         for code in codes:
-            stock_info = spot_df[spot_df['代码'] == code]
-            if not stock_info.empty:
-                stock_data = stock_info.iloc[0]
+            stock_data = spot_by_code.get(code)
+            if stock_data:
                 comparisons.append({
                     "code": code,
                     "name": stock_data.get('名称'),
@@ -0,0 +1,116 @@
+"""
+Benchmark: Redis cache value encoding, legacy json.dumps(default=str) vs codecs.
+
+Loads stored generate_recommendations results (recommendation_reports table),
+encodes every result with each codec/compression pair and prints the total
+encoded size and the encode/decode time per result, plus how many numeric
+values did not come back as numbers.
+
+Usage:
+    python benchmarks/bench_cache_codecs.py                 # funds.db next to the repo (or DB_FILE_PATH)
+    python benchmarks/bench_cache_codecs.py --db path/to/funds.db --repeat 200
+    python benchmarks/bench_cache_codecs.py --numpy         # numbers as numpy scalars, as
+                                                            # results built from DataFrames carry them
+"""
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import time
+from typing import Any, Callable, List, Tuple
+
+import numpy as np
+
+# Ensure src is in path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.cache.codecs import CODECS, COMPRESSORS, CacheSerializer
+
+
+def load_results(db_path: str) -> List[Any]:
+    conn = sqlite3.connect(db_path)
+    try:
+        rows = conn.execute(
+            "SELECT recommendations_json FROM recommendation_reports WHERE recommendations_json IS NOT NULL"
+        ).fetchall()
+    finally:
+        conn.close()
+    return [json.loads(r[0]) for r in rows if r[0]]
+
+
+def with_numpy(value: Any) -> Any:
+    """Same structure with ints/floats as numpy scalars."""
+    if isinstance(value, dict):
+        return {k: with_numpy(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [with_numpy(v) for v in value]
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, int):
+        return np.int64(value)
+    if isinstance(value, float):
+        return np.float64(value)
+    return value
+
+
+def count_numbers(value: Any) -> int:
+    if isinstance(value, dict):
+        return sum(count_numbers(v) for v in value.values())
+    if isinstance(value, list):
+        return sum(count_numbers(v) for v in value)
+    return int(isinstance(value, (int, float, np.integer, np.floating)) and not isinstance(value, bool))
+
+
+def legacy_encode(value: Any) -> bytes:
+    return json.dumps(value, ensure_ascii=False, default=str).encode('utf-8')
+
+
+def timed(fn: Callable, items: List[Any], repeat: int) -> Tuple[List[Any], float]:
+    """Outputs of fn over items, and the best per-item time in microseconds."""
+    best = float('inf')
+    out = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        out = [fn(x) for x in items]
+        best = min(best, time.perf_counter() - start)
+    return out, best / len(items) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark cache value codecs on stored recommendation results")
+    parser.add_argument("--db", default=os.environ.get(
+        "DB_FILE_PATH", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "funds.db")))
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--numpy", action="store_true", help="Convert numbers to numpy scalars first")
+    args = parser.parse_args()
+
+    results = load_results(args.db)
+    if not results:
+        print(f"No recommendation results in {args.db}")
+        return
+    if args.numpy:
+        results = [with_numpy(r) for r in results]
+    numbers = sum(count_numbers(r) for r in results)
+    print(f"{len(results)} results from {args.db}, {numbers} numeric values"
+          f"{' (numpy scalars)' if args.numpy else ''}, best of {args.repeat}\n")
+
+    variants = [('legacy json default=str', legacy_encode, json.loads)]
+    for codec in (CODECS[i][0] for i in sorted(CODECS)):
+        for compression in ['none'] + [COMPRESSORS[i][0] for i in sorted(COMPRESSORS)]:
+            serializer = CacheSerializer(codec, compression, min_compress_bytes=1024)
+            variants.append((serializer.name, serializer.encode, serializer.decode))
+
+    print(f"{'format':<26}{'total bytes':>12}{'vs legacy':>10}{'encode µs':>11}{'decode µs':>11}{'lost numbers':>14}")
+    baseline = None
+    for name, encode, decode in variants:
+        encoded, encode_us = timed(encode, results, args.repeat)
+        decoded, decode_us = timed(decode, encoded, args.repeat)
+        size = sum(len(e) for e in encoded)
+        baseline = baseline or size
+        lost = numbers - sum(count_numbers(d) for d in decoded)
+        print(f"{name:<26}{size:>12}{size / baseline:>9.0%}{encode_us:>11.1f}{decode_us:>11.1f}{lost:>14}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,389 @@
+"""
+Benchmark: LongTermStockScreener filtering + scoring, iterrows() loop vs columnar.
+
+Runs both implementations over the same spot snapshot, asserts the candidates,
+scores and ordering are identical, and prints the timings.
+
+Usage:
+    # Record a real snapshot once (needs network access to eastmoney)
+    python benchmarks/bench_long_term_screener.py --record benchmarks/fixtures/spot_snapshot.pkl
+
+    # Benchmark against the recorded fixture
+    python benchmarks/bench_long_term_screener.py --fixture benchmarks/fixtures/spot_snapshot.pkl
+
+Without --fixture a synthetic table with the stock_zh_a_spot_em schema is used
+(clearly labelled in the output); real-market distributions may differ.
+"""
+import argparse
+import contextlib
+import io
+import math
+import os
+import sys
+import time
+from typing import Any, Dict, List
+
+import numpy as np
+import pandas as pd
+
+# Ensure src is in path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.analysis.recommendation.screener.filter_pipeline import _safe_float
+from src.analysis.recommendation.screener.stock_screener import LongTermStockScreener
+
+
+SPOT_COLUMNS = [
+    '序号', '代码', '名称', '最新价', '涨跌幅', '涨跌额', '成交量', '成交额', '振幅', '最高', '最低',
+    '今开', '昨收', '量比', '换手率', '市盈率-动态', '市净率', '总市值', '流通市值', '涨速',
+    '5分钟涨跌', '60日涨跌幅', '年初至今涨跌幅',
+]
+
+
+class LegacyLongTermStockScreener(LongTermStockScreener):
+    """The row-loop implementation kept for before/after comparison."""
+
+    _safe_float = staticmethod(_safe_float)  # the screener's former per-row coercion
+
+    def apply_filters(self, raw_data: Dict[str, Any]) -> List[Dict]:
+        """Verbatim copy of the iterrows() implementation (pre-vectorization)."""
+        candidates = []
+
+        stock_spot = raw_data.get('stock_spot', pd.DataFrame())
+        sector_map = raw_data.get('sector_map', {})
+
+        if stock_spot.empty:
+            return []
+
+        # 获取用户偏好以便提前过滤
+        prefs = self.user_preferences or {}
+        preferred_sectors = prefs.get('preferred_sectors', [])
+        excluded_sectors = prefs.get('excluded_sectors', [])
+        user_min_market_cap = prefs.get('min_market_cap')
+        user_max_market_cap = prefs.get('max_market_cap')
+        user_min_pe = prefs.get('min_pe')
+        user_max_pe = prefs.get('max_pe')
+        require_profitable = prefs.get('require_profitable', True)
+        min_liquidity = prefs.get('min_liquidity')
+
+        # 统计过滤情况
+        filter_stats = {
+            'total': 0,
+            'basic_exclude': 0,
+            'market_cap': 0,
+            'pe_pb': 0,
+            'liquidity': 0,
+            'sector': 0,
+            'passed': 0,
+        }
+
+        for _, row in stock_spot.iterrows():
+            filter_stats['total'] += 1
+            try:
+                code = str(row.get('代码', '')).zfill(6)
+                name = str(row.get('名称', ''))
+
+                # 基本排除
+                if 'ST' in name or '*ST' in name:
+                    filter_stats['basic_exclude'] += 1
+                    continue
+                if name.startswith('N') or name.startswith('C'):
+                    filter_stats['basic_exclude'] += 1
+                    continue
+                if code.startswith('900') or code.startswith('200'):
+                    filter_stats['basic_exclude'] += 1
+                    continue
+
+                # 获取指标
+                price = self._safe_float(row.get('最新价'))
+                market_cap = self._safe_float(row.get('总市值'))
+                pe = self._safe_float(row.get('市盈率-动态'))
+                pb = self._safe_float(row.get('市净率'))
+                turnover = self._safe_float(row.get('成交额'))
+                change_60d = self._safe_float(row.get('60日涨跌幅'))
+
+                # 获取股票行业
+                sector = sector_map.get(code, '')
+
+                # ===== 用户偏好提前过滤 =====
+
+                # 1. 行业过滤（最早过滤，减少后续处理）
+                if preferred_sectors and sector:
+                    if not any(pref in sector for pref in preferred_sectors):
+                        filter_stats['sector'] += 1
+                        continue
+                if excluded_sectors and sector:
+                    if any(exc in sector for exc in excluded_sectors):
+                        filter_stats['sector'] += 1
+                        continue
+
+                # 2. 市值过滤（用户偏好优先，否则用默认 200亿）
+                # 长期投资必须有有效市值数据
+                if not market_cap or market_cap <= 0:
+                    filter_stats['market_cap'] += 1
+                    continue
+                min_cap = user_min_market_cap or 2e10
+                if market_cap < min_cap:
+                    filter_stats['market_cap'] += 1
+                    continue
+                if user_max_market_cap and market_cap > user_max_market_cap:
+                    filter_stats['market_cap'] += 1
+                    continue
+
+                # 3. PE/PB 过滤
+                # 默认: PE > 0 且 < 40
+                if require_profitable and (pe is None or pe <= 0):
+                    filter_stats['pe_pb'] += 1
+                    continue
+
+                max_pe = user_max_pe or 40
+                if pe is not None and pe > 0 and pe > max_pe:
+                    filter_stats['pe_pb'] += 1
+                    continue
+
+                if user_min_pe and pe is not None and pe > 0 and pe < user_min_pe:
+                    filter_stats['pe_pb'] += 1
+                    continue
+
+                # PB > 0 且 < 8（资产质量）
+                if pb is None or pb <= 0 or pb > 8:
+                    filter_stats['pe_pb'] += 1
+                    continue
+
+                # 4. 流动性过滤
+                min_turn = min_liquidity or 5e7  # 默认 5000万
+                if not turnover or turnover < min_turn:
+                    filter_stats['liquidity'] += 1
+                    continue
+
+                # 5. 60日涨跌幅 > -20%（排除大幅下跌的问题股）
+                if change_60d is not None and change_60d < -20:
+                    filter_stats['basic_exclude'] += 1
+                    continue
+
+                filter_stats['passed'] += 1
+                candidate = {
+                    'code': code,
+                    'name': name,
+                    'price': price,
+                    'market_cap': market_cap,
+                    'pe': pe,
+                    'pb': pb,
+                    'turnover': turnover,
+                    'change_pct': self._safe_float(row.get('涨跌幅')),
+                    'change_60d': change_60d,
+                    'sector': sector,  # 包含行业信息
+                }
+
+                candidates.append(candidate)
+
+            except Exception as e:
+                continue
+
+        # 打印过滤统计
+        if self.user_preferences:
+            print(f"  📊 过滤统计: 总{filter_stats['total']} | "
+                  f"基本排除{filter_stats['basic_exclude']} | "
+                  f"行业{filter_stats['sector']} | "
+                  f"市值{filter_stats['market_cap']} | "
+                  f"PE/PB{filter_stats['pe_pb']} | "
+                  f"流动性{filter_stats['liquidity']} | "
+                  f"通过{filter_stats['passed']}")
+
+        print(f"  ✓ 筛选后: {len(candidates)} 只股票")
+        return candidates
+
+    def calculate_scores(self, candidates: List[Dict]) -> List[Dict]:
+        """Verbatim copy of the per-candidate scoring loop (pre-vectorization)."""
+        if not candidates:
+            return []
+
+        for c in candidates:
+            score = 0
+
+            # 1. 估值得分 (40%)
+            pe = c.get('pe', 50)
+            pb = c.get('pb', 5)
+
+            if pe <= 15:
+                score += 20
+            elif pe <= 25:
+                score += 15
+            elif pe <= 35:
+                score += 10
+            else:
+                score += 5
+
+            if pb <= 2:
+                score += 20
+            elif pb <= 4:
+                score += 15
+            elif pb <= 6:
+                score += 10
+            else:
+                score += 5
+
+            # 2. 市值得分 (30%) - 大市值更稳定
+            cap = c.get('market_cap', 0)
+            if cap >= 5e11:  # 5000亿+
+                score += 30
+            elif cap >= 2e11:  # 2000亿+
+                score += 25
+            elif cap >= 1e11:  # 1000亿+
+                score += 20
+            elif cap >= 5e10:  # 500亿+
+                score += 15
+            else:
+                score += 10
+
+            # 3. 趋势得分 (30%)
+            change_60d = c.get('change_60d')
+            if change_60d is not None:
+                if change_60d > 10:
+                    score += 30
+                elif change_60d > 0:
+                    score += 25
+                elif change_60d > -10:
+                    score += 15
+                else:
+                    score += 5
+            else:
+                score += 15
+
+            # 4. 偏好行业加分
+            boost = self._boost_preferred_sector_score(c)
+            score = score * boost
+
+            c['score'] = round(score, 2)
+
+        candidates.sort(key=lambda x: x.get('score', 0), reverse=True)
+        return candidates
+
+
+def synthetic_spot_snapshot(rows: int = 5300, seed: int = 42) -> pd.DataFrame:
+    """Spot table with the real column schema and roughly market-like value ranges."""
+    rng = np.random.default_rng(seed)
+
+    def with_gaps(values: np.ndarray, nan_ratio: float = 0.03) -> np.ndarray:
+        values = values.astype(np.float64)
+        values[rng.random(len(values)) < nan_ratio] = np.nan
+        return values
+
+    prefixes = rng.choice(['600', '601', '603', '000', '002', '300', '688', '900', '200'], rows,
+                          p=[.2, .1, .1, .12, .18, .2, .08, .01, .01])
+    codes = [f"{p}{n:03d}" for p, n in zip(prefixes, rng.integers(0, 1000, rows))]
+    names = rng.choice(['股份', '科技', '银行', 'ST公司', '*ST公司', 'N新股', 'C次新'], rows,
+                       p=[.4, .35, .15, .04, .02, .02, .02])
+    price = with_gaps(np.exp(rng.normal(2.6, 0.8, rows)))
+    change = with_gaps(rng.normal(0.3, 2.5, rows))
+    market_cap = with_gaps(np.exp(rng.normal(23.5, 1.2, rows)))
+
+    df = pd.DataFrame({
+        '序号': np.arange(1, rows + 1),
+        '代码': codes,
+        '名称': [f"{n}{i}" for i, n in enumerate(names)],
+        '最新价': price,
+        '涨跌幅': change,
+        '涨跌额': with_gaps(price * change / 100),
+        '成交量': with_gaps(np.exp(rng.normal(12, 1.5, rows))),
+        '成交额': with_gaps(np.exp(rng.normal(19, 1.5, rows))),
+        '振幅': with_gaps(np.abs(rng.normal(3, 2, rows))),
+        '最高': with_gaps(price * 1.02),
+        '最低': with_gaps(price * 0.98),
+        '今开': with_gaps(price),
+        '昨收': with_gaps(price),
+        '量比': with_gaps(np.abs(rng.normal(1.1, 0.6, rows))),
+        '换手率': with_gaps(np.abs(rng.normal(2, 2, rows))),
+        '市盈率-动态': with_gaps(rng.normal(35, 40, rows)),
+        '市净率': with_gaps(np.abs(rng.normal(3, 3, rows))),
+        '总市值': market_cap,
+        '流通市值': with_gaps(market_cap * 0.8),
+        '涨速': with_gaps(rng.normal(0, 0.3, rows)),
+        '5分钟涨跌': with_gaps(rng.normal(0, 0.5, rows)),
+        '60日涨跌幅': with_gaps(rng.normal(2, 18, rows)),
+        '年初至今涨跌幅': with_gaps(rng.normal(5, 25, rows)),
+    })
+    return df[SPOT_COLUMNS]
+
+
+def record_fixture(path: str) -> None:
+    import akshare as ak
+
+    df = ak.stock_zh_a_spot_em()
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    df.to_pickle(path)
+    print(f"Recorded {len(df)} rows -> {path}")
+
+
+def _same(a: Any, b: Any) -> bool:
+    if isinstance(a, float) and isinstance(b, float) and math.isnan(a) and math.isnan(b):
+        return True
+    return a == b
+
+
+def assert_identical(expected: List[Dict], actual: List[Dict]) -> None:
+    assert len(expected) == len(actual), f"candidate count differs: {len(expected)} vs {len(actual)}"
+    for i, (e, a) in enumerate(zip(expected, actual)):
+        assert e.keys() == a.keys(), f"row {i}: keys differ"
+        for key in e:
+            assert _same(e[key], a[key]), f"row {i} ({e.get('code')}): {key} {e[key]!r} != {a[key]!r}"
+
+
+def run_once(screener: LongTermStockScreener, raw_data: Dict[str, Any]) -> List[Dict]:
+    with contextlib.redirect_stdout(io.StringIO()):
+        return screener.calculate_scores(screener.apply_filters(raw_data))
+
+
+def bench(screener: LongTermStockScreener, raw_data: Dict[str, Any], repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run_once(screener, raw_data)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark long-term stock screening")
+    parser.add_argument("--fixture", help="Pickled stock_zh_a_spot_em DataFrame")
+    parser.add_argument("--record", help="Fetch a live snapshot and save it to this path, then exit")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    if args.record:
+        record_fixture(args.record)
+        return
+
+    if args.fixture:
+        spot = pd.read_pickle(args.fixture)
+        source = f"fixture {args.fixture}"
+    else:
+        spot = synthetic_spot_snapshot()
+        source = "SYNTHETIC snapshot (pass --fixture for recorded market data)"
+
+    spot = spot.copy()
+    spot['代码'] = spot['代码'].astype(str).str.zfill(6)
+    sectors = ['银行', '白酒', '半导体', '医药', '电力']
+    sector_map = {code: sectors[i % len(sectors)] for i, code in enumerate(spot['代码'])}
+
+    scenarios = {
+        'default': (None, {}),
+        'sector prefs': ({'preferred_sectors': ['银行', '电力'], 'excluded_sectors': ['白酒']}, sector_map),
+    }
+
+    print(f"Source: {source}, {len(spot)} rows, best of {args.repeat}")
+    for label, (prefs, smap) in scenarios.items():
+        raw_data = {'stock_spot': spot, 'sector_map': smap}
+        legacy, current = LegacyLongTermStockScreener(), LongTermStockScreener()
+        legacy.user_preferences = current.user_preferences = prefs
+
+        assert_identical(run_once(legacy, raw_data), run_once(current, raw_data))
+
+        before = bench(legacy, raw_data, args.repeat)
+        after = bench(current, raw_data, args.repeat)
+        print(f"  [{label}] iterrows: {before * 1000:8.1f} ms | columnar: {after * 1000:7.1f} ms | "
+              f"speedup x{before / after:.1f} | output identical")
+
+
+if __name__ == "__main__":
+    main()
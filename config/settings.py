@@ -19,9 +19,92 @@ OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-4o")
 # Using a high-reasoning model for analysis is recommended.
 GEMINI_MODEL = "gemini-2.0-flash-exp"
 
+# Max in-flight LLM completions per provider, and the per-run budget (seconds)
+# for the recommendation engine's LLM step before it falls back to screening results
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "2"))
+LLM_GENERATION_TIMEOUT = float(os.getenv("LLM_GENERATION_TIMEOUT", "180"))
+
+# Persistent LLM response cache (identical prompts are answered from SQLite)
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "2000"))
+LLM_CACHE_MAX_MB = float(os.getenv("LLM_CACHE_MAX_MB", "50"))
+# TTL (seconds) per report type
+LLM_CACHE_TTL = {
+    "pre_market": int(os.getenv("LLM_CACHE_TTL_PRE_MARKET", "21600")),
+    "post_market": int(os.getenv("LLM_CACHE_TTL_POST_MARKET", "43200")),
+    "recommendation": int(os.getenv("LLM_CACHE_TTL_RECOMMENDATION", "3600")),
+    "commodity": int(os.getenv("LLM_CACHE_TTL_COMMODITY", "14400")),
+    "default": int(os.getenv("LLM_CACHE_TTL_DEFAULT", "3600")),
+}
+
 # Redis Configuration (Optional - falls back to in-memory cache if not configured)
 REDIS_URL = os.getenv("REDIS_URL")  # e.g., redis://localhost:6379/0 or redis://:password@host:port/db
+# In-memory cache bounds (used without Redis): max entries, max approximate bytes,
+# eviction policy ("lru" or "lfu") and the expired-entry sweep interval (seconds)
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "10000"))
+CACHE_MAX_BYTES = int(os.getenv("CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+CACHE_EVICTION_POLICY = os.getenv("CACHE_EVICTION_POLICY", "lru").lower()
+CACHE_SWEEP_INTERVAL = int(os.getenv("CACHE_SWEEP_INTERVAL", "60"))
+# get_or_set: cross-worker compute lock lifetime / max wait (seconds, Redis only), and
+# threads running stale-while-revalidate background refreshes
+CACHE_LOCK_TIMEOUT = int(os.getenv("CACHE_LOCK_TIMEOUT", "30"))
+CACHE_REFRESH_WORKERS = int(os.getenv("CACHE_REFRESH_WORKERS", "4"))
+# Redis value encoding: codec ("msgpack", "json" or "pickle"), compression
+# ("zstd", "lz4", "zlib" or "none") and the payload size from which to compress
+CACHE_CODEC = os.getenv("CACHE_CODEC", "msgpack").lower()
+CACHE_COMPRESSION = os.getenv("CACHE_COMPRESSION", "zstd").lower()
+CACHE_COMPRESS_MIN_BYTES = int(os.getenv("CACHE_COMPRESS_MIN_BYTES", "1024"))
+# With Redis: in-process L1 cache in front of it (max seconds an entry is served
+# without a round trip, 0 disables), bounded by entries and approximate bytes
+CACHE_L1_TTL = int(os.getenv("CACHE_L1_TTL", "5"))
+CACHE_L1_MAX_ENTRIES = int(os.getenv("CACHE_L1_MAX_ENTRIES", "1000"))
+CACHE_L1_MAX_BYTES = int(os.getenv("CACHE_L1_MAX_BYTES", str(64 * 1024 * 1024)))
+# Dashboard sections past their TTL are served this many more seconds while refreshing in the background
+DASHBOARD_STALE_TTL = int(os.getenv("DASHBOARD_STALE_TTL", "300"))
+
+# Market snapshot staleness budget (seconds) for the shared A-share spot table while trading
+SPOT_SNAPSHOT_TTL_TRADING = int(os.getenv("SPOT_SNAPSHOT_TTL_TRADING", "30"))
+
+# Freshness budget (seconds) per data category and A-share session phase, see
+# src/cache/ttl_policy.py. None = valid until the next session (auction) starts,
+# so nothing is re-fetched while the market is shut.
+CACHE_TTL_POLICY = {
+    "a_share_spot":   dict(pre_open=None, auction=15, continuous=SPOT_SNAPSHOT_TTL_TRADING, lunch=None, closed=None, holiday=None),
+    "a_share_board":  dict(pre_open=None, auction=60, continuous=300, lunch=None, closed=None, holiday=None),
+    "global_index":   dict(pre_open=60, auction=60, continuous=60, lunch=60, closed=300, holiday=900),
+    "fund_nav":       dict(pre_open=3600, auction=3600, continuous=3600, lunch=3600, closed=1800, holiday=None),
+    "recommendation": dict(pre_open=None, auction=14400, continuous=14400, lunch=None, closed=None, holiday=None),
+    "default":        dict(pre_open=300, auction=300, continuous=300, lunch=300, closed=300, holiday=300),
+}
+# Bulk quotes: process-wide pool for single-stock fetches of snapshot misses, and
+# the miss count above which one snapshot refresh is cheaper than single fetches
+QUOTE_FETCH_WORKERS = int(os.getenv("QUOTE_FETCH_WORKERS", "8"))
+QUOTE_SNAPSHOT_MIN_MISSES = int(os.getenv("QUOTE_SNAPSHOT_MIN_MISSES", "40"))
+# WebSocket quote stream refresh interval (seconds) during / outside trading sessions
+QUOTE_STREAM_INTERVAL = int(os.getenv("QUOTE_STREAM_INTERVAL", "10"))
+QUOTE_STREAM_IDLE_INTERVAL = int(os.getenv("QUOTE_STREAM_IDLE_INTERVAL", "300"))
+
+# Board constituent crawler (industry/concept boards): worker threads and request rate (per second)
+BOARD_CRAWL_MAX_WORKERS = int(os.getenv("BOARD_CRAWL_MAX_WORKERS", "8"))
+BOARD_CRAWL_RATE = float(os.getenv("BOARD_CRAWL_RATE", "4"))
+
+# Analysis job queue: worker threads, and spread (seconds) of scheduled start times within a slot
+ANALYSIS_WORKERS = int(os.getenv("ANALYSIS_WORKERS", "4"))
+SCHEDULER_JITTER_SECONDS = int(os.getenv("SCHEDULER_JITTER_SECONDS", "300"))
+# Market-wide inputs (macro, northbound, industry flow, indices) are shared by
+# all reports of one mode started within this many seconds
+MARKET_CONTEXT_TTL = int(os.getenv("MARKET_CONTEXT_TTL", "600"))
+# Per-collector timeout (seconds) of a report's data phase; late collectors fall back to placeholders
+COLLECTOR_TIMEOUT = float(os.getenv("COLLECTOR_TIMEOUT", "45"))
+# Holdings processed concurrently in a fund report's holdings deep-dive / quote lookup
+HOLDINGS_WORKERS = int(os.getenv("HOLDINGS_WORKERS", "5"))
+
+# Per-upstream concurrency limits (LLM uses LLM_MAX_CONCURRENCY)
+AKSHARE_MAX_CONCURRENCY = int(os.getenv("AKSHARE_MAX_CONCURRENCY", "4"))
+TAVILY_MAX_CONCURRENCY = int(os.getenv("TAVILY_MAX_CONCURRENCY", "3"))
 
 # Paths
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 FUNDS_FILE = os.path.join(BASE_DIR, "config", "funds.json")
+# Shared AkShare tables (spot, fund rank, boards) persisted across processes and restarts
+CACHE_FRAME_DIR = os.getenv("CACHE_FRAME_DIR", os.path.join(BASE_DIR, "data", "frames"))
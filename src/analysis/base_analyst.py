@@ -4,6 +4,7 @@ This module centralizes shared logic between pre-market and post-market analysts
 - fund list loading
 - sources tracking + formatting
 - run_all / run_one orchestration
+- the market context shared by every strategy of one analyst (one run)
 
 Collector methods and prompt composition remain in the concrete analyst classes.
 """
@@ -13,9 +14,11 @@ from __future__ import annotations
 import json
 import os
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Dict, Iterator, List, Optional, Tuple
 
 from config.settings import FUNDS_FILE
+from src.analysis.strategies.factory import StrategyFactory
+from src.analysis.strategies.market_context import MarketContext
 from src.data_sources.web_search import WebSearch
 from src.llm.client import get_llm_client
 
@@ -25,10 +28,15 @@ class BaseAnalyst:
 
     SYSTEM_TITLE: str = "分析系统启动"
     FAILURE_SUFFIX: str = "分析失败"
+    MODE: str = ""  # 'pre' / 'post', passed to the strategy
 
-    def __init__(self):
+    def __init__(self, market_context: Optional[MarketContext] = None):
         self.web_search = WebSearch()
         self.llm = get_llm_client()
+        # Market-wide inputs are fetched once and shared by all items this analyst runs
+        self.market_context = market_context or MarketContext(self.web_search)
+        if self.market_context.web_search is None:
+            self.market_context.web_search = self.web_search
         self.funds = self._load_funds()
         self.today = self._compute_today()
         self.sources: List[Dict] = []
@@ -113,9 +121,36 @@ class BaseAnalyst:
     # Orchestration
     # =========================================================================
 
+    def _get_strategy(self, item: Dict):
+        return StrategyFactory.get_strategy(item, self.llm, self.web_search, self.market_context)
+
+    def _collect_data(self, strategy) -> Dict:
+        """Prefetch the run's market-wide inputs, then strategy.collect_data."""
+        self.market_context.prefetch(strategy.market_inputs(self.MODE))
+        return strategy.collect_data(mode=self.MODE)
+
     def analyze_fund(self, fund: Dict) -> str:  # pragma: no cover
         raise NotImplementedError
 
+    def analyze_fund_stream(self, fund: Dict) -> Iterator[Tuple[str, str]]:
+        """
+        Streaming variant of analyze_fund for a fund or stock item.
+
+        Yields ("status", message) while collecting data, then ("token", chunk)
+        as the report is generated. Exceptions propagate to the caller.
+        """
+        print(f"\n{'=' * 60}")
+        print(f"🔍 流式分析: {fund.get('name')} ({fund.get('code')}) | 模式: {self.MODE}")
+        print(f"{'=' * 60}")
+        strategy = self._get_strategy(fund)
+
+        yield "status", "collecting_data"
+        data = self._collect_data(strategy)
+
+        yield "status", "generating_report"
+        for chunk in strategy.generate_report_stream(mode=self.MODE, data=data):
+            yield "token", chunk
+
     def run_all(self) -> str:
         """Run analysis for all configured funds."""
         print(f"\n{'#' * 60}")
@@ -21,6 +21,7 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(
 from src.data_sources.yfinance_api import YFinanceAPI
 from src.data_sources.web_search import WebSearch
 from src.llm.client import get_llm_client
+from src.llm.response_cache import llm_response_cache
 from src.llm.prompts import GOLD_SILVER_ANALYSIS_PROMPT_TEMPLATE
 from src.analysis.commodities.quantitative import QuantitativeAnalyst
 
@@ -102,6 +103,41 @@ class GoldSilverAnalyst:
         Main analysis pipeline.
         asset_type: 'gold' or 'silver'
         """
+        prompt, news_results, asset_name = self._build_prompt(asset_type, user_id)
+
+        report = llm_response_cache.generate(self.llm, prompt, report_type="commodity")
+
+        # Append Sources
+        report += self._format_sources(news_results)
+
+        self._save_report(report, asset_type, asset_name, user_id)
+        return report
+
+    def analyze_stream(self, asset_type: str = "gold", user_id: int = None):
+        """
+        Streaming variant of analyze(): yields ("status", message) while
+        collecting data, ("token", chunk) while the LLM writes, then
+        ("done", {"filename": ...}) once the report is saved.
+        """
+        yield "status", "collecting_data"
+        prompt, news_results, asset_name = self._build_prompt(asset_type, user_id)
+
+        yield "status", "generating_report"
+        parts = []
+        for chunk in llm_response_cache.generate_stream(self.llm, prompt, report_type="commodity"):
+            parts.append(chunk)
+            yield "token", chunk
+
+        sources = self._format_sources(news_results)
+        if sources:
+            parts.append(sources)
+            yield "token", sources
+
+        filename = self._save_report("".join(parts), asset_type, asset_name, user_id)
+        yield "done", {"filename": os.path.basename(filename)}
+
+    def _build_prompt(self, asset_type: str, user_id: int = None):
+        """Data collection, backtest and research; returns (prompt, news_results, asset_name)."""
         asset_name = "Gold" if asset_type.lower() == "gold" else "Silver"
         symbol = "GC=F" if asset_type.lower() == "gold" else "SI=F"
         
@@ -215,12 +251,10 @@ class GoldSilverAnalyst:
             target_price="{target_price}",
             risk_level="{risk_level}"
         )
-        
-        report = self.llm.generate_content(prompt)
-        
-        # Append Sources
-        report += self._format_sources(news_results)
-        
+        return prompt, news_results, asset_name
+
+    def _save_report(self, report: str, asset_type: str, asset_name: str, user_id: int = None) -> str:
+        """Write the report under reports/[user_id/]commodities and return its path."""
         # Save logic updated for user isolation
         # src/analysis/commodities/gold_silver.py -> src/analysis/commodities -> src/analysis -> src -> root
         base_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
@@ -238,7 +272,7 @@ class GoldSilverAnalyst:
             f.write(report)
             
         print(f"  ✅ Deep Report saved to {filename}")
-        return report
+        return filename
 
 if __name__ == "__main__":
     analyst = GoldSilverAnalyst()
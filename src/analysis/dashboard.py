@@ -5,49 +5,31 @@ import os
 import glob
 from datetime import datetime, timedelta
 from typing import Dict, Any, List
-import time
-import threading
 import concurrent.futures
 
-# Cache Setup
-_DASHBOARD_CACHE = {}
-_DASHBOARD_CACHE_LOCK = threading.Lock()
-_DEFAULT_CACHE_TTL = 300  # 5 minutes
+from config.settings import DASHBOARD_STALE_TTL
+from src.data_sources.akshare_api import get_industry_board_table
+from src.cache import cache_manager
+from src.cache.ttl_policy import ttl_policy, A_SHARE_SPOT, A_SHARE_BOARD, GLOBAL_INDEX
 
 class DashboardService:
     def __init__(self, report_dir: str):
         self.report_dir = report_dir
 
-    def _get_cached_data(self, key: str, ignore_expiry: bool = False):
-        with _DASHBOARD_CACHE_LOCK:
-            if key in _DASHBOARD_CACHE:
-                data, expiry = _DASHBOARD_CACHE[key]
-                if ignore_expiry or time.time() < expiry:
-                    return data
-                else:
-                    del _DASHBOARD_CACHE[key]
-        return None
-
-    def _set_cached_data(self, key: str, data: Any, duration: int = _DEFAULT_CACHE_TTL):
-        with _DASHBOARD_CACHE_LOCK:
-            _DASHBOARD_CACHE[key] = (data, time.time() + duration)
-
-    def _is_china_market_open(self) -> bool:
-        """Check if current time is between 09:30 and 15:00"""
-        now = datetime.now()
-        hm = now.hour * 100 + now.minute
-        return 930 <= hm < 1500
+    def _cached(self, key: str, loader, category: str = A_SHARE_BOARD, force_refresh: bool = False):
+        """
+        Section data through the shared cache: concurrent requests share one
+        loader call, and expired data is served for DASHBOARD_STALE_TTL more
+        seconds while a single background refresh runs.
+        """
+        return cache_manager.get_or_set(f"dashboard:{key}", loader, ttl=ttl_policy.ttl(category),
+                                        stale_ttl=DASHBOARD_STALE_TTL, refresh=force_refresh)
 
     def get_market_overview(self, force_refresh: bool = False) -> Dict[str, Any]:
         """Section 1: Market Breadth, Indices, Turnover"""
-        cache_key = "market_overview"
-        # If market closed, use cache indefinitely (ignore expiry)
-        ignore_expiry = not self._is_china_market_open()
-        
-        if not force_refresh:
-            cached = self._get_cached_data(cache_key, ignore_expiry=ignore_expiry)
-            if cached: return cached
+        return self._cached("market_overview", self._load_market_overview, A_SHARE_BOARD, force_refresh)
 
+    def _load_market_overview(self) -> Dict[str, Any]:
         data = {
             "indices": [],
             "breadth": {"up": 0, "down": 0, "flat": 0, "limit_up": 0, "limit_down": 0},
@@ -135,16 +117,13 @@ class DashboardService:
         except Exception as e:
             print(f"Error fetching market overview: {e}")
 
-        self._set_cached_data(cache_key, data)
         return data
 
     def get_gold_macro(self, force_refresh: bool = False) -> Dict[str, Any]:
         """Section 2: Gold & Macro (YFinance)"""
-        cache_key = "gold_macro"
-        if not force_refresh:
-            cached = self._get_cached_data(cache_key)
-            if cached: return cached
-        
+        return self._cached("gold_macro", self._load_gold_macro, GLOBAL_INDEX, force_refresh)
+
+    def _load_gold_macro(self) -> Dict[str, Any]:
         data = {"symbol": "GC=F", "price": 0, "change_pct": 0, "dxy": 0}
         try:
             # Gold
@@ -165,21 +144,16 @@ class DashboardService:
         except Exception as e:
             print(f"Error fetching gold/macro: {e}")
             
-        self._set_cached_data(cache_key, data)
         return data
 
     def get_sectors(self, force_refresh: bool = False) -> Dict[str, List]:
         """Section 3: Sector Performance"""
-        cache_key = "sectors"
-        ignore_expiry = not self._is_china_market_open()
-        
-        if not force_refresh:
-            cached = self._get_cached_data(cache_key, ignore_expiry=ignore_expiry)
-            if cached: return cached
-        
+        return self._cached("sectors", self._load_sectors, A_SHARE_BOARD, force_refresh)
+
+    def _load_sectors(self) -> Dict[str, List]:
         result = {"gainers": [], "losers": []}
         try:
-            df = ak.stock_board_industry_name_em()
+            df = get_industry_board_table()
             if not df.empty:
                 # Sort by change
                 sorted_df = df.sort_values(by='涨跌幅', ascending=False)
@@ -202,18 +176,13 @@ class DashboardService:
         except Exception as e:
             print(f"Error fetching sectors: {e}")
             
-        self._set_cached_data(cache_key, result)
         return result
 
     def get_abnormal_movements(self, force_refresh: bool = False) -> List[Dict]:
         """Section 4: Abnormal Movements (Stock Level Feed)"""
-        cache_key = "abnormal_feed"
-        ignore_expiry = not self._is_china_market_open()
-        
-        if not force_refresh:
-            cached = self._get_cached_data(cache_key, ignore_expiry=ignore_expiry)
-            if cached: return cached
-        
+        return self._cached("abnormal_feed", self._load_abnormal_movements, A_SHARE_SPOT, force_refresh)
+
+    def _load_abnormal_movements(self) -> List[Dict]:
         moves = []
         try:
             # Fetch various types of real-time signals
@@ -248,20 +217,13 @@ class DashboardService:
         except Exception as e:
             print(f"Error fetching abnormal movements: {e}")
             
-        # Cache for 30 seconds
-        result = moves[:30]
-        self._set_cached_data(cache_key, result, duration=30)
-        return result
+        return moves[:30]
 
     def get_top_holdings_changes(self, force_refresh: bool = False) -> List[Dict]:
         """Section 5: Top Capital Flow Stocks"""
-        cache_key = "top_flow"
-        ignore_expiry = not self._is_china_market_open()
-        
-        if not force_refresh:
-            cached = self._get_cached_data(cache_key, ignore_expiry=ignore_expiry)
-            if cached: return cached
-        
+        return self._cached("top_flow", self._load_top_holdings_changes, A_SHARE_BOARD, force_refresh)
+
+    def _load_top_holdings_changes(self) -> List[Dict]:
         stocks = []
         try:
             # Main capital flow rank
@@ -287,7 +249,6 @@ class DashboardService:
         except Exception as e:
             print(f"Error flow: {e}")
             
-        self._set_cached_data(cache_key, stocks)
         return stocks
 
     def get_system_stats(self, user_report_dir: str = None) -> Dict[str, Any]:
@@ -11,7 +11,6 @@ from datetime import datetime
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
 from src.analysis.base_analyst import BaseAnalyst
-from src.analysis.strategies.factory import StrategyFactory
 
 class PostMarketAnalyst(BaseAnalyst):
     """
@@ -20,9 +19,10 @@ class PostMarketAnalyst(BaseAnalyst):
     
     SYSTEM_TITLE = "盘后复盘系统启动"
     FAILURE_SUFFIX = "复盘失败"
+    MODE = "post"
 
-    def __init__(self):
-        super().__init__()
+    def __init__(self, market_context=None):
+        super().__init__(market_context)
 
     def analyze_fund(self, fund: dict) -> str:
         """
@@ -35,10 +35,10 @@ class PostMarketAnalyst(BaseAnalyst):
 
         try:
             # 1. Get Strategy
-            strategy = StrategyFactory.get_strategy(fund, self.llm, self.web_search)
+            strategy = self._get_strategy(fund)
 
             # 2. Collect Data
-            data = strategy.collect_data(mode='post')
+            data = self._collect_data(strategy)
 
             # 3. Generate Report
             report = strategy.generate_report(mode='post', data=data)
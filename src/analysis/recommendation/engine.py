@@ -2,10 +2,16 @@
 Recommendation Engine - Main orchestrator for AI investment recommendations.
 """
 import json
+import time
 import asyncio
-from typing import Dict, List, Any, Optional
+import threading
+from typing import Callable, Dict, List, Any, Optional
 from datetime import datetime
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FuturesTimeout
+
+from config.settings import LLM_GENERATION_TIMEOUT
+from src.llm.response_cache import llm_response_cache
+from src.cache.ttl_policy import ttl_policy, RECOMMENDATION
 
 from .screener import (
     ShortTermStockScreener,
@@ -13,6 +19,7 @@ from .screener import (
     ShortTermFundScreener,
     LongTermFundScreener,
 )
+from .screener.data_context import ScreeningDataContext
 
 
 class RecommendationEngine:
@@ -53,6 +60,7 @@ class RecommendationEngine:
         fund_limit: int = 20,
         use_llm: bool = True,
         user_preferences: Optional[Dict[str, Any]] = None,
+        on_partial: Optional[Callable[[Dict[str, Any]], None]] = None,
     ) -> Dict[str, Any]:
         """
         Generate investment recommendations.
@@ -63,6 +71,8 @@ class RecommendationEngine:
             fund_limit: Maximum funds to screen
             use_llm: Whether to use LLM for final analysis
             user_preferences: User's personalized preferences (optional)
+            on_partial: Called with the results so far each time the short-term
+                or long-term block is ready (optional)
 
         Returns:
             Dict containing recommendations and metadata
@@ -83,48 +93,31 @@ class RecommendationEngine:
             "short_term": None,
             "long_term": None,
             "metadata": {
-                "screening_time": 0,
+                "screening_time": {"total": 0, "per_screener": {}, "critical_path": None, "shared_fetches": {}},
                 "llm_time": 0,
                 "total_time": 0,
                 "personalized": is_personalized,
             }
         }
 
-        # Step 1: Screen candidates (with user preferences for early filtering)
+        # Step 1: Screen candidates concurrently (with user preferences for early filtering)
         print("📊 Step 1: 筛选候选标的...")
-        screening_start = datetime.now()
-
+        jobs = []
         if mode in ["short", "all"]:
-            print("\n--- 短期股票筛选 ---")
-            short_stocks = self.short_term_stock_screener.screen(
-                limit=stock_limit,
-                user_preferences=user_preferences
-            )
-            print(f"\n--- 短期基金筛选 ---")
-            short_funds = self.short_term_fund_screener.screen(
-                limit=fund_limit,
-                user_preferences=user_preferences
-            )
-        else:
-            short_stocks, short_funds = [], []
-
+            jobs += [(self.short_term_stock_screener, stock_limit), (self.short_term_fund_screener, fund_limit)]
         if mode in ["long", "all"]:
-            print("\n--- 长期股票筛选 ---")
-            long_stocks = self.long_term_stock_screener.screen(
-                limit=stock_limit,
-                user_preferences=user_preferences
-            )
-            print(f"\n--- 长期基金筛选 ---")
-            long_funds = self.long_term_fund_screener.screen(
-                limit=fund_limit,
-                user_preferences=user_preferences
-            )
-        else:
-            long_stocks, long_funds = [], []
+            jobs += [(self.long_term_stock_screener, stock_limit), (self.long_term_fund_screener, fund_limit)]
+
+        screened, screening_time = self._run_screeners(jobs, user_preferences)
+        short_stocks = screened.get("short_term_stock", [])
+        short_funds = screened.get("short_term_fund", [])
+        long_stocks = screened.get("long_term_stock", [])
+        long_funds = screened.get("long_term_fund", [])
 
-        screening_time = (datetime.now() - screening_start).total_seconds()
         results["metadata"]["screening_time"] = screening_time
-        print(f"\n✓ 筛选完成，耗时: {screening_time:.1f}秒")
+        critical = screening_time["critical_path"]
+        print(f"\n✓ 筛选完成，耗时: {screening_time['total']:.1f}秒"
+              + (f" | 关键路径: {critical['screener']} {critical['seconds']:.1f}秒" if critical else ""))
 
         # Note: User preference filtering is now done EARLY in the screener itself
         # The following Step 1.5 is kept for backward compatibility but may be redundant
@@ -142,18 +135,33 @@ class RecommendationEngine:
             print("\n🤖 Step 2: AI分析与推荐生成...")
             llm_start = datetime.now()
 
+            # key -> (generate(cancel), fallback()); both halves run concurrently
+            generations = {}
             if mode in ["short", "all"]:
-                results["short_term"] = self._generate_short_term_recommendations(
-                    short_stocks, short_funds, user_preferences, stock_rec_count, fund_rec_count
+                generations["short_term"] = (
+                    lambda cancel: self._generate_short_term_recommendations(
+                        short_stocks, short_funds, user_preferences, stock_rec_count, fund_rec_count, cancel=cancel
+                    ),
+                    lambda: self._short_term_fallback(
+                        short_stocks, short_funds, stock_rec_count, fund_rec_count, "AI分析超时，返回筛选结果"
+                    ),
                 )
 
             if mode in ["long", "all"]:
-                results["long_term"] = self._generate_long_term_recommendations(
-                    long_stocks, long_funds, user_preferences, stock_rec_count, fund_rec_count
+                generations["long_term"] = (
+                    lambda cancel: self._generate_long_term_recommendations(
+                        long_stocks, long_funds, user_preferences, stock_rec_count, fund_rec_count, cancel=cancel
+                    ),
+                    lambda: self._long_term_fallback(
+                        long_stocks, long_funds, stock_rec_count, fund_rec_count, "AI分析超时，返回筛选结果"
+                    ),
                 )
 
+            llm_timing = self._run_generations(generations, results, on_partial)
+
             llm_time = (datetime.now() - llm_start).total_seconds()
             results["metadata"]["llm_time"] = llm_time
+            results["metadata"]["llm_timing"] = llm_timing
             print(f"\n✓ AI分析完成，耗时: {llm_time:.1f}秒")
         else:
             # Return raw screening results without LLM
@@ -183,6 +191,122 @@ class RecommendationEngine:
 
         return results
 
+    def _run_screeners(
+        self,
+        jobs: List[tuple],
+        user_preferences: Optional[Dict[str, Any]],
+    ) -> tuple:
+        """
+        Run screeners concurrently over one shared ScreeningDataContext.
+
+        Upstream data that several screeners need is prefetched once, in parallel
+        with the screeners themselves. Returns ({screener_type: candidates}, timing),
+        where timing reports total wall time, per-screener wall time and the
+        critical path (the screener that finished last).
+        """
+        context = ScreeningDataContext()
+        prefetch: Dict[str, Any] = {}
+        for screener, _ in jobs:
+            prefetch.update(screener.shared_data(user_preferences))
+
+        screening_start = time.time()
+        finished: Dict[str, float] = {}
+        durations: Dict[str, float] = {}
+        screened: Dict[str, List[Dict]] = {}
+
+        def run(screener, limit):
+            start = time.time()
+            try:
+                return screener.screen(limit=limit, user_preferences=user_preferences, data_context=context)
+            finally:
+                durations[screener.screener_type] = round(time.time() - start, 2)
+                finished[screener.screener_type] = time.time() - screening_start
+
+        if jobs:
+            with ThreadPoolExecutor(max_workers=len(jobs) + len(prefetch), thread_name_prefix="screener") as pool:
+                for key, loader in prefetch.items():
+                    # Errors surface to the screener that reads the key
+                    pool.submit(context.get, key, loader)
+                futures = {pool.submit(run, screener, limit): screener.screener_type for screener, limit in jobs}
+                for future, name in futures.items():
+                    screened[name] = future.result()
+
+        critical_path = None
+        if finished:
+            name = max(finished, key=finished.get)
+            critical_path = {
+                "screener": name,
+                "seconds": round(finished[name], 2),
+                "shared_data_wait": context.wait_times().get(name, 0.0),
+            }
+
+        timing = {
+            "total": round(time.time() - screening_start, 2),
+            "per_screener": durations,
+            "critical_path": critical_path,
+            "shared_fetches": context.fetch_times(),
+        }
+        return screened, timing
+
+    def _run_generations(
+        self,
+        generations: Dict[str, tuple],
+        results: Dict[str, Any],
+        on_partial: Optional[Callable[[Dict[str, Any]], None]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Run the LLM generations concurrently, storing each block in results as it lands.
+
+        Blocks not finished within LLM_GENERATION_TIMEOUT are cancelled and replaced
+        by their fallback (raw screening results). A call already in flight can't be
+        aborted; its late answer is discarded. Returns per-block seconds and the
+        list of timed-out blocks.
+        """
+        timing: Dict[str, Any] = {"per_block": {}, "timed_out": []}
+        if not generations:
+            return timing
+
+        start = time.time()
+        cancel = threading.Event()
+        pool = ThreadPoolExecutor(max_workers=len(generations), thread_name_prefix="llm")
+        futures = {pool.submit(generate, cancel): key for key, (generate, _) in generations.items()}
+
+        def deliver(key: str, value: Dict[str, Any]) -> None:
+            results[key] = value
+            if on_partial:
+                try:
+                    on_partial(results)
+                except Exception as e:
+                    print(f"  ! 推送部分结果失败: {e}")
+
+        try:
+            for future in as_completed(futures, timeout=LLM_GENERATION_TIMEOUT):
+                key = futures[future]
+                timing["per_block"][key] = round(time.time() - start, 2)
+                print(f"  ✓ {key} AI分析完成，耗时: {timing['per_block'][key]:.1f}秒")
+                deliver(key, future.result())
+        except FuturesTimeout:
+            cancel.set()
+            for future, key in futures.items():
+                if key in timing["per_block"]:
+                    continue
+                if future.done() and not future.cancelled():
+                    timing["per_block"][key] = round(time.time() - start, 2)
+                    deliver(key, future.result())
+                    continue
+                future.cancel()
+                timing["timed_out"].append(key)
+                print(f"  ⏱ {key} AI分析超时（{LLM_GENERATION_TIMEOUT:.0f}秒），返回筛选结果")
+                deliver(key, generations[key][1]())
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+        return timing
+
+    def _call_llm(self, prompt: str, cancel: Optional[threading.Event] = None) -> Optional[str]:
+        """LLM completion (cached, under the provider's concurrency cap); None if cancelled before it started."""
+        return llm_response_cache.generate(self.llm, prompt, report_type="recommendation", cancel=cancel)
+
     def _log_preferences_summary(self, prefs: Dict[str, Any]) -> None:
         """Log a summary of user preferences."""
         print(f"  📋 用户偏好摘要:")
@@ -344,6 +468,7 @@ class RecommendationEngine:
         user_preferences: Optional[Dict[str, Any]] = None,
         stock_limit: int = 8,
         fund_limit: int = 5,
+        cancel: Optional[threading.Event] = None,
     ) -> Dict[str, Any]:
         """Generate short-term recommendations using LLM."""
         from src.llm.recommendation_prompts import SHORT_TERM_RECOMMENDATION_PROMPT
@@ -377,7 +502,7 @@ class RecommendationEngine:
 
         # Call LLM
         try:
-            response = self.llm.generate_content(prompt)
+            response = self._call_llm(prompt, cancel)
             result = self._parse_llm_response(response)
 
             if result:
@@ -388,10 +513,21 @@ class RecommendationEngine:
             print(f"  ✗ LLM分析失败: {e}")
 
         # Fallback to simple selection
+        return self._short_term_fallback(stocks, funds, stock_limit, fund_limit)
+
+    def _short_term_fallback(
+        self,
+        stocks: List[Dict],
+        funds: List[Dict],
+        stock_limit: int = 8,
+        fund_limit: int = 5,
+        market_view: str = "AI分析暂时不可用，返回筛选结果",
+    ) -> Dict[str, Any]:
+        """Short-term block built from screening results alone."""
         return {
             "short_term_stocks": self._simple_select_stocks(stocks, limit=stock_limit),
             "short_term_funds": self._simple_select_funds(funds, limit=fund_limit),
-            "market_view": "AI分析暂时不可用，返回筛选结果",
+            "market_view": market_view,
             "sector_preference": [],
             "risk_warning": "请结合自身判断进行投资决策",
         }
@@ -403,6 +539,7 @@ class RecommendationEngine:
         user_preferences: Optional[Dict[str, Any]] = None,
         stock_limit: int = 8,
         fund_limit: int = 5,
+        cancel: Optional[threading.Event] = None,
     ) -> Dict[str, Any]:
         """Generate long-term recommendations using LLM."""
         from src.llm.recommendation_prompts import LONG_TERM_RECOMMENDATION_PROMPT
@@ -436,7 +573,7 @@ class RecommendationEngine:
 
         # Call LLM
         try:
-            response = self.llm.generate_content(prompt)
+            response = self._call_llm(prompt, cancel)
             result = self._parse_llm_response(response)
 
             if result:
@@ -447,10 +584,21 @@ class RecommendationEngine:
             print(f"  ✗ LLM分析失败: {e}")
 
         # Fallback
+        return self._long_term_fallback(stocks, funds, stock_limit, fund_limit)
+
+    def _long_term_fallback(
+        self,
+        stocks: List[Dict],
+        funds: List[Dict],
+        stock_limit: int = 8,
+        fund_limit: int = 5,
+        macro_view: str = "AI分析暂时不可用，返回筛选结果",
+    ) -> Dict[str, Any]:
+        """Long-term block built from screening results alone."""
         return {
             "long_term_stocks": self._simple_select_stocks(stocks, limit=stock_limit),
             "long_term_funds": self._simple_select_funds(funds, limit=fund_limit),
-            "macro_view": "AI分析暂时不可用，返回筛选结果",
+            "macro_view": macro_view,
             "sector_preference": [],
             "risk_warning": "请结合自身判断进行投资决策",
         }
@@ -604,8 +752,8 @@ class RecommendationEngine:
     def _get_hot_sectors(self) -> str:
         """Get hot sectors information."""
         try:
-            import akshare as ak
-            df = ak.stock_board_industry_name_em()
+            from src.data_sources.akshare_api import get_industry_board_table
+            df = get_industry_board_table()
             if df is not None and not df.empty:
                 top5 = df.head(5)
                 sectors = []
@@ -639,8 +787,8 @@ class RecommendationEngine:
     def _get_industry_outlook(self) -> str:
         """Get industry outlook information."""
         try:
-            import akshare as ak
-            df = ak.stock_board_industry_name_em()
+            from src.data_sources.akshare_api import get_industry_board_table
+            df = get_industry_board_table()
             if df is not None and not df.empty:
                 # Get top and bottom sectors
                 top3 = df.head(3)
@@ -811,10 +959,12 @@ class RecommendationEngine:
         cache_key = f"recommendations:{user_id or 'global'}:{mode}"
         return self.cache.get(cache_key)
 
-    def cache_recommendations(self, results: Dict, user_id: int = None, ttl: int = 14400):
-        """Cache recommendations (default 4 hours)."""
+    def cache_recommendations(self, results: Dict, user_id: int = None, ttl: Optional[int] = None):
+        """Cache recommendations (default: TTL policy, 4 hours while trading, until the next session otherwise)."""
         if not self.cache:
             return
+        if ttl is None:
+            ttl = ttl_policy.ttl(RECOMMENDATION)
 
         mode = results.get("mode", "all")
         cache_key = f"recommendations:{user_id or 'global'}:{mode}"
@@ -2,9 +2,11 @@
 Base Screener - Abstract base class for all screeners.
 """
 from abc import ABC, abstractmethod
-from typing import Dict, List, Any, Optional
+from typing import Callable, Dict, List, Any, Optional
 from datetime import datetime
 
+from src.cache.ttl_policy import ttl_policy, A_SHARE_BOARD
+
 
 class BaseScreener(ABC):
     """
@@ -27,6 +29,7 @@ class BaseScreener(ABC):
         self.cache = cache_manager
         self.screening_date = datetime.now().strftime("%Y-%m-%d")
         self.user_preferences: Optional[Dict[str, Any]] = None
+        self.data_context = None  # ScreeningDataContext shared with sibling screeners
 
     @property
     @abstractmethod
@@ -76,19 +79,29 @@ class BaseScreener(ABC):
         """
         pass
 
-    def screen(self, limit: int = None, user_preferences: Optional[Dict[str, Any]] = None) -> List[Dict]:
+    def shared_data(self, user_preferences: Optional[Dict[str, Any]] = None) -> Dict[str, Callable[[], Any]]:
+        """
+        Upstream fetches this screener reads through _fetch_shared(), as {key: loader}.
+        The engine prefetches the union of all screeners' keys concurrently.
+        """
+        return {}
+
+    def screen(self, limit: int = None, user_preferences: Optional[Dict[str, Any]] = None,
+               data_context=None) -> List[Dict]:
         """
         Execute the full screening pipeline.
 
         Args:
             limit: Maximum number of candidates to return
             user_preferences: Optional user preferences for early filtering
+            data_context: Optional ScreeningDataContext to share upstream fetches
 
         Returns:
             Sorted list of scored candidates
         """
         limit = limit or self.default_limit
         self.user_preferences = user_preferences
+        self.data_context = data_context
 
         # Step 1: Collect raw data
         raw_data = self.collect_raw_data()
@@ -184,6 +197,12 @@ class BaseScreener(ABC):
 
         return 1.0
 
+    def _fetch_shared(self, key: str, loader: Callable[[], Any]) -> Any:
+        """Fetch upstream data once per data context (or directly without one)."""
+        if self.data_context is None:
+            return loader()
+        return self.data_context.get(key, loader, requester=self.screener_type)
+
     def _cache_key(self, suffix: str) -> str:
         """Generate cache key with screener type and date."""
         return f"screener:{self.screener_type}:{self.screening_date}:{suffix}"
@@ -194,7 +213,9 @@ class BaseScreener(ABC):
             return self.cache.get(self._cache_key(key))
         return None
 
-    def _set_cached(self, key: str, value: Any, ttl: int = 300) -> None:
-        """Set value in cache if available."""
+    def _set_cached(self, key: str, value: Any, ttl: Optional[int] = None) -> None:
+        """Set value in cache if available (default TTL from the session-aware policy)."""
         if self.cache:
+            if ttl is None:
+                ttl = ttl_policy.ttl(A_SHARE_BOARD)
             self.cache.set(self._cache_key(key), value, ttl)
@@ -0,0 +1,40 @@
+"""
+Screening Data Context - upstream data shared by concurrently running screeners.
+
+Several screeners need the same upstream tables (e.g. both fund screeners read
+fund_open_fund_rank_em for 股票型/混合型). A context is created per
+generate_recommendations() run; the first screener that asks for a key fetches
+it, concurrent askers wait for that one fetch instead of issuing their own.
+
+Values are shared between screeners: copy DataFrames before mutating them.
+"""
+import threading
+from typing import Any, Callable, Dict
+
+from src.cache.single_flight import SingleFlight
+
+
+class ScreeningDataContext:
+    """Single-flight, per-run memo of named upstream fetches."""
+
+    def __init__(self):
+        self._flights = SingleFlight(memo=True)
+        self._lock = threading.Lock()
+        self._waits: Dict[str, float] = {}  # screener -> seconds spent waiting on other screeners' fetches
+
+    def get(self, key: str, loader: Callable[[], Any], requester: str = None) -> Any:
+        """Return the value for key, running loader at most once across threads."""
+        def waited(seconds: float) -> None:
+            if requester:
+                with self._lock:
+                    self._waits[requester] = self._waits.get(requester, 0.0) + seconds
+
+        return self._flights.run(key, loader, on_wait=waited)
+
+    def fetch_times(self) -> Dict[str, float]:
+        """Seconds each shared fetch took."""
+        return self._flights.durations()
+
+    def wait_times(self) -> Dict[str, float]:
+        with self._lock:
+            return {name: round(s, 2) for name, s in self._waits.items()}
@@ -0,0 +1,191 @@
+"""
+Filter Pipeline - columnar helpers shared by the screeners.
+
+Screening rules are expressed as boolean masks over whole columns instead of
+per-row ``continue`` checks inside ``iterrows()``. Columns are coerced once
+with the same semantics as ``_safe_float`` (None / unparseable -> None, NaN
+kept as NaN), so every rule keeps the exact truthiness of the row loop.
+"""
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.data_sources.market_snapshot import SpotSnapshot
+
+
+def _safe_float(value) -> Optional[float]:
+    """Scalar coercion of one value (numbers with ',' or '%' allowed); None if not numeric."""
+    if value is None:
+        return None
+    try:
+        if isinstance(value, str):
+            value = value.replace(',', '').replace('%', '')
+        return float(value)
+    except (ValueError, TypeError):
+        return None
+
+
+def coerce_numeric(values) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Coerce a column to float64 once.
+
+    Returns (values, none_mask). Entries that _safe_float maps to None are
+    flagged in none_mask and stored as NaN; genuine NaN stays NaN with
+    none_mask False. Comparisons on NaN are False, which matches the loop.
+    """
+    arr = values.to_numpy() if isinstance(values, pd.Series) else np.asarray(values)
+    if arr.dtype.kind in 'fiub':
+        out = arr.astype(np.float64)
+        return out, np.zeros(len(out), dtype=bool)
+
+    # Fast path parses plain numbers in C; only what it could not parse
+    # (None, NaN, '--', '1,234', '5%' ...) goes through the scalar rule.
+    try:
+        parsed = pd.to_numeric(pd.Series(arr, dtype=object), errors='coerce')
+        out = np.asarray(parsed, dtype=np.float64).copy()
+    except (ValueError, TypeError):
+        out = np.full(len(arr), np.nan)
+    none_mask = np.zeros(len(arr), dtype=bool)
+    for i in np.flatnonzero(np.isnan(out)):
+        f = _safe_float(arr[i])
+        if f is None:
+            none_mask[i] = True
+        else:
+            out[i] = f
+    return out, none_mask
+
+
+def numeric_column(df: pd.DataFrame, column: str) -> Tuple[np.ndarray, np.ndarray]:
+    """coerce_numeric(df[column]); a missing column is all None (row.get -> None)."""
+    if column not in df.columns:
+        return np.full(len(df), np.nan), np.ones(len(df), dtype=bool)
+    return coerce_numeric(df[column])
+
+
+def text_column(df: pd.DataFrame, column: str) -> pd.Series:
+    """str() of every cell as an object Series, like str(row.get(column, ''))."""
+    if column not in df.columns:
+        return pd.Series([''] * len(df), index=df.index, dtype=object)
+    return pd.Series([str(v) for v in df[column].tolist()], index=df.index, dtype=object)
+
+
+def code_column(df: pd.DataFrame, column: str = '代码') -> pd.Series:
+    """Six-digit stock/fund codes."""
+    return text_column(df, column).str.zfill(6)
+
+
+def spot_numeric_column(stock_spot, codes: Sequence[str], column: str) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Align one spot column to ``codes``. Codes missing from the snapshot are
+    None, like ``stock_spot.get(code, {}).get(column)``.
+
+    ``stock_spot`` is a SpotSnapshot or a plain {code -> row dict}.
+    """
+    n = len(codes)
+    if isinstance(stock_spot, SpotSnapshot):
+        if n == 0 or len(stock_spot) == 0 or column not in stock_spot.columns:
+            return np.full(n, np.nan), np.ones(n, dtype=bool)
+        idx = stock_spot.row_indices(list(codes))
+        found = idx >= 0
+        values, none_mask = coerce_numeric(stock_spot.column(column)[np.where(found, idx, 0)])
+        values[~found] = np.nan
+        return values, none_mask | ~found
+
+    stock_spot = stock_spot or {}
+    return coerce_numeric(np.array([stock_spot.get(c, {}).get(column) for c in codes], dtype=object))
+
+
+def to_optional_list(values: np.ndarray, none_mask: np.ndarray) -> List[Optional[float]]:
+    """Back to Python floats, restoring None where the loop would have had None."""
+    out = values.tolist()
+    for i in np.flatnonzero(none_mask):
+        out[i] = None
+    return out
+
+
+def basic_exclude_mask(codes: pd.Series, names: pd.Series) -> np.ndarray:
+    """ST names, new listings (N/C prefix) and B shares (900/200 codes)."""
+    st = names.str.contains('ST', regex=False)
+    new_listing = names.str.startswith(('N', 'C'))
+    b_share = codes.str.startswith(('900', '200'))
+    return (st | new_listing | b_share).to_numpy(dtype=bool)
+
+
+def category_reject_mask(values: Sequence[str], preferred: List[str], excluded: List[str],
+                         skip_empty: bool = False) -> np.ndarray:
+    """
+    Preferred/excluded substring rule (sector, fund type), evaluated once per
+    distinct value. With skip_empty an empty value is never rejected.
+    """
+    if not preferred and not excluded:
+        return np.zeros(len(values), dtype=bool)
+
+    verdicts: Dict[str, bool] = {}
+
+    def rejected(value: str) -> bool:
+        if value not in verdicts:
+            reject = False
+            if value or not skip_empty:
+                if preferred and not any(pref in value for pref in preferred):
+                    reject = True
+                elif excluded and any(exc in value for exc in excluded):
+                    reject = True
+            verdicts[value] = reject
+        return verdicts[value]
+
+    return np.fromiter((rejected(v) for v in values), dtype=bool, count=len(values))
+
+
+def sector_reject_mask(sectors: Sequence[str], preferred_sectors: List[str],
+                       excluded_sectors: List[str]) -> np.ndarray:
+    """Preferred/excluded sector rule; stocks without a known sector are kept."""
+    return category_reject_mask(sectors, preferred_sectors, excluded_sectors, skip_empty=True)
+
+
+def candidate_column(candidates: List[Dict], key: str, default: Any = None) -> np.ndarray:
+    """One numeric field of the candidate dicts as float64 (None -> NaN)."""
+    values = (c.get(key, default) for c in candidates)
+    return np.fromiter((np.nan if v is None else v for v in values), dtype=np.float64, count=len(candidates))
+
+
+def percentile_rank(values: np.ndarray) -> np.ndarray:
+    """
+    Percentile position in [0, 1] among the non-NaN values (ties averaged).
+
+    Lowest -> 0, highest -> 1, a single value or all-equal values -> 0.5,
+    NaN -> 0. Unlike min-max scaling, one outlier does not squash the rest.
+    """
+    out = np.zeros(len(values), dtype=np.float64)
+    valid = ~np.isnan(values)
+    n = int(np.count_nonzero(valid))
+    if n == 1:
+        out[valid] = 0.5
+    elif n > 1:
+        ranks = pd.Series(values[valid]).rank(method='average').to_numpy()
+        out[valid] = (ranks - 1) / (n - 1)
+    return out
+
+
+class FilterPipeline:
+    """
+    Sequential mask filter.
+
+    Each rule only counts rows that survived every earlier rule, so
+    ``filter_stats`` matches the first-failing-``continue`` counts of the loop.
+    """
+
+    def __init__(self, size: int, filter_stats: Dict[str, int]):
+        self.alive = np.ones(size, dtype=bool)
+        self.stats = filter_stats
+        self.stats['total'] += size
+
+    def reject(self, stat_key: str, mask: Any) -> None:
+        mask = np.asarray(mask, dtype=bool)
+        self.stats[stat_key] += int(np.count_nonzero(self.alive & mask))
+        self.alive &= ~mask
+
+    def passed(self) -> np.ndarray:
+        """Positions of surviving rows, in input order."""
+        self.stats['passed'] += int(np.count_nonzero(self.alive))
+        return np.flatnonzero(self.alive)
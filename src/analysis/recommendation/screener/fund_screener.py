@@ -2,10 +2,76 @@
 Fund Screeners - Short-term and Long-term fund screening implementations.
 """
 import akshare as ak
+import numpy as np
 import pandas as pd
 from typing import Dict, List, Any, Optional
 from datetime import datetime
+
+from src.cache.frame_store import shared_frame
+from src.cache.ttl_policy import FUND_NAV
 from .base_screener import BaseScreener
+from .filter_pipeline import (
+    FilterPipeline,
+    candidate_column,
+    category_reject_mask,
+    numeric_column,
+    percentile_rank,
+    text_column,
+    to_optional_list,
+)
+
+
+def combine_rank_tables(raw_data: Dict[str, Any], keys: List[str]) -> pd.DataFrame:
+    """
+    Concatenate the per-type fund_open_fund_rank_em tables once and de-duplicate
+    by fund code (first table wins, so a fund keeps the first type it was listed under).
+    """
+    frames = [raw_data.get(key, pd.DataFrame()) for key in keys]
+    frames = [df for df in frames if df is not None and not df.empty]
+    if not frames:
+        return pd.DataFrame()
+
+    combined = pd.concat(frames, ignore_index=True)
+    if 'fund_type' not in combined.columns:
+        combined['fund_type'] = ''
+    combined['fund_type'] = combined['fund_type'].fillna('')
+
+    codes = text_column(combined, '基金代码').str.strip()
+    return combined[~codes.duplicated(keep='first').to_numpy()].reset_index(drop=True)
+
+
+def _rank_key(symbol: str) -> str:
+    return f"fund_open_fund_rank_em:{symbol}"
+
+
+def _rank_loader(symbol: str):
+    # Shared across processes and restarts; rank tables update with the daily NAV
+    return lambda: shared_frame(_rank_key(symbol), lambda: ak.fund_open_fund_rank_em(symbol=symbol), FUND_NAV)
+
+
+def _etf_allowed(preferred_types: List[str], excluded_types: List[str]) -> bool:
+    """Check if ETF is in preferred types (if specified)."""
+    etf_allowed = True
+    if preferred_types:
+        etf_allowed = any('ETF' in pref or 'etf' in pref.lower() for pref in preferred_types)
+    if excluded_types:
+        if any('ETF' in exc or 'etf' in exc.lower() for exc in excluded_types):
+            etf_allowed = False
+    return etf_allowed
+
+
+def _prepare_rank_table(df: pd.DataFrame, symbol: str, sort_col: str, pool_size: Optional[int]) -> pd.DataFrame:
+    """Sort one fund_open_fund_rank_em table by sort_col (top pool_size, None = all) and tag its type."""
+    if df is None or df.empty:
+        return pd.DataFrame()
+    df = df.copy()  # the raw table may be shared with other screeners
+    if sort_col in df.columns:
+        df[f'{sort_col}_num'] = pd.to_numeric(df[sort_col], errors='coerce')
+        df = df.sort_values(f'{sort_col}_num', ascending=False)
+        if pool_size:
+            df = df.head(pool_size)
+    df['fund_type'] = symbol
+    return df
 
 
 class ShortTermFundScreener(BaseScreener):
@@ -19,6 +85,10 @@ class ShortTermFundScreener(BaseScreener):
     - Manager reputation (基金经理) - 20% weight
     """
 
+    # 每类基金/ETF 候选池大小，None 表示全量
+    rank_pool_size: Optional[int] = None
+    etf_pool_size: Optional[int] = None
+
     @property
     def screener_type(self) -> str:
         return "short_term_fund"
@@ -27,48 +97,41 @@ class ShortTermFundScreener(BaseScreener):
     def default_limit(self) -> int:
         return 30
 
+    def _fetch_rank_raw(self, symbol: str) -> pd.DataFrame:
+        return self._fetch_shared(_rank_key(symbol), _rank_loader(symbol))
+
+    def shared_data(self, user_preferences: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        loaders = {_rank_key(symbol): _rank_loader(symbol) for symbol in ('股票型', '混合型')}
+        loaders['fund_etf_spot_em'] = ak.fund_etf_spot_em
+        return loaders
+
     def collect_raw_data(self) -> Dict[str, Any]:
         """Collect data from AkShare APIs - 只获取TOP基金."""
         data = {}
 
-        # 1. 获取股票型基金（只取近1周排名前100）
+        # 1-2. 获取股票型/混合型基金（按近1周排序）
+        for key, symbol in [('fund_rank_stock', '股票型'), ('fund_rank_mixed', '混合型')]:
+            try:
+                df = _prepare_rank_table(self._fetch_rank_raw(symbol), symbol, '近1周', self.rank_pool_size)
+                if not df.empty:
+                    data[key] = df
+                    print(f"  ✓ 获取{symbol}基金: {len(df)} 只")
+            except Exception as e:
+                print(f"  ✗ 获取{symbol}基金失败: {e}")
+                data[key] = pd.DataFrame()
+
+        # 3. 获取ETF行情（按成交额排序）
         try:
-            df_stock = ak.fund_open_fund_rank_em(symbol="股票型")
-            if df_stock is not None and not df_stock.empty:
-                # 按近1周排序，取前100
-                if '近1周' in df_stock.columns:
-                    df_stock['近1周_num'] = pd.to_numeric(df_stock['近1周'], errors='coerce')
-                    df_stock = df_stock.sort_values('近1周_num', ascending=False).head(100)
-                df_stock['fund_type'] = '股票型'
-                data['fund_rank_stock'] = df_stock
-                print(f"  ✓ 获取股票型基金TOP100: {len(df_stock)} 只")
-        except Exception as e:
-            print(f"  ✗ 获取股票型基金失败: {e}")
-            data['fund_rank_stock'] = pd.DataFrame()
-
-        # 2. 获取混合型基金（只取近1周排名前100）
-        try:
-            df_mixed = ak.fund_open_fund_rank_em(symbol="混合型")
-            if df_mixed is not None and not df_mixed.empty:
-                if '近1周' in df_mixed.columns:
-                    df_mixed['近1周_num'] = pd.to_numeric(df_mixed['近1周'], errors='coerce')
-                    df_mixed = df_mixed.sort_values('近1周_num', ascending=False).head(100)
-                df_mixed['fund_type'] = '混合型'
-                data['fund_rank_mixed'] = df_mixed
-                print(f"  ✓ 获取混合型基金TOP100: {len(df_mixed)} 只")
-        except Exception as e:
-            print(f"  ✗ 获取混合型基金失败: {e}")
-            data['fund_rank_mixed'] = pd.DataFrame()
-
-        # 3. 获取ETF行情（按成交额排序取前50）
-        try:
-            df_etf = ak.fund_etf_spot_em()
+            df_etf = self._fetch_shared('fund_etf_spot_em', ak.fund_etf_spot_em)
             if df_etf is not None and not df_etf.empty:
+                df_etf = df_etf.copy()
                 if '成交额' in df_etf.columns:
                     df_etf['成交额_num'] = pd.to_numeric(df_etf['成交额'], errors='coerce')
-                    df_etf = df_etf.sort_values('成交额_num', ascending=False).head(50)
+                    df_etf = df_etf.sort_values('成交额_num', ascending=False)
+                    if self.etf_pool_size:
+                        df_etf = df_etf.head(self.etf_pool_size)
                 data['etf_spot'] = df_etf
-                print(f"  ✓ 获取ETF成交额TOP50: {len(df_etf)} 只")
+                print(f"  ✓ 获取ETF行情: {len(df_etf)} 只")
         except Exception as e:
             print(f"  ✗ 获取ETF行情失败: {e}")
             data['etf_spot'] = pd.DataFrame()
@@ -77,13 +140,10 @@ class ShortTermFundScreener(BaseScreener):
 
     def apply_filters(self, raw_data: Dict[str, Any]) -> List[Dict]:
         """Apply short-term filtering rules - 严格筛选 + 用户偏好提前过滤."""
-        candidates = []
-
         # 获取用户偏好以便提前过滤
         prefs = self.user_preferences or {}
         preferred_types = prefs.get('preferred_fund_types', [])
         excluded_types = prefs.get('excluded_fund_types', [])
-        min_scale = prefs.get('min_fund_scale')
 
         filter_stats = {
             'total': 0,
@@ -92,152 +152,16 @@ class ShortTermFundScreener(BaseScreener):
             'passed': 0,
         }
 
-        # Process open-end funds
-        for key in ['fund_rank_stock', 'fund_rank_mixed']:
-            df = raw_data.get(key, pd.DataFrame())
-            if df.empty:
-                continue
-
-            for _, row in df.iterrows():
-                filter_stats['total'] += 1
-                try:
-                    code = str(row.get('基金代码', '')).strip()
-                    name = str(row.get('基金简称', ''))
-                    fund_type = row.get('fund_type', '')
-
-                    # ===== 用户偏好提前过滤 =====
-
-                    # 1. 基金类型过滤（最先过滤）
-                    if preferred_types:
-                        if not any(pref in fund_type for pref in preferred_types):
-                            filter_stats['type_filtered'] += 1
-                            continue
-                    if excluded_types:
-                        if any(exc in fund_type for exc in excluded_types):
-                            filter_stats['type_filtered'] += 1
-                            continue
-
-                    # 基本排除
-                    if '指数' in name and '增强' not in name:
-                        filter_stats['type_filtered'] += 1
-                        continue
-                    if 'QDII' in name:
-                        filter_stats['type_filtered'] += 1
-                        continue
-                    if 'C' in code[-1:]:  # 排除C类份额（费用结构不同）
-                        filter_stats['type_filtered'] += 1
-                        continue
-
-                    # 获取业绩指标
-                    return_1w = self._safe_float(row.get('近1周'))
-                    return_1m = self._safe_float(row.get('近1月'))
-                    return_3m = self._safe_float(row.get('近3月'))
-                    return_6m = self._safe_float(row.get('近6月'))
-                    return_1y = self._safe_float(row.get('近1年'))
-
-                    # ===== 严格筛选条件 =====
-
-                    # 1. 必须有近期数据
-                    if return_1w is None or return_1m is None:
-                        filter_stats['performance_filtered'] += 1
-                        continue
-
-                    # 2. 近1周 > 0%（正收益）
-                    if return_1w <= 0:
-                        filter_stats['performance_filtered'] += 1
-                        continue
-
-                    # 3. 近1月 > 2%（有明显上涨趋势）
-                    if return_1m <= 2:
-                        filter_stats['performance_filtered'] += 1
-                        continue
-
-                    # 4. 近3月 > 0%（中期趋势向好）
-                    if return_3m is not None and return_3m <= 0:
-                        filter_stats['performance_filtered'] += 1
-                        continue
-
-                    filter_stats['passed'] += 1
-                    candidate = {
-                        'code': code,
-                        'name': name,
-                        'type': 'open_fund',
-                        'fund_type': fund_type,
-                        'return_1w': return_1w,
-                        'return_1m': return_1m,
-                        'return_3m': return_3m,
-                        'return_6m': return_6m,
-                        'return_1y': return_1y,
-                        'nav': self._safe_float(row.get('单位净值')),
-                        'nav_date': str(row.get('日期', '')),
-                    }
-
-                    candidates.append(candidate)
-
-                except Exception as e:
-                    continue
+        # Process open-end funds (all rank tables at once)
+        candidates = self._filter_open_funds(
+            combine_rank_tables(raw_data, ['fund_rank_stock', 'fund_rank_mixed']),
+            preferred_types, excluded_types, filter_stats,
+        )
 
         # Process ETFs - 更严格的筛选
         df_etf = raw_data.get('etf_spot', pd.DataFrame())
-        if not df_etf.empty:
-            # Check if ETF is in preferred types (if specified)
-            etf_allowed = True
-            if preferred_types:
-                etf_allowed = any('ETF' in pref or 'etf' in pref.lower() for pref in preferred_types)
-            if excluded_types:
-                if any('ETF' in exc or 'etf' in exc.lower() for exc in excluded_types):
-                    etf_allowed = False
-
-            if etf_allowed:
-                for _, row in df_etf.iterrows():
-                    filter_stats['total'] += 1
-                    try:
-                        code = str(row.get('代码', '')).strip()
-                        name = str(row.get('名称', ''))
-
-                        # 排除货币/债券ETF
-                        if '货币' in name or '现金' in name or '债' in name:
-                            filter_stats['type_filtered'] += 1
-                            continue
-
-                        # 获取指标
-                        price = self._safe_float(row.get('最新价'))
-                        change_pct = self._safe_float(row.get('涨跌幅'))
-                        turnover = self._safe_float(row.get('成交额'))
-
-                        # ===== 严格筛选条件 =====
-
-                        # 1. 成交额 > 1亿（高流动性）
-                        if not turnover or turnover < 1e8:
-                            filter_stats['performance_filtered'] += 1
-                            continue
-
-                        # 2. 必须有价格
-                        if not price or price <= 0:
-                            filter_stats['performance_filtered'] += 1
-                            continue
-
-                        # 3. 涨跌幅 > -2%（不追跌）
-                        if change_pct is not None and change_pct < -2:
-                            filter_stats['performance_filtered'] += 1
-                            continue
-
-                        filter_stats['passed'] += 1
-                        candidate = {
-                            'code': code,
-                            'name': name,
-                            'type': 'etf',
-                            'fund_type': 'ETF',
-                            'price': price,
-                            'change_pct': change_pct,
-                            'turnover': turnover,
-                            'return_1w': change_pct,
-                        }
-
-                        candidates.append(candidate)
-
-                    except Exception as e:
-                        continue
+        if not df_etf.empty and _etf_allowed(preferred_types, excluded_types):
+            candidates.extend(self._filter_etfs(df_etf, filter_stats))
 
         # 打印过滤统计
         if self.user_preferences:
@@ -249,8 +173,138 @@ class ShortTermFundScreener(BaseScreener):
         print(f"  ✓ 严格筛选后: {len(candidates)} 只基金/ETF")
         return candidates
 
+    def _filter_open_funds(self, df: pd.DataFrame, preferred_types: List[str],
+                           excluded_types: List[str], filter_stats: Dict[str, int]) -> List[Dict]:
+        if df.empty:
+            return []
+
+        codes = text_column(df, '基金代码').str.strip()
+        names = text_column(df, '基金简称')
+        fund_types = df['fund_type'].tolist()
+
+        # 获取业绩指标
+        return_1w, r1w_none = numeric_column(df, '近1周')
+        return_1m, r1m_none = numeric_column(df, '近1月')
+        return_3m, r3m_none = numeric_column(df, '近3月')
+        return_6m, r6m_none = numeric_column(df, '近6月')
+        return_1y, r1y_none = numeric_column(df, '近1年')
+        nav, nav_none = numeric_column(df, '单位净值')
+
+        pipeline = FilterPipeline(len(df), filter_stats)
+
+        # ===== 用户偏好提前过滤 =====
+
+        # 1. 基金类型过滤（最先过滤）
+        pipeline.reject('type_filtered', category_reject_mask(fund_types, preferred_types, excluded_types))
+
+        # 基本排除
+        pipeline.reject('type_filtered', (
+            (names.str.contains('指数', regex=False) & ~names.str.contains('增强', regex=False))
+            | names.str.contains('QDII', regex=False)
+            | codes.str.endswith('C')  # 排除C类份额（费用结构不同）
+        ).to_numpy(dtype=bool))
+
+        # ===== 严格筛选条件 =====
+
+        # 1. 必须有近期数据
+        pipeline.reject('performance_filtered', r1w_none | r1m_none)
+
+        # 2. 近1周 > 0%（正收益）
+        pipeline.reject('performance_filtered', return_1w <= 0)
+
+        # 3. 近1月 > 2%（有明显上涨趋势）
+        pipeline.reject('performance_filtered', return_1m <= 2)
+
+        # 4. 近3月 > 0%（中期趋势向好）
+        pipeline.reject('performance_filtered', return_3m <= 0)
+
+        keep = pipeline.passed()
+
+        def pick(values, none_mask):
+            return to_optional_list(values[keep], none_mask[keep])
+
+        return [
+            {
+                'code': code,
+                'name': name,
+                'type': 'open_fund',
+                'fund_type': fund_type,
+                'return_1w': r1w,
+                'return_1m': r1m,
+                'return_3m': r3m,
+                'return_6m': r6m,
+                'return_1y': r1y,
+                'nav': nav_val,
+                'nav_date': nav_date,
+            }
+            for code, name, fund_type, r1w, r1m, r3m, r6m, r1y, nav_val, nav_date in zip(
+                codes.to_numpy()[keep].tolist(),
+                names.to_numpy()[keep].tolist(),
+                [fund_types[i] for i in keep],
+                pick(return_1w, r1w_none),
+                pick(return_1m, r1m_none),
+                pick(return_3m, r3m_none),
+                pick(return_6m, r6m_none),
+                pick(return_1y, r1y_none),
+                pick(nav, nav_none),
+                text_column(df, '日期').to_numpy()[keep].tolist(),
+            )
+        ]
+
+    def _filter_etfs(self, df_etf: pd.DataFrame, filter_stats: Dict[str, int]) -> List[Dict]:
+        codes = text_column(df_etf, '代码').str.strip()
+        names = text_column(df_etf, '名称')
+
+        # 获取指标
+        price, price_none = numeric_column(df_etf, '最新价')
+        change_pct, change_none = numeric_column(df_etf, '涨跌幅')
+        turnover, turnover_none = numeric_column(df_etf, '成交额')
+
+        pipeline = FilterPipeline(len(df_etf), filter_stats)
+
+        # 排除货币/债券ETF
+        pipeline.reject('type_filtered', (
+            names.str.contains('货币', regex=False)
+            | names.str.contains('现金', regex=False)
+            | names.str.contains('债', regex=False)
+        ).to_numpy(dtype=bool))
+
+        # ===== 严格筛选条件 =====
+
+        # 1. 成交额 > 1亿（高流动性）
+        pipeline.reject('performance_filtered', turnover_none | (turnover == 0) | (turnover < 1e8))
+
+        # 2. 必须有价格
+        pipeline.reject('performance_filtered', price_none | (price <= 0))
+
+        # 3. 涨跌幅 > -2%（不追跌）
+        pipeline.reject('performance_filtered', change_pct < -2)
+
+        keep = pipeline.passed()
+        changes = to_optional_list(change_pct[keep], change_none[keep])
+
+        return [
+            {
+                'code': code,
+                'name': name,
+                'type': 'etf',
+                'fund_type': 'ETF',
+                'price': p,
+                'change_pct': chg,
+                'turnover': turn,
+                'return_1w': chg,
+            }
+            for code, name, p, chg, turn in zip(
+                codes.to_numpy()[keep].tolist(),
+                names.to_numpy()[keep].tolist(),
+                to_optional_list(price[keep], price_none[keep]),
+                changes,
+                to_optional_list(turnover[keep], turnover_none[keep]),
+            )
+        ]
+
     def calculate_scores(self, candidates: List[Dict]) -> List[Dict]:
-        """Calculate composite score for short-term funds."""
+        """Calculate composite score for short-term funds (percentile-normalized)."""
         if not candidates:
             return []
 
@@ -260,91 +314,37 @@ class ShortTermFundScreener(BaseScreener):
 
         # Score open funds
         if open_funds:
-            returns_1w = [c.get('return_1w', 0) for c in open_funds if c.get('return_1w') is not None]
-            returns_1m = [c.get('return_1m', 0) for c in open_funds if c.get('return_1m') is not None]
-
-            max_1w = max(returns_1w) if returns_1w else 1
-            min_1w = min(returns_1w) if returns_1w else 0
-            max_1m = max(returns_1m) if returns_1m else 1
-            min_1m = min(returns_1m) if returns_1m else 0
-
-            for c in open_funds:
-                score = 0
-
+            score = (
                 # 1. Recent performance (35%)
-                r1w = c.get('return_1w', 0) or 0
-                r1m = c.get('return_1m', 0) or 0
-
-                if max_1w != min_1w:
-                    score_1w = (r1w - min_1w) / (max_1w - min_1w) * 17.5
-                else:
-                    score_1w = 8.75
-
-                if max_1m != min_1m:
-                    score_1m = (r1m - min_1m) / (max_1m - min_1m) * 17.5
-                else:
-                    score_1m = 8.75
-
-                score += score_1w + score_1m
-
+                percentile_rank(candidate_column(open_funds, 'return_1w')) * 17.5
+                + percentile_rank(candidate_column(open_funds, 'return_1m')) * 17.5
                 # 2. Holdings momentum placeholder (25%)
-                score += 12.5
-
+                + 12.5
                 # 3. Size & liquidity placeholder (20%)
-                score += 10
-
+                + 10
                 # 4. Manager reputation placeholder (20%)
-                score += 10
-
-                c['score'] = round(score, 2)
+                + 10
+            )
+            for c, value in zip(open_funds, score.tolist()):
+                c['score'] = round(value, 2)
 
         # Score ETFs
         if etfs:
-            turnovers = [c.get('turnover', 0) for c in etfs if c.get('turnover')]
-            changes = [c.get('change_pct', 0) for c in etfs if c.get('change_pct') is not None]
-
-            max_turnover = max(turnovers) if turnovers else 1
-            max_change = max(changes) if changes else 1
-            min_change = min(changes) if changes else 0
-
-            for c in etfs:
-                score = 0
-
+            score = (
                 # 1. Daily performance (35%)
-                change = c.get('change_pct', 0) or 0
-                if max_change != min_change:
-                    score += (change - min_change) / (max_change - min_change) * 35
-                else:
-                    score += 17.5
-
+                percentile_rank(candidate_column(etfs, 'change_pct')) * 35
                 # 2. Liquidity (25%)
-                turnover = c.get('turnover', 0) or 0
-                if max_turnover > 0:
-                    score += min(turnover / max_turnover, 1) * 25
-                else:
-                    score += 12.5
-
+                + percentile_rank(candidate_column(etfs, 'turnover')) * 25
                 # 3. Volume activity (20%)
-                score += 10
-
+                + 10
                 # 4. Market correlation (20%)
-                score += 10
-
-                c['score'] = round(score, 2)
+                + 10
+            )
+            for c, value in zip(etfs, score.tolist()):
+                c['score'] = round(value, 2)
 
         return candidates
 
-    def _safe_float(self, value) -> Optional[float]:
-        """Safely convert value to float."""
-        if value is None or value == '' or value == '--':
-            return None
-        try:
-            if isinstance(value, str):
-                value = value.replace(',', '').replace('%', '')
-            return float(value)
-        except (ValueError, TypeError):
-            return None
-
 
 class LongTermFundScreener(BaseScreener):
     """
@@ -357,6 +357,9 @@ class LongTermFundScreener(BaseScreener):
     - Holdings quality (持仓质量) - 15% weight
     """
 
+    # 每类基金候选池大小，None 表示全量
+    rank_pool_size: Optional[int] = None
+
     @property
     def screener_type(self) -> str:
         return "long_term_fund"
@@ -365,63 +368,35 @@ class LongTermFundScreener(BaseScreener):
     def default_limit(self) -> int:
         return 30
 
+    def _fetch_rank_raw(self, symbol: str) -> pd.DataFrame:
+        return self._fetch_shared(_rank_key(symbol), _rank_loader(symbol))
+
+    def shared_data(self, user_preferences: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        return {_rank_key(symbol): _rank_loader(symbol) for symbol in ('股票型', '混合型', '指数型')}
+
     def collect_raw_data(self) -> Dict[str, Any]:
         """Collect data from AkShare APIs - 只获取长期业绩TOP基金."""
         data = {}
 
-        # 1. 获取股票型基金（按近1年排序，取前100）
-        try:
-            df_stock = ak.fund_open_fund_rank_em(symbol="股票型")
-            if df_stock is not None and not df_stock.empty:
-                if '近1年' in df_stock.columns:
-                    df_stock['近1年_num'] = pd.to_numeric(df_stock['近1年'], errors='coerce')
-                    df_stock = df_stock.sort_values('近1年_num', ascending=False).head(100)
-                df_stock['fund_type'] = '股票型'
-                data['fund_rank_stock'] = df_stock
-                print(f"  ✓ 获取股票型基金近1年TOP100: {len(df_stock)} 只")
-        except Exception as e:
-            print(f"  ✗ 获取股票型基金失败: {e}")
-            data['fund_rank_stock'] = pd.DataFrame()
-
-        # 2. 获取混合型基金（按近1年排序，取前100）
-        try:
-            df_mixed = ak.fund_open_fund_rank_em(symbol="混合型")
-            if df_mixed is not None and not df_mixed.empty:
-                if '近1年' in df_mixed.columns:
-                    df_mixed['近1年_num'] = pd.to_numeric(df_mixed['近1年'], errors='coerce')
-                    df_mixed = df_mixed.sort_values('近1年_num', ascending=False).head(100)
-                df_mixed['fund_type'] = '混合型'
-                data['fund_rank_mixed'] = df_mixed
-                print(f"  ✓ 获取混合型基金近1年TOP100: {len(df_mixed)} 只")
-        except Exception as e:
-            print(f"  ✗ 获取混合型基金失败: {e}")
-            data['fund_rank_mixed'] = pd.DataFrame()
-
-        # 3. 获取指数型基金（按近1年排序，取前50）
-        try:
-            df_index = ak.fund_open_fund_rank_em(symbol="指数型")
-            if df_index is not None and not df_index.empty:
-                if '近1年' in df_index.columns:
-                    df_index['近1年_num'] = pd.to_numeric(df_index['近1年'], errors='coerce')
-                    df_index = df_index.sort_values('近1年_num', ascending=False).head(50)
-                df_index['fund_type'] = '指数型'
-                data['fund_rank_index'] = df_index
-                print(f"  ✓ 获取指数型基金近1年TOP50: {len(df_index)} 只")
-        except Exception as e:
-            print(f"  ✗ 获取指数型基金失败: {e}")
-            data['fund_rank_index'] = pd.DataFrame()
+        # 获取股票型/混合型/指数型基金（按近1年排序）
+        for key, symbol in [('fund_rank_stock', '股票型'), ('fund_rank_mixed', '混合型'), ('fund_rank_index', '指数型')]:
+            try:
+                df = _prepare_rank_table(self._fetch_rank_raw(symbol), symbol, '近1年', self.rank_pool_size)
+                if not df.empty:
+                    data[key] = df
+                    print(f"  ✓ 获取{symbol}基金: {len(df)} 只")
+            except Exception as e:
+                print(f"  ✗ 获取{symbol}基金失败: {e}")
+                data[key] = pd.DataFrame()
 
         return data
 
     def apply_filters(self, raw_data: Dict[str, Any]) -> List[Dict]:
         """Apply long-term filtering rules - 严格筛选 + 用户偏好提前过滤."""
-        candidates = []
-
         # 获取用户偏好以便提前过滤
         prefs = self.user_preferences or {}
         preferred_types = prefs.get('preferred_fund_types', [])
         excluded_types = prefs.get('excluded_fund_types', [])
-        min_scale = prefs.get('min_fund_scale')
 
         filter_stats = {
             'total': 0,
@@ -430,92 +405,8 @@ class LongTermFundScreener(BaseScreener):
             'passed': 0,
         }
 
-        for key in ['fund_rank_stock', 'fund_rank_mixed', 'fund_rank_index']:
-            df = raw_data.get(key, pd.DataFrame())
-            if df.empty:
-                continue
-
-            for _, row in df.iterrows():
-                filter_stats['total'] += 1
-                try:
-                    code = str(row.get('基金代码', '')).strip()
-                    name = str(row.get('基金简称', ''))
-                    fund_type = row.get('fund_type', '')
-
-                    # ===== 用户偏好提前过滤 =====
-
-                    # 1. 基金类型过滤（最先过滤）
-                    if preferred_types:
-                        if not any(pref in fund_type for pref in preferred_types):
-                            filter_stats['type_filtered'] += 1
-                            continue
-                    if excluded_types:
-                        if any(exc in fund_type for exc in excluded_types):
-                            filter_stats['type_filtered'] += 1
-                            continue
-
-                    # 基本排除
-                    if 'QDII' in name:
-                        filter_stats['type_filtered'] += 1
-                        continue
-                    if 'C' in code[-1:]:  # 排除C类份额
-                        filter_stats['type_filtered'] += 1
-                        continue
-
-                    # 获取业绩指标
-                    return_1y = self._safe_float(row.get('近1年'))
-                    return_2y = self._safe_float(row.get('近2年'))
-                    return_3y = self._safe_float(row.get('近3年'))
-                    return_6m = self._safe_float(row.get('近6月'))
-                    return_3m = self._safe_float(row.get('近3月'))
-                    return_1m = self._safe_float(row.get('近1月'))
-
-                    # ===== 严格筛选条件 =====
-
-                    # 1. 必须有1年业绩数据
-                    if return_1y is None:
-                        filter_stats['performance_filtered'] += 1
-                        continue
-
-                    # 2. 近1年 > 5%（有明显正收益）
-                    if return_1y <= 5:
-                        filter_stats['performance_filtered'] += 1
-                        continue
-
-                    # 3. 近6月 > 0%（中期趋势向好）
-                    if return_6m is not None and return_6m <= 0:
-                        filter_stats['performance_filtered'] += 1
-                        continue
-
-                    # 4. 如果有3年数据，3年收益 > 15%
-                    if return_3y is not None and return_3y <= 15:
-                        filter_stats['performance_filtered'] += 1
-                        continue
-
-                    has_long_history = return_3y is not None
-
-                    filter_stats['passed'] += 1
-                    candidate = {
-                        'code': code,
-                        'name': name,
-                        'type': 'open_fund',
-                        'fund_type': fund_type,
-                        'return_1w': self._safe_float(row.get('近1周')),
-                        'return_1m': return_1m,
-                        'return_3m': return_3m,
-                        'return_6m': return_6m,
-                        'return_1y': return_1y,
-                        'return_2y': return_2y,
-                        'return_3y': return_3y,
-                        'nav': self._safe_float(row.get('单位净值')),
-                        'nav_date': str(row.get('日期', '')),
-                        'has_long_history': has_long_history,
-                    }
-
-                    candidates.append(candidate)
-
-                except Exception as e:
-                    continue
+        df = combine_rank_tables(raw_data, ['fund_rank_stock', 'fund_rank_mixed', 'fund_rank_index'])
+        candidates = self._filter_open_funds(df, preferred_types, excluded_types, filter_stats) if not df.empty else []
 
         # 打印过滤统计
         if self.user_preferences:
@@ -527,75 +418,120 @@ class LongTermFundScreener(BaseScreener):
         print(f"  ✓ 严格筛选后: {len(candidates)} 只基金")
         return candidates
 
+    def _filter_open_funds(self, df: pd.DataFrame, preferred_types: List[str],
+                           excluded_types: List[str], filter_stats: Dict[str, int]) -> List[Dict]:
+        codes = text_column(df, '基金代码').str.strip()
+        names = text_column(df, '基金简称')
+        fund_types = df['fund_type'].tolist()
+
+        # 获取业绩指标
+        return_1y, r1y_none = numeric_column(df, '近1年')
+        return_2y, r2y_none = numeric_column(df, '近2年')
+        return_3y, r3y_none = numeric_column(df, '近3年')
+        return_6m, r6m_none = numeric_column(df, '近6月')
+        return_3m, r3m_none = numeric_column(df, '近3月')
+        return_1m, r1m_none = numeric_column(df, '近1月')
+        return_1w, r1w_none = numeric_column(df, '近1周')
+        nav, nav_none = numeric_column(df, '单位净值')
+
+        pipeline = FilterPipeline(len(df), filter_stats)
+
+        # ===== 用户偏好提前过滤 =====
+
+        # 1. 基金类型过滤（最先过滤）
+        pipeline.reject('type_filtered', category_reject_mask(fund_types, preferred_types, excluded_types))
+
+        # 基本排除
+        pipeline.reject('type_filtered', (
+            names.str.contains('QDII', regex=False)
+            | codes.str.endswith('C')  # 排除C类份额
+        ).to_numpy(dtype=bool))
+
+        # ===== 严格筛选条件 =====
+
+        # 1. 必须有1年业绩数据
+        pipeline.reject('performance_filtered', r1y_none)
+
+        # 2. 近1年 > 5%（有明显正收益）
+        pipeline.reject('performance_filtered', return_1y <= 5)
+
+        # 3. 近6月 > 0%（中期趋势向好）
+        pipeline.reject('performance_filtered', return_6m <= 0)
+
+        # 4. 如果有3年数据，3年收益 > 15%
+        pipeline.reject('performance_filtered', return_3y <= 15)
+
+        keep = pipeline.passed()
+
+        def pick(values, none_mask):
+            return to_optional_list(values[keep], none_mask[keep])
+
+        return [
+            {
+                'code': code,
+                'name': name,
+                'type': 'open_fund',
+                'fund_type': fund_type,
+                'return_1w': r1w,
+                'return_1m': r1m,
+                'return_3m': r3m,
+                'return_6m': r6m,
+                'return_1y': r1y,
+                'return_2y': r2y,
+                'return_3y': r3y,
+                'nav': nav_val,
+                'nav_date': nav_date,
+                'has_long_history': r3y is not None,
+            }
+            for code, name, fund_type, r1w, r1m, r3m, r6m, r1y, r2y, r3y, nav_val, nav_date in zip(
+                codes.to_numpy()[keep].tolist(),
+                names.to_numpy()[keep].tolist(),
+                [fund_types[i] for i in keep],
+                pick(return_1w, r1w_none),
+                pick(return_1m, r1m_none),
+                pick(return_3m, r3m_none),
+                pick(return_6m, r6m_none),
+                pick(return_1y, r1y_none),
+                pick(return_2y, r2y_none),
+                pick(return_3y, r3y_none),
+                pick(nav, nav_none),
+                text_column(df, '日期').to_numpy()[keep].tolist(),
+            )
+        ]
+
     def calculate_scores(self, candidates: List[Dict]) -> List[Dict]:
-        """Calculate composite score for long-term funds."""
+        """Calculate composite score for long-term funds (percentile-normalized)."""
         if not candidates:
             return []
 
-        # Get metrics for normalization
-        returns_1y = [c.get('return_1y', 0) for c in candidates if c.get('return_1y') is not None]
-        returns_3y = [c.get('return_3y', 0) for c in candidates if c.get('return_3y') is not None]
-
-        max_1y = max(returns_1y) if returns_1y else 1
-        min_1y = min(returns_1y) if returns_1y else 0
-        max_3y = max(returns_3y) if returns_3y else 1
-        min_3y = min(returns_3y) if returns_3y else 0
-
-        for c in candidates:
-            score = 0
-
-            # 1. Long-term performance (35%)
-            r1y = c.get('return_1y', 0) or 0
-            r3y = c.get('return_3y')
-
-            # 1-year return score (20%)
-            if max_1y != min_1y:
-                score_1y = (r1y - min_1y) / (max_1y - min_1y) * 20
-            else:
-                score_1y = 10
-            score += score_1y
-
-            # 3-year return score (15%) - bonus for long history
-            if r3y is not None and max_3y != min_3y:
-                score_3y = (r3y - min_3y) / (max_3y - min_3y) * 15
-            elif r3y is not None:
-                score_3y = 7.5
-            else:
-                score_3y = 5  # Penalty for no long history
-            score += score_3y
-
-            # 2. Risk-adjusted return placeholder (25%)
-            # Estimate using performance consistency
-            r1m = c.get('return_1m', 0) or 0
-            r3m = c.get('return_3m', 0) or 0
-            r6m = c.get('return_6m', 0) or 0
-
-            # Check consistency (all positive periods = good)
-            positive_periods = sum([
-                1 if r1m > 0 else 0,
-                1 if r3m > 0 else 0,
-                1 if r6m > 0 else 0,
-                1 if r1y > 0 else 0
-            ])
-            score += positive_periods * 6.25  # Max 25 if all positive
-
-            # 3. Fund manager placeholder (25%)
-            score += 12.5
-
-            # 4. Holdings quality placeholder (15%)
-            score += 7.5
-
-            c['score'] = round(score, 2)
+        r1y = np.nan_to_num(candidate_column(candidates, 'return_1y'))
+        r3y = candidate_column(candidates, 'return_3y')
+        has_3y = np.array([c.get('return_3y') is not None for c in candidates])
 
-        return candidates
+        # 1. Long-term performance (35%)
+        # 1-year return score (20%)
+        score = percentile_rank(r1y) * 20
 
-    def _safe_float(self, value) -> Optional[float]:
-        """Safely convert value to float."""
-        if value is None or value == '' or value == '--':
-            return None
-        try:
-            if isinstance(value, str):
-                value = value.replace(',', '').replace('%', '')
-            return float(value)
-        except (ValueError, TypeError):
-            return None
+        # 3-year return score (15%) - bonus for long history, penalty without it
+        score += np.where(has_3y, percentile_rank(np.where(has_3y, r3y, np.nan)) * 15, 5)
+
+        # 2. Risk-adjusted return placeholder (25%)
+        # Check consistency (all positive periods = good), max 25 if all positive
+        positive_periods = (
+            (np.nan_to_num(candidate_column(candidates, 'return_1m')) > 0).astype(int)
+            + (np.nan_to_num(candidate_column(candidates, 'return_3m')) > 0)
+            + (np.nan_to_num(candidate_column(candidates, 'return_6m')) > 0)
+            + (r1y > 0)
+        )
+        score += positive_periods * 6.25
+
+        # 3. Fund manager placeholder (25%)
+        score += 12.5
+
+        # 4. Holdings quality placeholder (15%)
+        score += 7.5
+
+        for c, value in zip(candidates, score.tolist()):
+            c['score'] = round(value, 2)
+
+        return candidates
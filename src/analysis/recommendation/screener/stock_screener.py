@@ -2,47 +2,47 @@
 Stock Screeners - Short-term and Long-term stock screening implementations.
 """
 import akshare as ak
+import numpy as np
 import pandas as pd
 from typing import Dict, List, Any, Optional
 from datetime import datetime, timedelta
+from src.data_sources.akshare_api import get_industry_board_table
+from src.data_sources.market_snapshot import market_snapshot
+from src.data_sources.sector_index import sector_index
 from .base_screener import BaseScreener
+from .filter_pipeline import (
+    FilterPipeline,
+    basic_exclude_mask,
+    candidate_column,
+    code_column,
+    coerce_numeric,
+    numeric_column,
+    sector_reject_mask,
+    spot_numeric_column,
+    text_column,
+    to_optional_list,
+)
 
 
 def get_stock_sector_map() -> Dict[str, str]:
     """
-    Build a mapping of stock code -> sector name.
-    Uses akshare's industry board data to map stocks to sectors.
+    Mapping of stock code -> sector name (primary industry board).
+    Served from the persisted sector index, refreshed once per trading day.
     """
-    sector_map = {}
     try:
-        # Get all industry boards
-        boards = ak.stock_board_industry_name_em()
-        if boards is None or boards.empty:
-            return sector_map
-
-        # Get top 50 most active industry boards to limit API calls
-        #boards = boards.head(50)
-
-        for _, board in boards.iterrows():
-            board_name = board.get('板块名称', '')
-            if not board_name:
-                continue
-
-            try:
-                # Get stocks in this board
-                cons = ak.stock_board_industry_cons_em(symbol=board_name)
-                if cons is not None and not cons.empty:
-                    for _, stock in cons.iterrows():
-                        code = str(stock.get('代码', '')).zfill(6)
-                        if code and code not in sector_map:
-                            sector_map[code] = board_name
-            except Exception:
-                continue
-
+        return sector_index.get_sector_map()
     except Exception as e:
         print(f"  ! 获取行业映射失败: {e}")
+        return {}
+
 
-    return sector_map
+def _stock_shared_data(user_preferences: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Spot snapshot for every stock screener, sector map only when sector preferences are set."""
+    loaders = {'market_snapshot': market_snapshot.refresh}
+    prefs = user_preferences or {}
+    if prefs.get('preferred_sectors') or prefs.get('excluded_sectors'):
+        loaders['sector_map'] = get_stock_sector_map
+    return loaders
 
 
 class ShortTermStockScreener(BaseScreener):
@@ -57,6 +57,9 @@ class ShortTermStockScreener(BaseScreener):
     - Sector momentum (板块联动) - 10% weight
     """
 
+    # 资金流向候选池大小，None 表示全市场
+    candidate_pool_size: Optional[int] = None
+
     @property
     def screener_type(self) -> str:
         return "short_term_stock"
@@ -65,18 +68,21 @@ class ShortTermStockScreener(BaseScreener):
     def default_limit(self) -> int:
         return 30  # 只返回前30只
 
+    def shared_data(self, user_preferences: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        return _stock_shared_data(user_preferences)
+
     def collect_raw_data(self) -> Dict[str, Any]:
         """Collect data from AkShare APIs."""
         data = {}
 
-        # 1. 获取资金流向排行TOP100（核心数据，优先获取）
+        # 1. 获取资金流向排行（核心数据，优先获取）
         try:
             df = ak.stock_individual_fund_flow_rank(indicator="今日")
             if df is not None and not df.empty:
-                # 只取净流入前200名
-                df = df.head(200)
+                if self.candidate_pool_size:
+                    df = df.head(self.candidate_pool_size)
                 data['fund_flow'] = df
-                print(f"  ✓ 获取资金流向TOP200: {len(df)} 条")
+                print(f"  ✓ 获取资金流向: {len(df)} 条")
         except Exception as e:
             print(f"  ✗ 获取资金流向失败: {e}")
             data['fund_flow'] = pd.DataFrame()
@@ -93,7 +99,7 @@ class ShortTermStockScreener(BaseScreener):
 
         # 3. 获取行业板块涨幅榜TOP20
         try:
-            df = ak.stock_board_industry_name_em()
+            df = get_industry_board_table()
             if df is not None and not df.empty:
                 data['sector_perf'] = df.head(20)
                 print(f"  ✓ 获取热门行业TOP20: {len(data['sector_perf'])} 个")
@@ -101,13 +107,12 @@ class ShortTermStockScreener(BaseScreener):
             print(f"  ✗ 获取行业板块失败: {e}")
             data['sector_perf'] = pd.DataFrame()
 
-        # 4. 获取资金流入股票的实时行情（只查询资金流入的股票）
+        # 4. 候选股票实时行情（共享全市场快照，按代码列对齐）
         if not data.get('fund_flow', pd.DataFrame()).empty:
             try:
-                codes = data['fund_flow']['代码'].tolist()
-                spot_map = self._get_stock_spot_batch(codes)
-                data['stock_spot'] = spot_map
-                print(f"  ✓ 获取候选股票行情: {len(spot_map)} 只")
+                spot = market_snapshot.get_by_code()
+                data['stock_spot'] = spot if spot is not None else {}
+                print(f"  ✓ 获取候选股票行情: {len(data['stock_spot'])} 只")
             except Exception as e:
                 print(f"  ✗ 获取股票行情失败: {e}")
                 data['stock_spot'] = {}
@@ -119,7 +124,7 @@ class ShortTermStockScreener(BaseScreener):
 
             if preferred_sectors or excluded_sectors:
                 print(f"  ⏳ 获取股票行业映射...")
-                data['sector_map'] = get_stock_sector_map()
+                data['sector_map'] = self._fetch_shared('sector_map', get_stock_sector_map)
                 print(f"  ✓ 行业映射: {len(data.get('sector_map', {}))} 只股票")
             else:
                 data['sector_map'] = {}
@@ -128,25 +133,8 @@ class ShortTermStockScreener(BaseScreener):
 
         return data
 
-    def _get_stock_spot_batch(self, codes: List[str]) -> Dict[str, Dict]:
-        """批量获取股票行情，使用全市场数据过滤"""
-        try:
-            df = ak.stock_zh_a_spot_em()
-            if df is None or df.empty:
-                return {}
-
-            # 过滤出需要的股票
-            code_set = set(str(c).zfill(6) for c in codes)
-            filtered = df[df['代码'].isin(code_set)]
-            return filtered.set_index('代码').to_dict('index')
-        except Exception as e:
-            print(f"  批量获取行情失败: {e}")
-            return {}
-
     def apply_filters(self, raw_data: Dict[str, Any]) -> List[Dict]:
         """Apply short-term filtering rules - 更严格的筛选 + 用户偏好提前过滤."""
-        candidates = []
-
         fund_flow = raw_data.get('fund_flow', pd.DataFrame())
         hot_rank = raw_data.get('hot_rank', pd.DataFrame())
         stock_spot = raw_data.get('stock_spot', {})
@@ -182,123 +170,101 @@ class ShortTermStockScreener(BaseScreener):
         if not hot_rank.empty and '代码' in hot_rank.columns:
             hot_codes = set(str(c).zfill(6) for c in hot_rank['代码'].tolist())
 
-        # 基于资金流向筛选
-        for _, row in fund_flow.iterrows():
-            filter_stats['total'] += 1
-            try:
-                code = str(row.get('代码', '')).zfill(6)
-                name = str(row.get('名称', ''))
-
-                # 基本排除条件
-                if 'ST' in name or '*ST' in name:
-                    filter_stats['basic_exclude'] += 1
-                    continue
-                if name.startswith('N') or name.startswith('C'):
-                    filter_stats['basic_exclude'] += 1
-                    continue
-                if code.startswith('900') or code.startswith('200'):
-                    filter_stats['basic_exclude'] += 1
-                    continue
-
-                # 获取实时行情数据
-                spot = stock_spot.get(code, {})
-
-                price = self._safe_float(spot.get('最新价'))
-                change_pct = self._safe_float(spot.get('涨跌幅'))
-                market_cap = self._safe_float(spot.get('总市值'))
-                pe = self._safe_float(spot.get('市盈率-动态'))
-                volume_ratio = self._safe_float(spot.get('量比'))
-                turnover = self._safe_float(spot.get('成交额'))
-
-                # 资金流向数据
-                main_net_inflow = self._safe_float(row.get('今日主力净流入-净额'))
-                main_net_pct = self._safe_float(row.get('今日主力净流入-净占比'))
-
-                # 获取股票行业
-                sector = sector_map.get(code, '')
-
-                # ===== 用户偏好提前过滤 =====
-
-                # 1. 行业过滤（最早过滤）
-                if preferred_sectors and sector:
-                    if not any(pref in sector for pref in preferred_sectors):
-                        filter_stats['sector'] += 1
-                        continue
-                if excluded_sectors and sector:
-                    if any(exc in sector for exc in excluded_sectors):
-                        filter_stats['sector'] += 1
-                        continue
-
-                # ===== 严格筛选条件 =====
-
-                # 2. 市值过滤（用户偏好优先，否则用默认 100亿）
-                # 必须有有效市值数据
-                if not market_cap or market_cap <= 0:
-                    filter_stats['market_cap'] += 1
-                    continue
-                min_cap = user_min_market_cap or 1e10
-                if market_cap < min_cap:
-                    filter_stats['market_cap'] += 1
-                    continue
-                if user_max_market_cap and market_cap > user_max_market_cap:
-                    filter_stats['market_cap'] += 1
-                    continue
-
-                # 3. 价格 > 5元（避免低价股）
-                if price and price < 5:
-                    filter_stats['basic_exclude'] += 1
-                    continue
-
-                # 4. 成交额过滤（用户偏好优先，否则用默认 1亿）
-                min_turn = min_liquidity or 1e8
-                if not turnover or turnover < min_turn:
-                    filter_stats['liquidity'] += 1
-                    continue
-
-                # 5. 涨跌幅在合理区间（-5% ~ 8%，避免追涨停）
-                if change_pct is not None and (change_pct >= 8 or change_pct <= -5):
-                    filter_stats['basic_exclude'] += 1
-                    continue
-
-                # 6. PE 过滤
-                max_pe = user_max_pe or 100
-                if require_profitable and pe is not None and pe <= 0:
-                    filter_stats['pe'] += 1
-                    continue
-                if pe is not None and pe > 0 and pe > max_pe:
-                    filter_stats['pe'] += 1
-                    continue
-
-                # 7. 主力净流入 > 0（必须有资金流入）
-                if main_net_inflow is None or main_net_inflow <= 0:
-                    filter_stats['fund_flow'] += 1
-                    continue
-
-                # 8. 量比 > 1（放量）
-                if volume_ratio and volume_ratio < 1:
-                    filter_stats['fund_flow'] += 1
-                    continue
-
-                filter_stats['passed'] += 1
-                candidate = {
-                    'code': code,
-                    'name': name,
-                    'price': price,
-                    'change_pct': change_pct,
-                    'turnover': turnover,
-                    'market_cap': market_cap,
-                    'pe': pe,
-                    'volume_ratio': volume_ratio,
-                    'main_net_inflow': main_net_inflow,
-                    'main_net_inflow_pct': main_net_pct,
-                    'is_hot': code in hot_codes,
-                    'sector': sector,  # 包含行业信息
-                }
-
-                candidates.append(candidate)
-
-            except Exception as e:
-                continue
+        # 列式取数：每列只转换一次
+        codes = code_column(fund_flow)
+        names = text_column(fund_flow, '名称')
+        code_list = codes.tolist()
+
+        price, price_none = spot_numeric_column(stock_spot, code_list, '最新价')
+        change_pct, change_none = spot_numeric_column(stock_spot, code_list, '涨跌幅')
+        market_cap, cap_none = spot_numeric_column(stock_spot, code_list, '总市值')
+        pe, pe_none = spot_numeric_column(stock_spot, code_list, '市盈率-动态')
+        volume_ratio, vr_none = spot_numeric_column(stock_spot, code_list, '量比')
+        turnover, turnover_none = spot_numeric_column(stock_spot, code_list, '成交额')
+
+        # 资金流向数据
+        main_net_inflow, inflow_none = numeric_column(fund_flow, '今日主力净流入-净额')
+        main_net_pct, pct_none = numeric_column(fund_flow, '今日主力净流入-净占比')
+
+        # 获取股票行业
+        sectors = [sector_map.get(c, '') for c in code_list]
+
+        pipeline = FilterPipeline(len(fund_flow), filter_stats)
+
+        # 基本排除条件
+        pipeline.reject('basic_exclude', basic_exclude_mask(codes, names))
+
+        # ===== 用户偏好提前过滤 =====
+
+        # 1. 行业过滤（最早过滤）
+        pipeline.reject('sector', sector_reject_mask(sectors, preferred_sectors, excluded_sectors))
+
+        # ===== 严格筛选条件 =====
+
+        # 2. 市值过滤（用户偏好优先，否则用默认 100亿）
+        # 必须有有效市值数据
+        min_cap = user_min_market_cap or 1e10
+        cap_reject = cap_none | (market_cap <= 0) | (market_cap < min_cap)
+        if user_max_market_cap:
+            cap_reject |= market_cap > user_max_market_cap
+        pipeline.reject('market_cap', cap_reject)
+
+        # 3. 价格 > 5元（避免低价股）
+        pipeline.reject('basic_exclude', (price != 0) & (price < 5))
+
+        # 4. 成交额过滤（用户偏好优先，否则用默认 1亿）
+        min_turn = min_liquidity or 1e8
+        pipeline.reject('liquidity', turnover_none | (turnover == 0) | (turnover < min_turn))
+
+        # 5. 涨跌幅在合理区间（-5% ~ 8%，避免追涨停）
+        pipeline.reject('basic_exclude', (change_pct >= 8) | (change_pct <= -5))
+
+        # 6. PE 过滤
+        max_pe = user_max_pe or 100
+        if require_profitable:
+            pipeline.reject('pe', pe <= 0)
+        pipeline.reject('pe', (pe > 0) & (pe > max_pe))
+
+        # 7. 主力净流入 > 0（必须有资金流入）
+        pipeline.reject('fund_flow', inflow_none | (main_net_inflow <= 0))
+
+        # 8. 量比 > 1（放量）
+        pipeline.reject('fund_flow', (volume_ratio != 0) & (volume_ratio < 1))
+
+        keep = pipeline.passed()
+
+        def pick(values, none_mask):
+            return to_optional_list(values[keep], none_mask[keep])
+
+        candidates = [
+            {
+                'code': code,
+                'name': name,
+                'price': p,
+                'change_pct': chg,
+                'turnover': turn,
+                'market_cap': cap,
+                'pe': pe_val,
+                'volume_ratio': vr,
+                'main_net_inflow': inflow,
+                'main_net_inflow_pct': inflow_pct,
+                'is_hot': code in hot_codes,
+                'sector': sector,  # 包含行业信息
+            }
+            for code, name, p, chg, turn, cap, pe_val, vr, inflow, inflow_pct, sector in zip(
+                codes.to_numpy()[keep].tolist(),
+                names.to_numpy()[keep].tolist(),
+                pick(price, price_none),
+                pick(change_pct, change_none),
+                pick(turnover, turnover_none),
+                pick(market_cap, cap_none),
+                pick(pe, pe_none),
+                pick(volume_ratio, vr_none),
+                pick(main_net_inflow, inflow_none),
+                pick(main_net_pct, pct_none),
+                [sectors[i] for i in keep],
+            )
+        ]
 
         # 打印过滤统计
         if self.user_preferences:
@@ -377,17 +343,6 @@ class ShortTermStockScreener(BaseScreener):
         candidates.sort(key=lambda x: x.get('score', 0), reverse=True)
         return candidates
 
-    def _safe_float(self, value) -> Optional[float]:
-        """Safely convert value to float."""
-        if value is None:
-            return None
-        try:
-            if isinstance(value, str):
-                value = value.replace(',', '').replace('%', '')
-            return float(value)
-        except (ValueError, TypeError):
-            return None
-
 
 class LongTermStockScreener(BaseScreener):
     """
@@ -404,14 +359,17 @@ class LongTermStockScreener(BaseScreener):
     def default_limit(self) -> int:
         return 30
 
+    def shared_data(self, user_preferences: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        return _stock_shared_data(user_preferences)
+
     def collect_raw_data(self) -> Dict[str, Any]:
         """Collect data - 获取市场数据和行业映射."""
         data = {}
 
-        # 获取全市场数据
+        # 获取全市场数据（共享快照）
         try:
-            df = ak.stock_zh_a_spot_em()
-            if df is not None and not df.empty:
+            df = market_snapshot.get_frame()
+            if not df.empty:
                 data['stock_spot'] = df
                 print(f"  ✓ 获取A股行情: {len(df)} 只")
         except Exception as e:
@@ -425,7 +383,7 @@ class LongTermStockScreener(BaseScreener):
 
             if preferred_sectors or excluded_sectors:
                 print(f"  ⏳ 获取股票行业映射...")
-                data['sector_map'] = get_stock_sector_map()
+                data['sector_map'] = self._fetch_shared('sector_map', get_stock_sector_map)
                 print(f"  ✓ 行业映射: {len(data.get('sector_map', {}))} 只股票")
             else:
                 data['sector_map'] = {}
@@ -436,8 +394,6 @@ class LongTermStockScreener(BaseScreener):
 
     def apply_filters(self, raw_data: Dict[str, Any]) -> List[Dict]:
         """Apply long-term filtering rules - 严格基本面筛选 + 用户偏好提前过滤."""
-        candidates = []
-
         stock_spot = raw_data.get('stock_spot', pd.DataFrame())
         sector_map = raw_data.get('sector_map', {})
 
@@ -466,108 +422,95 @@ class LongTermStockScreener(BaseScreener):
             'passed': 0,
         }
 
-        for _, row in stock_spot.iterrows():
-            filter_stats['total'] += 1
-            try:
-                code = str(row.get('代码', '')).zfill(6)
-                name = str(row.get('名称', ''))
-
-                # 基本排除
-                if 'ST' in name or '*ST' in name:
-                    filter_stats['basic_exclude'] += 1
-                    continue
-                if name.startswith('N') or name.startswith('C'):
-                    filter_stats['basic_exclude'] += 1
-                    continue
-                if code.startswith('900') or code.startswith('200'):
-                    filter_stats['basic_exclude'] += 1
-                    continue
-
-                # 获取指标
-                price = self._safe_float(row.get('最新价'))
-                market_cap = self._safe_float(row.get('总市值'))
-                pe = self._safe_float(row.get('市盈率-动态'))
-                pb = self._safe_float(row.get('市净率'))
-                turnover = self._safe_float(row.get('成交额'))
-                change_60d = self._safe_float(row.get('60日涨跌幅'))
-
-                # 获取股票行业
-                sector = sector_map.get(code, '')
-
-                # ===== 用户偏好提前过滤 =====
-
-                # 1. 行业过滤（最早过滤，减少后续处理）
-                if preferred_sectors and sector:
-                    if not any(pref in sector for pref in preferred_sectors):
-                        filter_stats['sector'] += 1
-                        continue
-                if excluded_sectors and sector:
-                    if any(exc in sector for exc in excluded_sectors):
-                        filter_stats['sector'] += 1
-                        continue
-
-                # 2. 市值过滤（用户偏好优先，否则用默认 200亿）
-                # 长期投资必须有有效市值数据
-                if not market_cap or market_cap <= 0:
-                    filter_stats['market_cap'] += 1
-                    continue
-                min_cap = user_min_market_cap or 2e10
-                if market_cap < min_cap:
-                    filter_stats['market_cap'] += 1
-                    continue
-                if user_max_market_cap and market_cap > user_max_market_cap:
-                    filter_stats['market_cap'] += 1
-                    continue
-
-                # 3. PE/PB 过滤
-                # 默认: PE > 0 且 < 40
-                if require_profitable and (pe is None or pe <= 0):
-                    filter_stats['pe_pb'] += 1
-                    continue
-
-                max_pe = user_max_pe or 40
-                if pe is not None and pe > 0 and pe > max_pe:
-                    filter_stats['pe_pb'] += 1
-                    continue
-
-                if user_min_pe and pe is not None and pe > 0 and pe < user_min_pe:
-                    filter_stats['pe_pb'] += 1
-                    continue
-
-                # PB > 0 且 < 8（资产质量）
-                if pb is None or pb <= 0 or pb > 8:
-                    filter_stats['pe_pb'] += 1
-                    continue
-
-                # 4. 流动性过滤
-                min_turn = min_liquidity or 5e7  # 默认 5000万
-                if not turnover or turnover < min_turn:
-                    filter_stats['liquidity'] += 1
-                    continue
-
-                # 5. 60日涨跌幅 > -20%（排除大幅下跌的问题股）
-                if change_60d is not None and change_60d < -20:
-                    filter_stats['basic_exclude'] += 1
-                    continue
-
-                filter_stats['passed'] += 1
-                candidate = {
-                    'code': code,
-                    'name': name,
-                    'price': price,
-                    'market_cap': market_cap,
-                    'pe': pe,
-                    'pb': pb,
-                    'turnover': turnover,
-                    'change_pct': self._safe_float(row.get('涨跌幅')),
-                    'change_60d': change_60d,
-                    'sector': sector,  # 包含行业信息
-                }
-
-                candidates.append(candidate)
-
-            except Exception as e:
-                continue
+        # 列式取数：全市场每列只转换一次
+        codes = code_column(stock_spot)
+        names = text_column(stock_spot, '名称')
+        code_list = codes.tolist()
+
+        price, price_none = numeric_column(stock_spot, '最新价')
+        market_cap, cap_none = numeric_column(stock_spot, '总市值')
+        pe, pe_none = numeric_column(stock_spot, '市盈率-动态')
+        pb, pb_none = numeric_column(stock_spot, '市净率')
+        turnover, turnover_none = numeric_column(stock_spot, '成交额')
+        change_60d, change_60d_none = numeric_column(stock_spot, '60日涨跌幅')
+
+        # 获取股票行业
+        sectors = [sector_map.get(c, '') for c in code_list]
+
+        pipeline = FilterPipeline(len(stock_spot), filter_stats)
+
+        # 基本排除
+        pipeline.reject('basic_exclude', basic_exclude_mask(codes, names))
+
+        # ===== 用户偏好提前过滤 =====
+
+        # 1. 行业过滤（最早过滤，减少后续处理）
+        pipeline.reject('sector', sector_reject_mask(sectors, preferred_sectors, excluded_sectors))
+
+        # 2. 市值过滤（用户偏好优先，否则用默认 200亿）
+        # 长期投资必须有有效市值数据
+        min_cap = user_min_market_cap or 2e10
+        cap_reject = cap_none | (market_cap <= 0) | (market_cap < min_cap)
+        if user_max_market_cap:
+            cap_reject |= market_cap > user_max_market_cap
+        pipeline.reject('market_cap', cap_reject)
+
+        # 3. PE/PB 过滤
+        # 默认: PE > 0 且 < 40
+        if require_profitable:
+            pipeline.reject('pe_pb', pe_none | (pe <= 0))
+
+        max_pe = user_max_pe or 40
+        pipeline.reject('pe_pb', (pe > 0) & (pe > max_pe))
+
+        if user_min_pe:
+            pipeline.reject('pe_pb', (pe > 0) & (pe < user_min_pe))
+
+        # PB > 0 且 < 8（资产质量）
+        pipeline.reject('pe_pb', pb_none | (pb <= 0) | (pb > 8))
+
+        # 4. 流动性过滤
+        min_turn = min_liquidity or 5e7  # 默认 5000万
+        pipeline.reject('liquidity', turnover_none | (turnover == 0) | (turnover < min_turn))
+
+        # 5. 60日涨跌幅 > -20%（排除大幅下跌的问题股）
+        pipeline.reject('basic_exclude', change_60d < -20)
+
+        keep = pipeline.passed()
+        change_pct, change_none = coerce_numeric(
+            stock_spot['涨跌幅'].to_numpy()[keep] if '涨跌幅' in stock_spot.columns
+            else np.full(len(keep), None, dtype=object)
+        )
+
+        def pick(values, none_mask):
+            return to_optional_list(values[keep], none_mask[keep])
+
+        candidates = [
+            {
+                'code': code,
+                'name': name,
+                'price': p,
+                'market_cap': cap,
+                'pe': pe_val,
+                'pb': pb_val,
+                'turnover': turn,
+                'change_pct': chg,
+                'change_60d': chg_60d,
+                'sector': sector,  # 包含行业信息
+            }
+            for code, name, p, cap, pe_val, pb_val, turn, chg, chg_60d, sector in zip(
+                codes.to_numpy()[keep].tolist(),
+                names.to_numpy()[keep].tolist(),
+                pick(price, price_none),
+                pick(market_cap, cap_none),
+                pick(pe, pe_none),
+                pick(pb, pb_none),
+                pick(turnover, turnover_none),
+                to_optional_list(change_pct, change_none),
+                pick(change_60d, change_60d_none),
+                [sectors[i] for i in keep],
+            )
+        ]
 
         # 打印过滤统计
         if self.user_preferences:
@@ -583,77 +526,51 @@ class LongTermStockScreener(BaseScreener):
         return candidates
 
     def calculate_scores(self, candidates: List[Dict]) -> List[Dict]:
-        """Calculate composite score for long-term investment."""
+        """Calculate composite score for long-term investment (columnar)."""
         if not candidates:
             return []
 
-        for c in candidates:
-            score = 0
-
-            # 1. 估值得分 (40%)
-            pe = c.get('pe', 50)
-            pb = c.get('pb', 5)
-
-            if pe <= 15:
-                score += 20
-            elif pe <= 25:
-                score += 15
-            elif pe <= 35:
-                score += 10
-            else:
-                score += 5
-
-            if pb <= 2:
-                score += 20
-            elif pb <= 4:
-                score += 15
-            elif pb <= 6:
-                score += 10
-            else:
-                score += 5
-
-            # 2. 市值得分 (30%) - 大市值更稳定
-            cap = c.get('market_cap', 0)
-            if cap >= 5e11:  # 5000亿+
-                score += 30
-            elif cap >= 2e11:  # 2000亿+
-                score += 25
-            elif cap >= 1e11:  # 1000亿+
-                score += 20
-            elif cap >= 5e10:  # 500亿+
-                score += 15
-            else:
-                score += 10
-
-            # 3. 趋势得分 (30%)
-            change_60d = c.get('change_60d')
-            if change_60d is not None:
-                if change_60d > 10:
-                    score += 30
-                elif change_60d > 0:
-                    score += 25
-                elif change_60d > -10:
-                    score += 15
-                else:
-                    score += 5
-            else:
-                score += 15
-
-            # 4. 偏好行业加分
-            boost = self._boost_preferred_sector_score(c)
-            score = score * boost
-
-            c['score'] = round(score, 2)
+        # None 按 NaN 处理：所有区间比较为 False，落入兜底档
+        pe = candidate_column(candidates, 'pe', 50)
+        pb = candidate_column(candidates, 'pb', 5)
+        cap = candidate_column(candidates, 'market_cap', 0)
+        change_60d = candidate_column(candidates, 'change_60d')
+        change_60d_missing = np.array([c.get('change_60d') is None for c in candidates])
+
+        # 1. 估值得分 (40%)
+        score = np.select([pe <= 15, pe <= 25, pe <= 35], [20, 15, 10], default=5).astype(np.float64)
+        score += np.select([pb <= 2, pb <= 4, pb <= 6], [20, 15, 10], default=5)
+
+        # 2. 市值得分 (30%) - 大市值更稳定
+        score += np.select(
+            [cap >= 5e11, cap >= 2e11, cap >= 1e11, cap >= 5e10],  # 5000亿+ / 2000亿+ / 1000亿+ / 500亿+
+            [30, 25, 20, 15],
+            default=10,
+        )
+
+        # 3. 趋势得分 (30%)
+        score += np.where(
+            change_60d_missing,
+            15,
+            np.select([change_60d > 10, change_60d > 0, change_60d > -10], [30, 25, 15], default=5),
+        )
+
+        # 4. 偏好行业加分
+        score *= self._sector_boosts(candidates)
+
+        for c, value in zip(candidates, score.tolist()):
+            c['score'] = round(value, 2)
 
         candidates.sort(key=lambda x: x.get('score', 0), reverse=True)
         return candidates
 
-    def _safe_float(self, value) -> Optional[float]:
-        if value is None:
-            return None
-        try:
-            if isinstance(value, str):
-                value = value.replace(',', '').replace('%', '')
-            return float(value)
-        except (ValueError, TypeError):
-            return None
+    def _sector_boosts(self, candidates: List[Dict]) -> np.ndarray:
+        """_boost_preferred_sector_score for every candidate, once per distinct sector."""
+        boosts: Dict[str, float] = {}
+        out = np.empty(len(candidates), dtype=np.float64)
+        for i, c in enumerate(candidates):
+            sector = c.get('sector', '')
+            if sector not in boosts:
+                boosts[sector] = self._boost_preferred_sector_score({'sector': sector})
+            out[i] = boosts[sector]
+        return out
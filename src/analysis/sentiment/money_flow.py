@@ -1,6 +1,7 @@
 import akshare as ak
 import pandas as pd
 from datetime import datetime, timedelta
+from src.data_sources.market_snapshot import market_snapshot
 
 class MoneyFlowAnalyst:
     def get_money_flow(self):
@@ -20,9 +21,9 @@ class MoneyFlowAnalyst:
         
         # 1. 市场广度 (Market Breadth)
         try:
-            # 使用实时行情概览
-            df_spot = ak.stock_zh_a_spot_em()
-            if df_spot is not None and not df_spot.empty:
+            # 使用共享的实时行情快照
+            df_spot = market_snapshot.get_frame()
+            if not df_spot.empty:
                 up_count = len(df_spot[df_spot['涨跌幅'] > 0])
                 down_count = len(df_spot[df_spot['涨跌幅'] < 0])
                 flat_count = len(df_spot[df_spot['涨跌幅'] == 0])
@@ -1,19 +1,29 @@
 from abc import ABC, abstractmethod
-from typing import Dict, Any
+from typing import Dict, Any, Iterator, Tuple
+
+from src.llm.response_cache import llm_response_cache
+from .market_context import MarketContext
 
 class AnalysisStrategy(ABC):
     """
     Abstract Base Class for Fund Analysis Strategies.
     """
-    
-    def __init__(self, fund_info: Dict[str, Any], llm_client, web_search):
+
+    # Market-wide inputs (MarketContext names) read per mode; prefetched once per run
+    MARKET_INPUTS: Dict[str, Tuple[str, ...]] = {}
+
+    def __init__(self, fund_info: Dict[str, Any], llm_client, web_search, market_context: MarketContext = None):
         self.fund_info = fund_info
         self.fund_code = fund_info.get("code")
         self.fund_name = fund_info.get("name")
         self.llm = llm_client
         self.web_search = web_search
+        self.market_context = market_context or MarketContext(web_search)
         self.sources = [] # List to track sources
 
+    def market_inputs(self, mode: str) -> Tuple[str, ...]:
+        return self.MARKET_INPUTS.get(mode, ())
+
     def _add_source(self, category: str, title: str, url: str, source_name: str = "Web"):
         """Add a source to the tracking list."""
         self.sources.append({
@@ -50,9 +60,26 @@ class AnalysisStrategy(ABC):
         pass
 
     @abstractmethod
+    def build_prompt(self, mode: str, data: Dict[str, Any]) -> str:
+        """
+        Build the LLM prompt from the collected data.
+        mode: 'pre' or 'post'
+        """
+        pass
+
     def generate_report(self, mode: str, data: Dict[str, Any]) -> str:
         """
         Generate the analysis report using the collected data.
         mode: 'pre' or 'post'
         """
-        pass
+        prompt = self.build_prompt(mode, data)
+        report = llm_response_cache.generate(self.llm, prompt, report_type=f"{mode}_market")
+        return report + self.get_sources()
+
+    def generate_report_stream(self, mode: str, data: Dict[str, Any]) -> Iterator[str]:
+        """Same report as generate_report, yielded in chunks as the LLM produces them."""
+        prompt = self.build_prompt(mode, data)
+        yield from llm_response_cache.generate_stream(self.llm, prompt, report_type=f"{mode}_market")
+        sources = self.get_sources()
+        if sources:
+            yield sources
@@ -100,7 +100,7 @@ class CommodityStrategy(AnalysisStrategy):
 
         return data
 
-    def generate_report(self, mode: str, data: Dict[str, Any]) -> str:
+    def build_prompt(self, mode: str, data: Dict[str, Any]) -> str:
         asset_type = self._get_asset_type()
         today = datetime.now().strftime("%Y-%m-%d")
         
@@ -133,5 +133,4 @@ class CommodityStrategy(AnalysisStrategy):
                 report_date=today
             )
 
-        report = self.llm.generate_content(prompt)
-        return report + self.get_sources()
+        return prompt
@@ -1,25 +1,28 @@
 from typing import Dict, Any, List
 from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
 import pandas as pd
 from .base_strategy import AnalysisStrategy
 from src.data_sources.akshare_api import (
     get_fund_info,
     get_fund_holdings,
-    get_market_indices,
-    get_global_macro_summary,
-    get_northbound_flow,
-    get_industry_capital_flow,
     get_sector_performance,
     get_sector_performance_ths,
-    get_stock_realtime_quote
+    get_stock_realtime_quotes
 )
 from src.llm.prompts import PRE_MARKET_PROMPT_TEMPLATE, POST_MARKET_PROMPT_TEMPLATE
+from config.settings import HOLDINGS_WORKERS
 
 class EquityStrategy(AnalysisStrategy):
     """
     Strategy for Equity/Mixed Funds (Standard A-share Funds).
     """
 
+    MARKET_INPUTS = {
+        'pre': ('global_macro', 'macro_news', 'northbound', 'industry_flow'),
+        'post': ('market_indices',),
+    }
+
     def collect_data(self, mode: str) -> Dict[str, Any]:
         data = {}
         if mode == 'pre':
@@ -36,7 +39,7 @@ class EquityStrategy(AnalysisStrategy):
             data['intraday_news'] = self._collect_intraday_news(holdings_list)
         return data
 
-    def generate_report(self, mode: str, data: Dict[str, Any]) -> str:
+    def build_prompt(self, mode: str, data: Dict[str, Any]) -> str:
         today = datetime.now().strftime("%Y-%m-%d")
         if mode == 'pre':
             prompt = PRE_MARKET_PROMPT_TEMPLATE.format(
@@ -65,15 +68,14 @@ class EquityStrategy(AnalysisStrategy):
                 report_date=today
             )
         
-        report = self.llm.generate_content(prompt)
-        return report + self.get_sources()
+        return prompt
 
     # ==========================
     # Pre-Market Helper Methods
     # ==========================
     def _collect_global_macro(self) -> str:
         print("  📡 Collecting Global Macro Signals...")
-        macro_data = get_global_macro_summary()
+        macro_data = self.market_context.get('global_macro')
         output = []
         if macro_data.get("美股市场"):
             output.append("**隔夜美股:**")
@@ -92,7 +94,7 @@ class EquityStrategy(AnalysisStrategy):
                 output.append(f"- {name}: {d.get('买入价', d.get('最新价'))}")
         
         # News
-        news = self.web_search.search_macro_events(max_results=3)
+        news = self.market_context.get('macro_news')
         for n in news:
             self._add_source("🌍 宏观新闻", n.get('title'), n.get('url'))
             
@@ -100,10 +102,10 @@ class EquityStrategy(AnalysisStrategy):
 
     def _collect_capital_flow_pre(self, focus: List[str]) -> tuple:
         print("  💰 Analyzing Capital Flow...")
-        nb = get_northbound_flow()
+        nb = self.market_context.get('northbound')
         nb_str = f"最新: {nb.get('最新净流入', 'N/A')}, 5日: {nb.get('5日累计净流入', 'N/A')}亿" if nb else "暂无"
         
-        sf = get_industry_capital_flow()
+        sf = self.market_context.get('industry_flow')
         sf_str = ""
         if sf.get('行业资金流向Top10'):
             top5 = sf['行业资金流向Top10'][:5]
@@ -131,11 +133,12 @@ class EquityStrategy(AnalysisStrategy):
                 holdings_list.append({'name': name, 'code': code})
                 output.append(f"- {name}: {row.get('持仓市值', 'N/A')}")
 
-        # Deep dive
+        # Deep dive: announcement and analyst-report searches per holding, fanned out across holdings
+        top = holdings_list[:5]
+        results = self._map_holdings(self._deep_dive_search, top)
+
         deep_out = []
-        for h in holdings_list[:5]:
-            # Search
-            res = self.web_search.comprehensive_stock_search(h['name'])
+        for h, res in zip(top, results):
             # Add sources
             if res.get('announcements'):
                 for a in res['announcements']:
@@ -148,6 +151,26 @@ class EquityStrategy(AnalysisStrategy):
 
         return "\n".join(output), "\n".join(deep_out), holdings_list
 
+    def _deep_dive_search(self, holding: Dict) -> Dict:
+        # Only announcements and analyst reports feed the report; skip the other
+        # comprehensive_stock_search layers (industry chain, risk events)
+        try:
+            return {
+                "announcements": self.web_search.search_stock_announcements(holding['name'], 2),
+                "analyst_reports": self.web_search.search_analyst_reports(holding['name'], 2),
+            }
+        except Exception as e:
+            print(f"    Deep dive search error for {holding['name']}: {e}")
+            return {}
+
+    @staticmethod
+    def _map_holdings(fn, holdings: List[Dict]) -> List:
+        """fn over holdings on a bounded pool; results keep the holdings' order."""
+        if not holdings:
+            return []
+        with ThreadPoolExecutor(max_workers=min(HOLDINGS_WORKERS, len(holdings)), thread_name_prefix="holdings") as pool:
+            return list(pool.map(fn, holdings))
+
     def _collect_policy_news(self, focus: List[str]) -> str:
         print("  📰 Searching Policy News...")
         out = []
@@ -163,7 +186,7 @@ class EquityStrategy(AnalysisStrategy):
     # ==========================
     def _collect_market_performance(self) -> str:
         print("  📈 Collecting Market Performance...")
-        data = get_market_indices()
+        data = self.market_context.get('market_indices')
         return "\n".join([f"- {k}: {v.get('收盘', v.get('close'))} ({v.get('涨跌幅', v.get('change'))}%)" for k, v in data.items() if isinstance(v, dict)])
 
     def _collect_fund_performance(self) -> str:
@@ -185,14 +208,16 @@ class EquityStrategy(AnalysisStrategy):
         h_list = []
         if name_col and code_col:
             for _, row in holdings_df.head(5).iterrows():
-                name = row[name_col]
-                code = str(row[code_col])
-                h_list.append({'name': name, 'code': code})
-                # Realtime quote
-                q = get_stock_realtime_quote(code)
-                price = q.get('最新价') if q else 'N/A'
-                change = q.get('涨跌幅') if q else 'N/A'
-                out.append(f"- {name}: {price} ({change}%)")
+                h_list.append({'name': row[name_col], 'code': str(row[code_col])})
+
+            # Realtime quotes: shared snapshot first, single-stock fetches only for misses
+            quotes = get_stock_realtime_quotes([h['code'] for h in h_list])
+
+            for h in h_list:
+                q = quotes.get(h['code'].zfill(6))
+                price = q.get('price') if q else 'N/A'
+                change = q.get('change_pct') if q else 'N/A'
+                out.append(f"- {h['name']}: {price} ({change}%)")
         return "\n".join(out), h_list
 
     def _collect_sector_data_post(self, focus: List[str]) -> str:
@@ -0,0 +1,69 @@
+"""
+Market Context - market-wide inputs shared by all reports of one run.
+
+Global macro, northbound flow, industry capital flow, market indices and
+concept boards are the same for every fund and stock, so a run (run_all, or
+the scheduled jobs of one mode and time slot) fetches them once. Strategies
+declare which inputs they need per mode (MARKET_INPUTS); the analyst
+prefetches those concurrently, then strategies read them with get().
+Asset-specific calls (holdings, NAV, announcements) stay per fund.
+
+Values are shared between strategies: treat them as read-only.
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable
+
+from src.cache.single_flight import SingleFlight
+from src.data_sources.akshare_api import (
+    get_global_macro_summary,
+    get_northbound_flow,
+    get_industry_capital_flow,
+    get_market_indices,
+    get_concept_board_performance,
+)
+
+
+class MarketContext:
+    """Per-run, single-flight memo of market-wide inputs."""
+
+    def __init__(self, web_search=None):
+        self.web_search = web_search
+        self.created_at = time.time()
+        self._flights = SingleFlight(memo=True)
+        self._loaders: Dict[str, Callable[[], Any]] = {
+            'global_macro': get_global_macro_summary,
+            'northbound': get_northbound_flow,
+            'industry_flow': get_industry_capital_flow,
+            'market_indices': get_market_indices,
+            'concept_boards': get_concept_board_performance,
+            'macro_news': self._macro_news,
+        }
+
+    def _macro_news(self):
+        if self.web_search is None:
+            return []
+        return self.web_search.search_macro_events(max_results=3)
+
+    def get(self, name: str) -> Any:
+        """Value of one input, fetched on first use. Loader errors are re-raised to every caller."""
+        return self._flights.run(name, self._loaders[name])
+
+    def prefetch(self, names: Iterable[str]) -> None:
+        """Fetch inputs concurrently; failures are left for get() to surface."""
+        names = [n for n in dict.fromkeys(names) if n in self._loaders]
+        if not names:
+            return
+
+        def fetch(name):
+            try:
+                self.get(name)
+            except Exception as e:
+                print(f"  ! 市场数据 {name} 获取失败: {e}")
+
+        with ThreadPoolExecutor(max_workers=len(names), thread_name_prefix="market-context") as pool:
+            list(pool.map(fetch, names))
+
+    def fetch_times(self) -> Dict[str, float]:
+        """Seconds each fetched input took."""
+        return self._flights.durations()
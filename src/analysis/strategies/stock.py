@@ -7,18 +7,16 @@ from typing import Dict, Any, List, Optional
 from datetime import datetime
 import akshare as ak
 from .base_strategy import AnalysisStrategy
+from .collector_graph import CollectorGraph
 from src.data_sources.akshare_api import (
     get_stock_realtime_quote,
     get_stock_history,
     get_stock_announcement,
     get_stock_news_sentiment,
-    get_global_macro_summary,
-    get_northbound_flow,
-    get_industry_capital_flow,
     get_sector_performance,
     get_sector_performance_ths,
-    get_concept_board_performance,
 )
+from src.data_sources.rate_limit import upstream_slot
 from src.data_sources.technical_analysis import BasicTechnicalAnalysis, format_technical_analysis
 
 
@@ -28,42 +26,53 @@ class StockStrategy(AnalysisStrategy):
     支持盘前分析和盘后复盘
     """
 
-    def __init__(self, stock_info: Dict[str, Any], llm_client, web_search):
-        super().__init__(stock_info, llm_client, web_search)
+    MARKET_INPUTS = {
+        'pre': ('concept_boards', 'northbound', 'global_macro'),
+    }
+
+    def __init__(self, stock_info: Dict[str, Any], llm_client, web_search, market_context=None):
+        super().__init__(stock_info, llm_client, web_search, market_context)
         self.stock_code = stock_info.get("code")
         self.stock_name = stock_info.get("name")
         self.sector = stock_info.get("sector", "")
         self.market = stock_info.get("market", "")
 
     def collect_data(self, mode: str) -> Dict[str, Any]:
-        """采集数据入口"""
-        data = {}
+        """采集数据入口 - 采集器并发执行，单个失败/超时使用降级数据"""
+        graph = CollectorGraph()
 
         if mode == 'pre':
             # 盘前分析 - 基本面为主
-            data['fundamentals'] = self._collect_fundamentals()
-            data['announcements'] = self._collect_announcements()
-            data['research_reports'] = self._collect_research_reports()
-            data['news_sentiment'] = self._collect_news_sentiment()
-            data['industry_analysis'] = self._collect_industry_analysis()
-            data['northbound_holdings'] = self._collect_northbound_holdings()
-            data['technical_basic'] = self._collect_basic_technicals()
-            data['global_macro'] = self._collect_global_macro()
+            graph.add('quote', self._collect_quote, fallback={})
+            graph.add('fundamentals', self._collect_fundamentals, deps=['quote'], fallback={"error": "timeout"})
+            graph.add('announcements', self._collect_announcements, fallback=[])
+            graph.add('research_reports', self._collect_research_reports, fallback=[])
+            graph.add('news_sentiment', self._collect_news_sentiment, fallback={"em_news": [], "web_news": []})
+            graph.add('industry_analysis', self._collect_industry_analysis, fallback={})
+            graph.add('northbound_holdings', self._collect_northbound_holdings, fallback={})
+            graph.add('technical_basic', self._collect_basic_technicals, fallback="技术分析数据获取超时")
+            graph.add('global_macro', self._collect_global_macro, fallback="宏观数据获取失败")
 
         elif mode == 'post':
             # 盘后复盘
-            data['intraday_performance'] = self._collect_intraday_performance()
-            data['volume_analysis'] = self._collect_volume_analysis()
-            data['capital_flow'] = self._collect_capital_flow()
-            data['dragon_tiger'] = self._collect_dragon_tiger()
-            data['sector_comparison'] = self._collect_sector_comparison()
-            data['intraday_news'] = self._collect_intraday_news()
-            data['technical_basic'] = self._collect_basic_technicals()
-
+            graph.add('quote', self._collect_quote, fallback={})
+            graph.add('intraday_performance', self._collect_intraday_performance, deps=['quote'],
+                      fallback={"error": "timeout"})
+            graph.add('volume_analysis', self._collect_volume_analysis, fallback={"error": "timeout"})
+            graph.add('capital_flow', self._collect_capital_flow, fallback={})
+            graph.add('dragon_tiger', self._collect_dragon_tiger, fallback=[])
+            graph.add('sector_comparison', self._collect_sector_comparison, deps=['quote'],
+                      fallback={"sector_name": self.sector, "sector_change": "N/A", "relative_strength": "N/A"})
+            graph.add('intraday_news', self._collect_intraday_news, fallback=[])
+            graph.add('technical_basic', self._collect_basic_technicals, fallback="技术分析数据获取超时")
+
+        data = graph.run()
+        data.pop('quote', None)
+        print(f"  ⏱ 数据采集耗时: {graph.timings.get('_total')}s")
         return data
 
-    def generate_report(self, mode: str, data: Dict[str, Any]) -> str:
-        """使用LLM生成分析报告"""
+    def build_prompt(self, mode: str, data: Dict[str, Any]) -> str:
+        """构建盘前/盘后分析提示词"""
         today = datetime.now().strftime("%Y-%m-%d")
 
         if mode == 'pre':
@@ -71,21 +80,27 @@ class StockStrategy(AnalysisStrategy):
         else:
             prompt = self._build_post_market_prompt(data, today)
 
-        report = self.llm.generate_content(prompt)
-        return report + self.get_sources()
+        return prompt
+
+    def _collect_quote(self) -> Dict:
+        """实时行情 - 基本面、盘中表现、板块对比共用一次请求"""
+        try:
+            return get_stock_realtime_quote(self.stock_code) or {}
+        except Exception as e:
+            print(f"    Realtime quote error: {e}")
+            return {}
 
     # ==========================
     # 盘前数据采集方法 (Pre-Market)
     # ==========================
 
-    def _collect_fundamentals(self) -> Dict:
+    def _collect_fundamentals(self, quote: Dict) -> Dict:
         """采集基本面数据：PE、PB、市值、ROE等"""
         print(f"  📊 Collecting Fundamentals for {self.stock_name}...")
         try:
-            quote = get_stock_realtime_quote(self.stock_code)
-
             # 获取更详细的基本面数据
-            df_info = ak.stock_individual_info_em(symbol=self.stock_code)
+            with upstream_slot('akshare'):
+                df_info = ak.stock_individual_info_em(symbol=self.stock_code)
             info_map = dict(zip(df_info['item'], df_info['value'])) if not df_info.empty else {}
 
             return {
@@ -207,7 +222,7 @@ class StockStrategy(AnalysisStrategy):
 
         try:
             # 概念板块
-            concepts = get_concept_board_performance()
+            concepts = self.market_context.get('concept_boards')
             if concepts and isinstance(concepts, dict):
                 result["concept_boards"] = concepts.get("概念板块Top10", [])[:5]
         except Exception as e:
@@ -245,7 +260,7 @@ class StockStrategy(AnalysisStrategy):
 
         # 整体北向资金流向
         try:
-            nb = get_northbound_flow()
+            nb = self.market_context.get('northbound')
             result["market_flow"] = {
                 "latest": nb.get('最新净流入', 'N/A'),
                 "5d_total": nb.get('5日累计净流入', 'N/A'),
@@ -256,7 +271,8 @@ class StockStrategy(AnalysisStrategy):
 
         # 个股北向持仓 (如果有接口)
         try:
-            df = ak.stock_hsgt_individual_em(symbol=self.stock_code)
+            with upstream_slot('akshare'):
+                df = ak.stock_hsgt_individual_em(symbol=self.stock_code)
             if df is not None and not df.empty:
                 latest = df.iloc[-1]
                 result["individual_holdings"] = {
@@ -286,7 +302,7 @@ class StockStrategy(AnalysisStrategy):
         """采集全球宏观环境"""
         print(f"  🌍 Collecting Global Macro Signals...")
         try:
-            macro_data = get_global_macro_summary()
+            macro_data = self.market_context.get('global_macro')
             output = []
 
             if macro_data.get("美股市场"):
@@ -310,11 +326,10 @@ class StockStrategy(AnalysisStrategy):
     # 盘后数据采集方法 (Post-Market)
     # ==========================
 
-    def _collect_intraday_performance(self) -> Dict:
+    def _collect_intraday_performance(self, quote: Dict) -> Dict:
         """采集当日交易数据"""
         print(f"  📊 Collecting Intraday Performance for {self.stock_name}...")
         try:
-            quote = get_stock_realtime_quote(self.stock_code)
             if not quote:
                 return {"error": "无法获取行情数据"}
 
@@ -389,7 +404,8 @@ class StockStrategy(AnalysisStrategy):
         try:
             # 判断市场
             market = "sh" if self.stock_code.startswith("6") else "sz"
-            df = ak.stock_individual_fund_flow(stock=self.stock_code, market=market)
+            with upstream_slot('akshare'):
+                df = ak.stock_individual_fund_flow(stock=self.stock_code, market=market)
 
             if df is not None and not df.empty:
                 latest = df.iloc[-1]
@@ -411,7 +427,8 @@ class StockStrategy(AnalysisStrategy):
         print(f"  🐉 Checking Dragon Tiger List for {self.stock_code}...")
         try:
             today = datetime.now().strftime("%Y%m%d")
-            df = ak.stock_lhb_detail_em(start_date=today, end_date=today)
+            with upstream_slot('akshare'):
+                df = ak.stock_lhb_detail_em(start_date=today, end_date=today)
 
             if df is not None and not df.empty:
                 stock_data = df[df['代码'] == self.stock_code]
@@ -421,7 +438,7 @@ class StockStrategy(AnalysisStrategy):
             print(f"    Dragon tiger error: {e}")
         return []
 
-    def _collect_sector_comparison(self) -> Dict:
+    def _collect_sector_comparison(self, quote: Dict) -> Dict:
         """与板块对比表现"""
         print(f"  🏢 Comparing with Sector {self.sector}...")
         result = {
@@ -439,8 +456,7 @@ class StockStrategy(AnalysisStrategy):
                 sector_change = sector_data.get("涨跌幅", 0)
                 result["sector_change"] = sector_change
 
-                # 获取个股涨跌幅进行对比
-                quote = get_stock_realtime_quote(self.stock_code)
+                # 个股涨跌幅进行对比
                 if quote:
                     stock_change = float(quote.get('涨跌幅', 0) or 0)
                     if stock_change > float(sector_change or 0):
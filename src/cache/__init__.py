@@ -2,5 +2,8 @@
 Cache module - supports Redis and in-memory fallback.
 """
 from .cache_manager import CacheManager, cache_manager
+from .single_flight import SingleFlight
+from .ttl_policy import TTLPolicy, ttl_policy
+from .frame_store import FrameStore, frame_store, shared_frame
 
-__all__ = ['CacheManager', 'cache_manager']
+__all__ = ['CacheManager', 'cache_manager', 'SingleFlight', 'TTLPolicy', 'ttl_policy', 'FrameStore', 'frame_store', 'shared_frame']
@@ -2,11 +2,24 @@
 Cache Manager - Provides unified caching interface with Redis and in-memory fallback.
 """
 import json
+import sys
 import time
 import threading
-from typing import Any, Optional, Dict
+import uuid
+import weakref
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional, Dict
 from datetime import datetime
 
+from .codecs import CacheSerializer, CodecError, cache_serializer
+from .single_flight import SingleFlight
+from config.settings import (
+    CACHE_MAX_ENTRIES, CACHE_MAX_BYTES, CACHE_EVICTION_POLICY, CACHE_SWEEP_INTERVAL,
+    CACHE_LOCK_TIMEOUT, CACHE_REFRESH_WORKERS,
+    CACHE_L1_TTL, CACHE_L1_MAX_ENTRIES, CACHE_L1_MAX_BYTES,
+)
+
 # Try to import redis, but don't fail if not installed
 try:
     import redis
@@ -15,82 +28,244 @@ except ImportError:
     REDIS_AVAILABLE = False
 
 
+def _approx_size(value: Any, _depth: int = 0) -> int:
+    """Rough deep size of a value in bytes (containers are walked a few levels deep)."""
+    if hasattr(value, 'memory_usage'):  # pandas DataFrame / Series
+        try:
+            usage = value.memory_usage(deep=True)
+            return int(usage.sum() if hasattr(usage, 'sum') else usage)
+        except Exception:
+            pass
+    size = sys.getsizeof(value)
+    if _depth >= 4:
+        return size
+    if isinstance(value, dict):
+        size += sum(_approx_size(k, _depth + 1) + _approx_size(v, _depth + 1) for k, v in value.items())
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(_approx_size(v, _depth + 1) for v in value)
+    return size
+
+
+def _human_bytes(n: int) -> str:
+    size = float(n)
+    for unit in ('B', 'KB', 'MB'):
+        if size < 1024:
+            return f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
+
+
 class InMemoryCache:
-    """Thread-safe in-memory cache with TTL support."""
+    """
+    Thread-safe in-memory cache with TTL support, bounded by entry count and
+    approximate size, evicting least recently (lru) or least frequently (lfu)
+    used entries. A daemon thread removes expired entries every sweep_interval
+    seconds.
+
+    Sizes are measured when a value is set; values are stored by reference, so
+    mutating a cached object afterwards is not accounted for.
+    """
 
-    def __init__(self):
-        self._cache: Dict[str, Dict[str, Any]] = {}
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES, max_bytes: int = CACHE_MAX_BYTES,
+                 policy: str = CACHE_EVICTION_POLICY, sweep_interval: int = CACHE_SWEEP_INTERVAL):
+        if policy not in ('lru', 'lfu'):
+            raise ValueError(f"Unknown cache eviction policy: {policy}")
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.policy = policy
+        # Insertion/recency order, oldest first (LRU victim is the first key)
+        self._cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        # LFU: access count -> keys with that count, oldest first
+        self._freq: Dict[int, "OrderedDict[str, None]"] = {}
+        self._bytes = 0
         self._lock = threading.RLock()
+        self._stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'expirations': 0, 'rejected': 0}
+        self._stop = threading.Event()
+        if sweep_interval and sweep_interval > 0:
+            self._start_sweeper(sweep_interval)
+
+    # =========================================================================
+    # Bookkeeping (callers hold the lock)
+    # =========================================================================
+
+    def _touch(self, key: str, entry: Dict[str, Any]) -> None:
+        if self.policy == 'lru':
+            self._cache.move_to_end(key)
+            return
+        freq = entry['hits']
+        bucket = self._freq[freq]
+        del bucket[key]
+        if not bucket:
+            del self._freq[freq]
+        entry['hits'] = freq + 1
+        self._freq.setdefault(freq + 1, OrderedDict())[key] = None
+
+    def _remove(self, key: str) -> Dict[str, Any]:
+        entry = self._cache.pop(key)
+        self._bytes -= entry['size']
+        if self.policy == 'lfu':
+            bucket = self._freq[entry['hits']]
+            del bucket[key]
+            if not bucket:
+                del self._freq[entry['hits']]
+        return entry
+
+    def _victim(self) -> str:
+        if self.policy == 'lru':
+            return next(iter(self._cache))
+        return next(iter(self._freq[min(self._freq)]))
+
+    @staticmethod
+    def _expired(entry: Dict[str, Any], now: float) -> bool:
+        return bool(entry['expires_at']) and now > entry['expires_at']
+
+    # =========================================================================
+    # Cache API
+    # =========================================================================
 
     def get(self, key: str) -> Optional[Any]:
         """Get value from cache, returns None if expired or not found."""
         with self._lock:
-            if key not in self._cache:
+            entry = self._cache.get(key)
+            if entry is None:
+                self._stats['misses'] += 1
                 return None
 
-            entry = self._cache[key]
-            if entry['expires_at'] and time.time() > entry['expires_at']:
-                del self._cache[key]
+            if self._expired(entry, time.time()):
+                self._remove(key)
+                self._stats['expirations'] += 1
+                self._stats['misses'] += 1
                 return None
 
+            self._touch(key, entry)
+            self._stats['hits'] += 1
             return entry['value']
 
     def set(self, key: str, value: Any, ttl: int = None) -> bool:
-        """Set value with optional TTL in seconds."""
+        """Set value with optional TTL in seconds. Values larger than max_bytes are not cached."""
+        size = _approx_size(value)
         with self._lock:
-            expires_at = time.time() + ttl if ttl else None
+            if key in self._cache:
+                self._remove(key)
+            if self.max_bytes and size > self.max_bytes:
+                self._stats['rejected'] += 1
+                return False
+
+            while self._cache and (len(self._cache) >= self.max_entries
+                                   or (self.max_bytes and self._bytes + size > self.max_bytes)):
+                self._remove(self._victim())
+                self._stats['evictions'] += 1
+
+            now = time.time()
             self._cache[key] = {
                 'value': value,
-                'expires_at': expires_at,
-                'created_at': time.time()
+                'expires_at': now + ttl if ttl else None,
+                'created_at': now,
+                'size': size,
+                'hits': 1,
             }
+            self._bytes += size
+            if self.policy == 'lfu':
+                self._freq.setdefault(1, OrderedDict())[key] = None
             return True
 
     def delete(self, key: str) -> bool:
         """Delete a key from cache."""
         with self._lock:
             if key in self._cache:
-                del self._cache[key]
+                self._remove(key)
                 return True
             return False
 
     def exists(self, key: str) -> bool:
-        """Check if key exists and is not expired."""
-        return self.get(key) is not None
+        """Check if key exists and is not expired (does not count as an access)."""
+        with self._lock:
+            entry = self._cache.get(key)
+            return entry is not None and not self._expired(entry, time.time())
 
     def clear(self) -> bool:
         """Clear all cache entries."""
         with self._lock:
             self._cache.clear()
+            self._freq.clear()
+            self._bytes = 0
             return True
 
     def cleanup_expired(self) -> int:
         """Remove expired entries. Returns count of removed entries."""
         with self._lock:
             now = time.time()
-            expired_keys = [
-                k for k, v in self._cache.items()
-                if v['expires_at'] and now > v['expires_at']
-            ]
+            expired_keys = [k for k, v in self._cache.items() if self._expired(v, now)]
             for k in expired_keys:
-                del self._cache[k]
+                self._remove(k)
+            self._stats['expirations'] += len(expired_keys)
             return len(expired_keys)
 
+    def _start_sweeper(self, interval: int) -> None:
+        # The thread only holds a weak reference, so a discarded cache stops its sweeper
+        ref = weakref.ref(self)
+        stop = self._stop
+
+        def sweep():
+            while not stop.wait(interval):
+                cache = ref()
+                if cache is None:
+                    return
+                try:
+                    cache.cleanup_expired()
+                except Exception as e:
+                    print(f"Cache sweep failed: {e}")
+                del cache
+
+        threading.Thread(target=sweep, name="cache-sweeper", daemon=True).start()
+
+    def close(self) -> None:
+        """Stop the background sweeper."""
+        self._stop.set()
+
+    # A single process shares this cache, so CacheManager's in-process
+    # single-flight already coalesces computes: the compute lock is a no-op.
+    def acquire_lock(self, key: str, ttl: float) -> Optional[str]:
+        return 'local'
+
+    def release_lock(self, key: str, token: str) -> None:
+        pass
+
+    def is_locked(self, key: str) -> bool:
+        return False
+
     def get_stats(self) -> Dict:
         """Get cache statistics."""
         with self._lock:
+            lookups = self._stats['hits'] + self._stats['misses']
             return {
                 'type': 'in_memory',
+                'policy': self.policy,
                 'total_keys': len(self._cache),
-                'memory_usage': 'N/A'
+                'max_entries': self.max_entries,
+                'memory_usage': _human_bytes(self._bytes),
+                'memory_bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'hit_rate': round(self._stats['hits'] / lookups, 4) if lookups else None,
+                **self._stats,
             }
 
 
+# Delete the lock only if it still holds our token
+_RELEASE_LOCK_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
 class RedisCache:
-    """Redis-based cache implementation."""
+    """Redis-based cache implementation. Values are stored as bytes encoded by a CacheSerializer."""
 
-    def __init__(self, redis_url: str):
-        self._client = redis.from_url(redis_url, decode_responses=True)
+    def __init__(self, redis_url: str, serializer: CacheSerializer = None):
+        self._client = redis.from_url(redis_url, decode_responses=False)
+        self._serializer = serializer or cache_serializer
         self._prefix = "valpha:"  # Key prefix for namespacing
 
     def _key(self, key: str) -> str:
@@ -103,21 +278,35 @@ class RedisCache:
             value = self._client.get(self._key(key))
             if value is None:
                 return None
-            return json.loads(value)
-        except (redis.RedisError, json.JSONDecodeError) as e:
+            return self._serializer.decode(value)
+        except (redis.RedisError, CodecError) as e:
             print(f"Redis GET error for {key}: {e}")
             return None
 
+    def get_with_ttl(self, key: str):
+        """(value, remaining TTL in seconds or None if it has none) in one round trip."""
+        try:
+            pipe = self._client.pipeline(transaction=False)
+            pipe.get(self._key(key))
+            pipe.pttl(self._key(key))
+            value, pttl = pipe.execute()
+            if value is None:
+                return None, None
+            return self._serializer.decode(value), (pttl / 1000 if pttl and pttl > 0 else None)
+        except (redis.RedisError, CodecError) as e:
+            print(f"Redis GET error for {key}: {e}")
+            return None, None
+
     def set(self, key: str, value: Any, ttl: int = None) -> bool:
         """Set value with optional TTL in seconds."""
         try:
-            serialized = json.dumps(value, ensure_ascii=False, default=str)
+            serialized = self._serializer.encode(value)
             if ttl:
                 self._client.setex(self._key(key), ttl, serialized)
             else:
                 self._client.set(self._key(key), serialized)
             return True
-        except (redis.RedisError, TypeError) as e:
+        except (redis.RedisError, CodecError) as e:
             print(f"Redis SET error for {key}: {e}")
             return False
 
@@ -151,6 +340,29 @@ class RedisCache:
             print(f"Redis CLEAR error: {e}")
             return False
 
+    def acquire_lock(self, key: str, ttl: float) -> Optional[str]:
+        """Short compute lock for key shared by all workers; returns a token, or None if held elsewhere."""
+        token = uuid.uuid4().hex
+        try:
+            if self._client.set(self._key(f"lock:{key}"), token, nx=True, px=int(ttl * 1000)):
+                return token
+        except redis.RedisError as e:
+            print(f"Redis LOCK error for {key}: {e}")
+        return None
+
+    def release_lock(self, key: str, token: str) -> None:
+        """Release the lock if it is still ours (it may have expired and been taken over)."""
+        try:
+            self._client.eval(_RELEASE_LOCK_SCRIPT, 1, self._key(f"lock:{key}"), token)
+        except redis.RedisError as e:
+            print(f"Redis UNLOCK error for {key}: {e}")
+
+    def is_locked(self, key: str) -> bool:
+        try:
+            return bool(self._client.exists(self._key(f"lock:{key}")))
+        except redis.RedisError:
+            return False
+
     def get_stats(self) -> Dict:
         """Get Redis statistics."""
         try:
@@ -158,12 +370,130 @@ class RedisCache:
             return {
                 'type': 'redis',
                 'total_keys': self._client.dbsize(),
-                'memory_usage': info.get('used_memory_human', 'N/A')
+                'memory_usage': info.get('used_memory_human', 'N/A'),
+                'codec': self._serializer.name,
             }
         except redis.RedisError:
             return {'type': 'redis', 'error': 'unable to get stats'}
 
 
+class TieredCache:
+    """
+    Small in-process L1 (InMemoryCache) in front of RedisCache (L2).
+
+    Reads are served from L1 for at most l1_ttl seconds (never past the L2
+    TTL), so hot keys skip the round trip and JSON decoding. Writes go to
+    both tiers and publish the key on a Redis channel; every other worker
+    drops it from its L1, which keeps workers coherent. If the subscription
+    drops, L1 is cleared on reconnect since messages may have been missed.
+
+    L1 hands out the cached object itself, not a decoded copy: callers must
+    not mutate values they get from the cache.
+    """
+
+    def __init__(self, l2: RedisCache, l1_ttl: float = CACHE_L1_TTL,
+                 max_entries: int = CACHE_L1_MAX_ENTRIES, max_bytes: int = CACHE_L1_MAX_BYTES):
+        self.l2 = l2
+        self.l1 = InMemoryCache(max_entries=max_entries, max_bytes=max_bytes)
+        self.l1_ttl = l1_ttl
+        self._client = l2._client
+        self._channel = f"{l2._prefix}invalidate"
+        self._origin = uuid.uuid4().hex
+        self._stats = {'l1_hits': 0, 'l2_hits': 0, 'misses': 0, 'invalidations_sent': 0, 'invalidations_received': 0}
+        threading.Thread(target=self._listen, name="cache-invalidation", daemon=True).start()
+
+    # =========================================================================
+    # Invalidation
+    # =========================================================================
+
+    def _publish(self, keys) -> None:
+        try:
+            self._client.publish(self._channel, json.dumps({'origin': self._origin, 'keys': keys}))
+            self._stats['invalidations_sent'] += 1
+        except redis.RedisError as e:
+            print(f"Redis PUBLISH error: {e}")
+
+    def _listen(self) -> None:
+        while True:
+            try:
+                pubsub = self._client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self._channel)
+                for message in pubsub.listen():
+                    if message.get('type') != 'message':
+                        continue
+                    payload = json.loads(message['data'])
+                    if payload.get('origin') == self._origin:
+                        continue
+                    self._stats['invalidations_received'] += 1
+                    if payload.get('keys') == '*':
+                        self.l1.clear()
+                    else:
+                        for key in payload.get('keys') or []:
+                            self.l1.delete(key)
+            except Exception as e:
+                print(f"Cache invalidation listener error: {e}, reconnecting")
+            self.l1.clear()
+            time.sleep(1)
+
+    # =========================================================================
+    # Cache API
+    # =========================================================================
+
+    def get(self, key: str) -> Optional[Any]:
+        value = self.l1.get(key)
+        if value is not None:
+            self._stats['l1_hits'] += 1
+            return value
+
+        value, remaining = self.l2.get_with_ttl(key)
+        if value is None:
+            self._stats['misses'] += 1
+            return None
+        self._stats['l2_hits'] += 1
+        self.l1.set(key, value, min(self.l1_ttl, remaining) if remaining else self.l1_ttl)
+        return value
+
+    def set(self, key: str, value: Any, ttl: int = None) -> bool:
+        ok = self.l2.set(key, value, ttl)
+        if ok:
+            self.l1.set(key, value, min(self.l1_ttl, ttl) if ttl else self.l1_ttl)
+        else:
+            self.l1.delete(key)
+        self._publish([key])
+        return ok
+
+    def delete(self, key: str) -> bool:
+        self.l1.delete(key)
+        deleted = self.l2.delete(key)
+        self._publish([key])
+        return deleted
+
+    def exists(self, key: str) -> bool:
+        return self.l1.exists(key) or self.l2.exists(key)
+
+    def clear(self) -> bool:
+        self.l1.clear()
+        ok = self.l2.clear()
+        self._publish('*')
+        return ok
+
+    def acquire_lock(self, key: str, ttl: float) -> Optional[str]:
+        return self.l2.acquire_lock(key, ttl)
+
+    def release_lock(self, key: str, token: str) -> None:
+        self.l2.release_lock(key, token)
+
+    def is_locked(self, key: str) -> bool:
+        return self.l2.is_locked(key)
+
+    def get_stats(self) -> Dict:
+        stats = self.l2.get_stats()
+        stats['type'] = 'tiered'
+        stats['l1'] = dict(self.l1.get_stats(), ttl=self.l1_ttl)
+        stats.update(self._stats)
+        return stats
+
+
 class CacheManager:
     """
     Unified cache manager that uses Redis if available, falls back to in-memory.
@@ -179,17 +509,27 @@ class CacheManager:
 
         # Delete
         cache_manager.delete('my_key')
+
+        # Compute once on a miss, even with many concurrent callers
+        data = cache_manager.get_or_set('my_key', load_data, ttl=300)
     """
 
     def __init__(self, redis_url: str = None):
         self._backend = None
         self._redis_url = redis_url
         self._initialized = False
+        self._init_lock = threading.Lock()
+        self._flights = SingleFlight()
+        self._refresher = ThreadPoolExecutor(max_workers=CACHE_REFRESH_WORKERS, thread_name_prefix="cache-refresh")
+        self._flight_stats = {'computes': 0, 'coalesced': 0, 'lock_waits': 0, 'stale_served': 0, 'refresh_failures': 0}
 
     def _init_backend(self):
-        """Lazy initialization of cache backend."""
-        if self._initialized:
-            return
+        """Lazy initialization of cache backend (once, even with concurrent first callers)."""
+        with self._init_lock:
+            if not self._initialized:
+                self._create_backend()
+
+    def _create_backend(self):
 
         # Try to get Redis URL from settings if not provided
         if not self._redis_url:
@@ -202,10 +542,15 @@ class CacheManager:
         # Try Redis first
         if self._redis_url and REDIS_AVAILABLE:
             try:
-                self._backend = RedisCache(self._redis_url)
+                redis_cache = RedisCache(self._redis_url)
                 # Test connection
-                self._backend._client.ping()
-                print(f"✓ Cache: Using Redis ({self._redis_url[:30]}...)")
+                redis_cache._client.ping()
+                if CACHE_L1_TTL > 0:
+                    self._backend = TieredCache(redis_cache)
+                    print(f"✓ Cache: Using Redis with in-process L1 ({self._redis_url[:30]}...)")
+                else:
+                    self._backend = redis_cache
+                    print(f"✓ Cache: Using Redis ({self._redis_url[:30]}...)")
             except Exception as e:
                 print(f"✗ Redis connection failed: {e}, falling back to in-memory cache")
                 self._backend = InMemoryCache()
@@ -245,34 +590,131 @@ class CacheManager:
         """Clear all cache entries."""
         return self.backend.clear()
 
-    def get_or_set(self, key: str, factory_func, ttl: int = None) -> Any:
+    def get_or_set(self, key: str, factory_func: Callable[[], Any], ttl: int = None,
+                   stale_ttl: int = None, refresh: bool = False) -> Any:
         """
         Get value from cache, or compute and cache it if not found.
 
+        Concurrent misses of the same key are coalesced: one caller runs
+        factory_func while the others wait for its result (or its exception).
+        With Redis, a short lock extends this across workers; callers that
+        find the lock held poll the cache until the holder stores the value.
+
         Args:
             key: Cache key
-            factory_func: Callable that returns the value to cache
+            factory_func: Callable that returns the value to cache (None is not cached)
             ttl: Time-to-live in seconds
+            stale_ttl: Stale-while-revalidate window in seconds (requires ttl).
+                For stale_ttl seconds after ttl the old value is returned at once
+                while one background refresh runs. Such keys are stored in an
+                envelope: read them through get_or_set only.
+            refresh: Recompute even if a cached value exists
 
         Returns:
             Cached or computed value
         """
-        value = self.get(key)
-        if value is not None:
+        if stale_ttl:
+            if not ttl:
+                raise ValueError("stale_ttl requires ttl")
+            return self._get_or_set_swr(key, factory_func, ttl, stale_ttl, refresh)
+
+        def compute():
+            value = factory_func()
+            if value is not None:
+                self.set(key, value, ttl)
             return value
 
-        value = factory_func()
-        if value is not None:
-            self.set(key, value, ttl)
-        return value
+        if not refresh:
+            value = self.get(key)
+            if value is not None:
+                return value
+        read = (lambda: None) if refresh else (lambda: self.get(key))
+        return self._single_flight(key, lambda: self._locked(key, read, compute))
+
+    def _get_or_set_swr(self, key: str, factory_func: Callable[[], Any], ttl: int,
+                        stale_ttl: int, refresh: bool) -> Any:
+        swr_key = f"swr:{key}"
+
+        def fresh():
+            envelope = self.get(swr_key)
+            if envelope is not None and time.time() < envelope['fresh_until']:
+                return envelope['value']
+            return None
+
+        def compute():
+            value = factory_func()
+            if value is not None:
+                self.set(swr_key, {'value': value, 'fresh_until': time.time() + ttl}, ttl + stale_ttl)
+            return value
+
+        def load():
+            return self._single_flight(swr_key, lambda: self._locked(swr_key, (lambda: None) if refresh else fresh, compute))
+
+        envelope = None if refresh else self.get(swr_key)
+        if envelope is None:
+            return load()
+        if time.time() >= envelope['fresh_until']:
+            self._flight_stats['stale_served'] += 1
+            if not self._flights.is_running(swr_key):
+                self._refresher.submit(self._background_refresh, swr_key, load)
+        return envelope['value']
+
+    def _background_refresh(self, key: str, load: Callable[[], Any]) -> None:
+        try:
+            load()
+        except Exception as e:
+            self._flight_stats['refresh_failures'] += 1
+            print(f"Cache background refresh failed for {key}: {e}")
+
+    def _single_flight(self, key: str, fn: Callable[[], Any]) -> Any:
+        """Run fn once per key among concurrent callers in this process."""
+        return self._flights.run(key, fn, on_wait=self._count_coalesced)
+
+    def _count_coalesced(self, waited: float) -> None:
+        self._flight_stats['coalesced'] += 1
+
+    def _locked(self, key: str, read: Callable[[], Any], compute: Callable[[], Any]) -> Any:
+        """
+        Compute under the backend's lock for key. If another worker holds it,
+        wait for its value; if the holder disappears or times out without one,
+        compute here.
+        """
+        backend = self.backend
+        token = backend.acquire_lock(key, CACHE_LOCK_TIMEOUT)
+        if token is None:
+            self._flight_stats['lock_waits'] += 1
+            deadline = time.time() + CACHE_LOCK_TIMEOUT
+            delay = 0.05
+            while time.time() < deadline:
+                time.sleep(delay)
+                delay = min(delay * 2, 0.5)
+                value = read()
+                if value is not None:
+                    return value
+                if not backend.is_locked(key):
+                    break
+            token = backend.acquire_lock(key, CACHE_LOCK_TIMEOUT)
+
+        try:
+            # Another worker may have stored the value just before we took the lock
+            value = read()
+            if value is not None:
+                return value
+            self._flight_stats['computes'] += 1
+            return compute()
+        finally:
+            if token is not None:
+                backend.release_lock(key, token)
 
     def get_stats(self) -> Dict:
         """Get cache statistics."""
-        return self.backend.get_stats()
+        stats = self.backend.get_stats()
+        stats['single_flight'] = dict(self._flight_stats, in_flight=self._flights.running())
+        return stats
 
     def is_redis(self) -> bool:
         """Check if using Redis backend."""
-        return isinstance(self.backend, RedisCache)
+        return isinstance(self.backend, (RedisCache, TieredCache))
 
 
 # Global singleton instance
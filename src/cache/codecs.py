@@ -0,0 +1,302 @@
+"""
+Cache Codecs - versioned binary encoding of cache values for Redis.
+
+Every encoded value starts with a 5-byte header:
+
+    b'\\x00' b'V' <format version> <codec id> <compression id>
+
+followed by the (optionally compressed) payload. Values stored before the
+header existed are JSON text, which never starts with a NUL byte, so they
+still decode. Codec and compression ids are never reused, so entries written
+with one setting stay readable after CACHE_CODEC / CACHE_COMPRESSION change.
+
+Codecs:
+- json     stdlib json (the previous format, kept for compatibility)
+- msgpack  compact binary (default when the msgpack package is installed)
+- pickle   protocol 5; keeps Python types exactly. Only use it when nothing
+           but this application can write to Redis: unpickling runs code.
+           Pickled payloads are only decoded when CACHE_CODEC is pickle;
+           otherwise they are rejected like an unknown codec.
+
+json and msgpack convert numpy/pandas values to their Python equivalents
+(numbers stay numbers, arrays and Series become lists, DataFrames lists of
+records) instead of the str() that json's default=str produced.
+
+DataFrames (the usual AkShare result) bypass the value codec and are stored
+columnar as Arrow IPC streams, which round-trip dtypes and index and can be
+read zero-copy from a memory map (see frame_store.py); df.attrs travel in the
+schema metadata. Object columns mixing numbers and strings (AkShare's '-'
+placeholders) are made numeric, or text if they hold real strings, before
+conversion. A frame that still cannot be stored as Arrow (or any frame
+without pyarrow) raises CodecError and is not cached, unless pickle is enabled.
+
+Compression (zstd, lz4, zlib) applies to payloads of at least
+CACHE_COMPRESS_MIN_BYTES. zstd and lz4 are optional packages; zlib is used
+if the configured one is not installed.
+"""
+import json
+import pickle
+import zlib
+from datetime import date, datetime
+from typing import Any, Callable, Dict, Tuple
+
+import pandas as pd
+
+from config.settings import CACHE_CODEC, CACHE_COMPRESSION, CACHE_COMPRESS_MIN_BYTES
+
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    MSGPACK_AVAILABLE = False
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+try:
+    import lz4.frame
+    LZ4_AVAILABLE = True
+except ImportError:
+    LZ4_AVAILABLE = False
+
+try:
+    import pyarrow as pa
+    ARROW_AVAILABLE = True
+except ImportError:
+    ARROW_AVAILABLE = False
+
+MAGIC = b'\x00V'
+FORMAT_VERSION = 1
+HEADER_SIZE = len(MAGIC) + 3
+
+
+class CodecError(ValueError):
+    """A cached payload could not be encoded or decoded."""
+
+
+def to_builtin(value: Any) -> Any:
+    """Fallback for json/msgpack: numpy/pandas/datetime values as plain Python values."""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if hasattr(value, 'to_dict') and hasattr(value, 'columns'):  # DataFrame
+        return value.to_dict(orient='records')
+    if hasattr(value, 'tolist'):  # numpy scalar/array, pandas Series/Index
+        return value.tolist()
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    return str(value)
+
+
+# =============================================================================
+# Codecs: id -> (name, dumps, loads)
+# =============================================================================
+
+def _json_dumps(value: Any) -> bytes:
+    return json.dumps(value, ensure_ascii=False, default=to_builtin).encode('utf-8')
+
+
+def _json_loads(data: bytes) -> Any:
+    return json.loads(data)
+
+
+def _msgpack_dumps(value: Any) -> bytes:
+    return msgpack.packb(value, default=to_builtin, use_bin_type=True)
+
+
+def _msgpack_loads(data: bytes) -> Any:
+    # strict_map_key=False: results may have int keys
+    return msgpack.unpackb(data, raw=False, strict_map_key=False)
+
+
+def _pickle_dumps(value: Any) -> bytes:
+    return pickle.dumps(value, protocol=5)
+
+
+_ATTRS_KEY = b'valpha.attrs'
+
+
+def read_arrow_frame(source) -> pd.DataFrame:
+    """DataFrame from an Arrow IPC stream (buffer or file positioned at the stream start)."""
+    table = pa.ipc.open_stream(source).read_all()
+    # split_blocks: numeric columns can stay views of the source buffers
+    df = table.to_pandas(split_blocks=True)
+    attrs = (table.schema.metadata or {}).get(_ATTRS_KEY)
+    if attrs:
+        df.attrs.update(json.loads(attrs))
+    return df
+
+
+def _arrow_dumps(df: pd.DataFrame) -> bytes:
+    table = pa.Table.from_pandas(df, preserve_index=True)
+    if df.attrs:
+        metadata = dict(table.schema.metadata or {})
+        metadata[_ATTRS_KEY] = json.dumps(df.attrs, default=to_builtin).encode('utf-8')
+        table = table.replace_schema_metadata(metadata)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def _arrow_loads(data: bytes) -> pd.DataFrame:
+    return read_arrow_frame(pa.py_buffer(data))
+
+
+_PLACEHOLDERS = {'', '-', '--', '—', 'nan', 'None', 'N/A'}
+
+
+def _arrow_safe(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    df with mixed-type object columns made Arrow-convertible: numbers mixed
+    with placeholders become numeric (placeholders -> NaN), anything else text.
+    """
+    out = None
+    for i in range(df.shape[1]):
+        col = df.iloc[:, i]
+        if col.dtype != object or not pd.api.types.infer_dtype(col, skipna=True).startswith('mixed'):
+            continue
+        numeric = pd.to_numeric(col, errors='coerce')
+        lost = col.notna() & numeric.isna()
+        if lost.any() and not col[lost].astype(str).str.strip().isin(_PLACEHOLDERS).all():
+            converted = col.astype(str).where(col.notna(), None)
+        else:
+            converted = numeric
+        if out is None:
+            out = df.copy(deep=False)
+        out.isetitem(i, converted)
+    return df if out is None else out
+
+
+CODECS: Dict[int, Tuple[str, Callable[[Any], bytes], Callable[[bytes], Any]]] = {
+    1: ('json', _json_dumps, _json_loads),
+    3: ('pickle', _pickle_dumps, pickle.loads),
+}
+if MSGPACK_AVAILABLE:
+    CODECS[2] = ('msgpack', _msgpack_dumps, _msgpack_loads)
+if ARROW_AVAILABLE:
+    CODECS[4] = ('arrow', _arrow_dumps, _arrow_loads)
+ARROW_CODEC_ID = 4
+PICKLE_CODEC_ID = 3
+
+# =============================================================================
+# Compression: id -> (name, compress, decompress); 0 = uncompressed
+# =============================================================================
+
+COMPRESSORS: Dict[int, Tuple[str, Callable[[bytes], bytes], Callable[[bytes], bytes]]] = {
+    1: ('zlib', lambda b: zlib.compress(b, 1), zlib.decompress),  # fastest level: a cache favours speed
+}
+if ZSTD_AVAILABLE:
+    # (De)compressor objects are not shared between threads
+    COMPRESSORS[2] = ('zstd', lambda b: zstandard.ZstdCompressor(level=3).compress(b),
+                      lambda b: zstandard.ZstdDecompressor().decompress(b))
+if LZ4_AVAILABLE:
+    COMPRESSORS[3] = ('lz4', lz4.frame.compress, lz4.frame.decompress)
+
+
+def _id_of(table: Dict[int, Tuple], name: str) -> int:
+    for ident, entry in table.items():
+        if entry[0] == name:
+            return ident
+    return 0
+
+
+class CacheSerializer:
+    """Encodes values with one codec (+ compression) and decodes any supported header."""
+
+    def __init__(self, codec: str = CACHE_CODEC, compression: str = CACHE_COMPRESSION,
+                 min_compress_bytes: int = CACHE_COMPRESS_MIN_BYTES, allow_pickle: bool = None):
+        # Unpickling runs code: only accept pickle when it was chosen explicitly
+        self.allow_pickle = codec == 'pickle' if allow_pickle is None else allow_pickle
+        self.codec_id = _id_of(CODECS, codec)
+        if not self.codec_id:
+            fallback = 'msgpack' if MSGPACK_AVAILABLE else 'json'
+            print(f"✗ Cache codec '{codec}' not available, using {fallback}")
+            self.codec_id = _id_of(CODECS, fallback)
+
+        self.compression_id = 0
+        if compression and compression != 'none':
+            self.compression_id = _id_of(COMPRESSORS, compression)
+            if not self.compression_id:
+                print(f"✗ Cache compression '{compression}' not available, using zlib")
+                self.compression_id = _id_of(COMPRESSORS, 'zlib')
+        self.min_compress_bytes = min_compress_bytes
+
+    @property
+    def name(self) -> str:
+        compression = COMPRESSORS[self.compression_id][0] if self.compression_id else 'none'
+        return f"{CODECS[self.codec_id][0]}+{compression}"
+
+    def _frame_payload(self, df: pd.DataFrame) -> Tuple[int, bytes]:
+        reason = "pyarrow not installed"
+        if ARROW_AVAILABLE:
+            errors = (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError)
+            try:
+                return ARROW_CODEC_ID, _arrow_dumps(df)
+            except errors:
+                pass  # e.g. object column mixing numbers and strings
+            try:
+                return ARROW_CODEC_ID, _arrow_dumps(_arrow_safe(df))
+            except errors as e:
+                reason = f"not Arrow-convertible: {e}"
+        if self.allow_pickle:
+            return PICKLE_CODEC_ID, _pickle_dumps(df)
+        raise CodecError(f"DataFrame not cached ({reason})")
+
+    def encode(self, value: Any, compress: bool = True) -> bytes:
+        """Header + payload. compress=False keeps Arrow frames memory-mappable."""
+        try:
+            if isinstance(value, pd.DataFrame):
+                codec_id, payload = self._frame_payload(value)
+            else:
+                codec_id, payload = self.codec_id, CODECS[self.codec_id][1](value)
+        except CodecError:
+            raise
+        except Exception as e:
+            raise CodecError(f"encode failed ({CODECS[self.codec_id][0]}): {e}") from e
+
+        compression_id = 0
+        if compress and self.compression_id and len(payload) >= self.min_compress_bytes:
+            compressed = COMPRESSORS[self.compression_id][1](payload)
+            if len(compressed) < len(payload):
+                payload, compression_id = compressed, self.compression_id
+        return MAGIC + bytes((FORMAT_VERSION, codec_id, compression_id)) + payload
+
+    def decode(self, data: bytes) -> Any:
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        try:
+            if not data.startswith(MAGIC):
+                return json.loads(data)  # written before codecs existed
+
+            codec_id, compression_id = parse_header(data)
+            if codec_id == PICKLE_CODEC_ID and not self.allow_pickle:
+                raise CodecError("pickled payload rejected (CACHE_CODEC is not pickle)")
+            payload = data[HEADER_SIZE:]
+            if compression_id:
+                if compression_id not in COMPRESSORS:
+                    raise CodecError(f"compression {compression_id} not available")
+                payload = COMPRESSORS[compression_id][2](payload)
+            return CODECS[codec_id][2](payload)
+        except CodecError:
+            raise
+        except Exception as e:
+            raise CodecError(f"decode failed: {e}") from e
+
+
+def parse_header(data: bytes) -> Tuple[int, int]:
+    """(codec id, compression id) of an encoded value; raises CodecError if unreadable here."""
+    if data[:len(MAGIC)] != MAGIC or len(data) < HEADER_SIZE:
+        raise CodecError("missing header")
+    version, codec_id, compression_id = data[len(MAGIC):HEADER_SIZE]
+    if version != FORMAT_VERSION:
+        raise CodecError(f"unknown format version {version}")
+    if codec_id not in CODECS:
+        raise CodecError(f"codec {codec_id} not available")
+    return codec_id, compression_id
+
+
+# Global singleton instance
+cache_serializer = CacheSerializer()
@@ -0,0 +1,142 @@
+"""
+Frame Store - AkShare DataFrames shared across threads, processes and restarts.
+
+shared_frame(name, loader, category) looks a table up in three places:
+
+1. cache_manager: process memory, or Redis (Arrow bytes) shared by all workers
+2. the disk frame store: one file per table under CACHE_FRAME_DIR, written
+   uncompressed so Arrow frames are read back through a memory map. Frames
+   the serializer won't encode (no pyarrow, pickle not enabled) are not stored
+3. loader(), the upstream call, whose result is written to both
+
+Freshness follows the session-aware TTL policy for category, judged from
+df.attrs['fetched_at'] (set when the loader ran), so a table re-read from disk
+after a restart is only served while it would still be fresh. Concurrent
+callers of the same name share one load (cache_manager.get_or_set).
+
+Returned frames are shared between callers: treat them as read-only.
+"""
+import os
+import re
+import time
+from typing import Callable, Optional
+
+import pandas as pd
+
+from config.settings import CACHE_FRAME_DIR
+from .cache_manager import cache_manager
+from .codecs import (
+    ARROW_AVAILABLE, ARROW_CODEC_ID, HEADER_SIZE, CacheSerializer, CodecError,
+    cache_serializer, parse_header, read_arrow_frame,
+)
+from .ttl_policy import ttl_policy
+
+if ARROW_AVAILABLE:
+    import pyarrow as pa
+
+
+class FrameStore:
+    """DataFrames on disk, one encoded file per name."""
+
+    def __init__(self, root: str = CACHE_FRAME_DIR, serializer: CacheSerializer = None):
+        self.root = root
+        self._serializer = serializer or cache_serializer
+
+    def path(self, name: str) -> str:
+        safe = re.sub(r'[^\w.-]+', '_', name)
+        return os.path.join(self.root, f"{safe}.frame")
+
+    def put(self, name: str, df: pd.DataFrame) -> bool:
+        """Write df atomically (temp file + rename), so readers never see a partial file."""
+        path = self.path(name)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(self.root, exist_ok=True)
+            data = self._serializer.encode(df, compress=False)
+            with open(tmp, 'wb') as f:
+                f.write(data)
+            os.replace(tmp, path)
+            return True
+        except (OSError, CodecError) as e:
+            print(f"Frame store write failed for {name}: {e}")
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            return False
+
+    def get(self, name: str, category: Optional[str] = None, max_age: Optional[float] = None) -> Optional[pd.DataFrame]:
+        """Stored frame, or None if missing, unreadable, stale for category, or older than max_age seconds."""
+        path = self.path(name)
+        try:
+            if not os.path.exists(path):
+                return None
+            mtime = os.path.getmtime(path)
+            if not _is_fresh(mtime, category, max_age):
+                return None  # cheap check before reading: fetched_at <= mtime
+            df = self._read(path)
+        except (OSError, ValueError, CodecError) as e:
+            print(f"Frame store read failed for {name}: {e}")
+            return None
+
+        if not isinstance(df, pd.DataFrame):
+            return None
+        df.attrs.setdefault('fetched_at', mtime)
+        return df if _is_fresh(df.attrs['fetched_at'], category, max_age) else None
+
+    def _read(self, path: str):
+        with open(path, 'rb') as f:
+            header = f.read(HEADER_SIZE)
+            codec_id, compression_id = parse_header(header)
+            if codec_id == ARROW_CODEC_ID and not compression_id:
+                # Arrow buffers reference the mapping, which lives as long as they do
+                source = pa.memory_map(path)
+                source.seek(HEADER_SIZE)
+                return read_arrow_frame(source)
+            f.seek(0)
+            return self._serializer.decode(f.read())
+
+    def delete(self, name: str) -> bool:
+        try:
+            os.remove(self.path(name))
+            return True
+        except OSError:
+            return False
+
+
+def _is_fresh(fetched_at: float, category: Optional[str], max_age: Optional[float]) -> bool:
+    if max_age is not None and time.time() - fetched_at >= max(max_age, 1):
+        return False
+    return category is None or ttl_policy.is_fresh(category, fetched_at)
+
+
+# Global singleton instance
+frame_store = FrameStore()
+
+
+def shared_frame(name: str, loader: Callable[[], pd.DataFrame], category: str,
+                 max_age: Optional[float] = None, refresh: bool = False) -> pd.DataFrame:
+    """
+    Table name from the shared cache, the disk store or loader (see module docstring).
+
+    max_age further limits the acceptable age in seconds; refresh=True skips
+    both caches. A None or empty result comes back as an empty DataFrame and
+    is not cached. Loader errors propagate to the caller.
+    """
+    key = f"frame:{name}"
+
+    def load(skip_disk: bool) -> Optional[pd.DataFrame]:
+        df = None if skip_disk else frame_store.get(name, category, max_age)
+        if df is None:
+            df = loader()
+            if df is None or df.empty:
+                return None
+            df.attrs['fetched_at'] = time.time()
+            frame_store.put(name, df)
+        return df
+
+    df = cache_manager.get_or_set(key, lambda: load(refresh), ttl=ttl_policy.ttl(category), refresh=refresh)
+    # The cached copy may have been fetched earlier than its cache entry was written
+    if df is not None and not refresh and not _is_fresh(df.attrs.get('fetched_at', 0), category, max_age):
+        df = cache_manager.get_or_set(key, lambda: load(False), ttl=ttl_policy.ttl(category), refresh=True)
+    return df if df is not None else pd.DataFrame()
@@ -0,0 +1,82 @@
+"""
+Single Flight - run a loader once per key among concurrent callers.
+
+The first caller of a key runs fn; callers arriving while it runs wait for
+that result (or exception) instead of starting their own. With memo=True
+finished results are kept, so the object doubles as a per-run memo
+(MarketContext, ScreeningDataContext); otherwise a key is forgotten as soon
+as its call finishes and the next caller runs fn again (CacheManager, which
+keeps values in the cache itself).
+"""
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+
+class _Flight:
+    __slots__ = ('done', 'value', 'error', 'seconds')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value: Any = None
+        self.error: BaseException = None
+        self.seconds = 0.0
+
+
+class SingleFlight:
+    """Per-key deduplication of concurrent calls, optionally memoizing results."""
+
+    def __init__(self, memo: bool = False):
+        self.memo = memo
+        self._lock = threading.Lock()
+        self._flights: Dict[str, _Flight] = {}
+
+    def run(self, key: str, fn: Callable[[], Any],
+            on_wait: Optional[Callable[[float], None]] = None) -> Any:
+        """
+        fn() for key, shared with concurrent (and, with memo, later) callers.
+        Errors are re-raised to every caller. on_wait(seconds) is called when
+        this caller waited on another caller's run instead of running fn.
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            owner = flight is None
+            if owner:
+                flight = self._flights[key] = _Flight()
+
+        if owner:
+            start = time.time()
+            try:
+                flight.value = fn()
+            except BaseException as e:
+                flight.error = e
+            finally:
+                flight.seconds = time.time() - start
+                if not self.memo:
+                    with self._lock:
+                        self._flights.pop(key, None)
+                flight.done.set()
+        else:
+            start = time.time()
+            flight.done.wait()
+            if on_wait is not None:
+                on_wait(time.time() - start)
+
+        if flight.error is not None:
+            raise flight.error
+        return flight.value
+
+    def is_running(self, key: str) -> bool:
+        with self._lock:
+            flight = self._flights.get(key)
+            return flight is not None and not flight.done.is_set()
+
+    def running(self) -> int:
+        """Number of keys currently being loaded."""
+        with self._lock:
+            return sum(1 for f in self._flights.values() if not f.done.is_set())
+
+    def durations(self) -> Dict[str, float]:
+        """Seconds each finished (memoized) load took."""
+        with self._lock:
+            return {key: round(f.seconds, 2) for key, f in self._flights.items() if f.done.is_set()}
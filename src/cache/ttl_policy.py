@@ -0,0 +1,73 @@
+"""
+TTL Policy - one freshness budget per data category and session phase.
+
+Caches ask the policy instead of hard-coding trading hours. A budget comes
+from CACHE_TTL_POLICY[category][phase] where phase is the A-share session
+phase (pre_open / auction / continuous / lunch / closed / holiday, see
+src/data_sources/trading_calendar.py) at the time the data was fetched.
+``None`` means the data stays valid until the next session start: an entry
+fetched after the close is served until the next opening auction, so nothing
+is re-fetched while the market is shut.
+
+Freshness is judged from the fetch time, so data fetched during trading still
+expires after its short budget and is re-fetched once after the close.
+"""
+import time
+from datetime import datetime
+from typing import Dict, Optional
+
+from config.settings import CACHE_TTL_POLICY
+from src.data_sources.trading_calendar import TradingCalendar, trading_calendar
+
+# Data categories
+A_SHARE_SPOT = 'a_share_spot'      # spot quotes, intraday signals
+A_SHARE_BOARD = 'a_share_board'    # breadth, sectors, capital-flow ranks
+GLOBAL_INDEX = 'global_index'      # global indices, gold/FX
+FUND_NAV = 'fund_nav'
+RECOMMENDATION = 'recommendation'
+
+
+class TTLPolicy:
+    """Maps (category, session phase) to an expiry time."""
+
+    def __init__(self, table: Dict[str, Dict[str, Optional[int]]] = None,
+                 calendar: TradingCalendar = None):
+        self.table = table or CACHE_TTL_POLICY
+        self.calendar = calendar or trading_calendar
+
+    def budget(self, category: str, phase: str) -> Optional[int]:
+        """Seconds for category in phase; None = until the next session start."""
+        budgets = self.table.get(category) or self.table['default']
+        return budgets.get(phase, self.table['default'].get(phase))
+
+    def expires_at(self, category: str, fetched_at: Optional[float] = None) -> float:
+        """Epoch seconds at which data of category fetched at fetched_at goes stale."""
+        fetched_at = time.time() if fetched_at is None else fetched_at
+        when = datetime.fromtimestamp(fetched_at)
+        budget = self.budget(category, self.calendar.session_phase(when))
+        if budget is None:
+            return self.calendar.next_session_start(when).timestamp()
+        return fetched_at + budget
+
+    def ttl(self, category: str, now: Optional[float] = None) -> int:
+        """Seconds data of category fetched now stays fresh (at least 1)."""
+        now = time.time() if now is None else now
+        return max(1, int(self.expires_at(category, now) - now))
+
+    def is_fresh(self, category: str, fetched_at: Optional[float], now: Optional[float] = None) -> bool:
+        if not fetched_at:
+            return False
+        now = time.time() if now is None else now
+        return now < self.expires_at(category, fetched_at)
+
+    def describe(self, now: Optional[float] = None) -> Dict:
+        """Current phase and the TTL every category would get right now."""
+        now = time.time() if now is None else now
+        return {
+            'phase': self.calendar.session_phase(datetime.fromtimestamp(now)),
+            'ttl': {category: self.ttl(category, now) for category in self.table},
+        }
+
+
+# Global singleton instance
+ttl_policy = TTLPolicy()
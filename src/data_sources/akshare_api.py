@@ -2,14 +2,17 @@ import akshare as ak
 import pandas as pd
 from datetime import datetime, timedelta
 import inspect
-import time
-import threading
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Optional
 
+from config.settings import QUOTE_FETCH_WORKERS, QUOTE_SNAPSHOT_MIN_MISSES
+from src.data_sources.market_snapshot import market_snapshot, SpotSnapshot
+from src.data_sources.rate_limit import limited, upstream_slot
+from src.cache.frame_store import shared_frame
+from src.cache.ttl_policy import A_SHARE_BOARD
 
-_A_STOCK_SPOT_CACHE_LOCK = threading.Lock()
-_A_STOCK_SPOT_CACHE_FETCHED_AT: float = 0.0
-_A_STOCK_SPOT_CACHE_BY_CODE: Optional[Dict[str, Dict]] = None
+# Process-wide pool for single-stock quote fetches (bulk quote cache misses)
+_quote_executor = ThreadPoolExecutor(max_workers=QUOTE_FETCH_WORKERS, thread_name_prefix="quote_")
 
 
 def _normalize_a_stock_code(stock_code: str) -> str:
@@ -24,36 +27,15 @@ def _normalize_a_stock_code(stock_code: str) -> str:
     return stock_code
 
 
-def get_all_stock_spot_map(cache_ttl_seconds: int = 30, force_refresh: bool = False) -> Optional[Dict[str, Dict]]:
-    """Return a cached mapping {code -> row_dict} built from ak.stock_zh_a_spot_em()."""
-    global _A_STOCK_SPOT_CACHE_FETCHED_AT, _A_STOCK_SPOT_CACHE_BY_CODE
-
-    now = time.time()
-    with _A_STOCK_SPOT_CACHE_LOCK:
-        if (
-            not force_refresh
-            and _A_STOCK_SPOT_CACHE_BY_CODE is not None
-            and (now - _A_STOCK_SPOT_CACHE_FETCHED_AT) < max(cache_ttl_seconds, 1)
-        ):
-            return _A_STOCK_SPOT_CACHE_BY_CODE
-
-        try:
-            df = ak.stock_zh_a_spot_em()
-            if df is None or df.empty or '代码' not in df.columns:
-                # Keep old cache if fetch fails? Or clear? Let's clear to be safe or maybe keep old is better?
-                # If fetch fails, returning None lets caller handle it.
-                return _A_STOCK_SPOT_CACHE_BY_CODE
-            
-            # Build once for O(1) lookups during holdings loops
-            # Columns usually: 代码, 名称, 最新价, 涨跌幅, ...
-            by_code = df.set_index('代码').to_dict('index')
-            _A_STOCK_SPOT_CACHE_BY_CODE = by_code
-            _A_STOCK_SPOT_CACHE_FETCHED_AT = time.time()
-            return by_code
-        except Exception as e:
-            print(f"Error refreshing stock spot map: {e}")
-            return _A_STOCK_SPOT_CACHE_BY_CODE
+def get_all_stock_spot_map(cache_ttl_seconds: int = None, force_refresh: bool = False) -> Optional[SpotSnapshot]:
+    """
+    Return a read-only mapping {code -> SpotRow} from the shared market snapshot.
+    Rows support .get('最新价') like the old per-row dicts.
+    cache_ttl_seconds overrides the session-dependent staleness budget.
+    """
+    return market_snapshot.get_by_code(max_age=cache_ttl_seconds, force_refresh=force_refresh)
 
+@limited('akshare')
 def get_stock_history(code: str, days: int = 100) -> List[Dict]:
     """
     Fetch daily history for a stock.
@@ -92,6 +74,7 @@ def get_stock_history(code: str, days: int = 100) -> List[Dict]:
 # SECTION 1: 全球宏观市场数据 (Global Macro Data)
 # ============================================================================
 
+@limited('akshare')
 def get_us_market_overview() -> Dict:
     """
     获取隔夜美股市场概览：三大指数
@@ -126,6 +109,7 @@ def get_us_market_overview() -> Dict:
     
     return result if result else {"说明": "美股数据暂时无法获取"}
 
+@limited('akshare')
 def get_a50_futures() -> Dict:
     """
     获取富时A50相关指数数据
@@ -156,6 +140,7 @@ def get_a50_futures() -> Dict:
         return {"说明": "A50期货数据暂时无法获取，请关注盘前竞价"}
     return result
 
+@limited('akshare')
 def get_forex_rates() -> Dict:
     """
     获取关键汇率：美元/人民币
@@ -212,6 +197,7 @@ def get_global_macro_summary() -> Dict:
 # SECTION 2: 北向资金与资金流向 (Capital Flow)
 # ============================================================================
 
+@limited('akshare')
 def get_northbound_flow() -> Dict:
     """
     获取北向资金（沪股通+深股通）净流入数据
@@ -276,6 +262,7 @@ def get_northbound_flow() -> Dict:
     
     return result if result else {"说明": "北向资金数据暂时无法获取"}
 
+@limited('akshare')
 def get_industry_capital_flow(industry: str = None) -> Dict:
     """
     获取行业资金流向
@@ -297,6 +284,7 @@ def get_industry_capital_flow(industry: str = None) -> Dict:
 # SECTION 3: 个股深度数据 (Stock Deep Dive)
 # ============================================================================
 
+@limited('akshare')
 def get_stock_announcement(stock_code: str, stock_name: str) -> List[Dict]:
     """
     获取个股最新公告（巨潮资讯）
@@ -320,7 +308,7 @@ def get_stock_announcement(stock_code: str, stock_name: str) -> List[Dict]:
 def get_stock_realtime_quote(
     stock_code: str,
     use_cache: bool = True,
-    cache_ttl_seconds: int = 30,
+    cache_ttl_seconds: int = None,
     force_refresh: bool = False,
 ) -> Dict:
     """
@@ -334,22 +322,17 @@ def get_stock_realtime_quote(
 
         # 1. Try Cache
         if use_cache:
-            # Check global cache variable directly to avoid triggering a full fetch if empty
-            # We only use get_all_stock_spot_map if we WANT to ensure cache is populated, 
-            # but here we want to avoid slow fetch for single stock.
-            # So we check the variable directly (thread-safe lock needed if reading? Reading dict ref is atomic in Py)
-            # But let's use the getter if it doesn't force refresh.
-            # actually get_all_stock_spot_map will fetch if empty.
-            # So check the global variable _A_STOCK_SPOT_CACHE_BY_CODE directly.
-            
-            with _A_STOCK_SPOT_CACHE_LOCK:
-                if _A_STOCK_SPOT_CACHE_BY_CODE is not None:
-                     row = _A_STOCK_SPOT_CACHE_BY_CODE.get(code)
-                     if row: return row
+            # Peek at the shared snapshot without triggering a full-market fetch
+            # for a single stock. Only serve it while within cache_ttl_seconds
+            # (defaults to the session-dependent staleness budget).
+            if market_snapshot.is_fresh(cache_ttl_seconds):
+                row = market_snapshot.peek_row(code)
+                if row: return row
 
         # 2. Fast Fetch (Single Stock)
         try:
-            df = ak.stock_bid_ask_em(symbol=code)
+            with upstream_slot('akshare'):
+                df = ak.stock_bid_ask_em(symbol=code)
             if not df.empty:
                 # df columns: item, value. 
                 # Keys: 最新, 涨幅, 总手, 金额, 最高, 最低, 今开, 昨收, 涨跌
@@ -398,6 +381,78 @@ def get_stock_realtime_quote(
         print(f"Error fetching realtime quote for {stock_code}: {e}")
     return {}
 
+def _to_float(value) -> Optional[float]:
+    try:
+        if value is None or str(value).strip() in ('', '-', 'nan'):
+            return None
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _quote_record(code: str, quote, source: str, volume_in_hands: bool) -> Dict:
+    """Normalized quote; volume in shares (the spot table reports hands)."""
+    volume = _to_float(quote.get('成交量'))
+    if volume is not None and volume_in_hands:
+        volume *= 100
+    return {
+        'code': code,
+        'name': quote.get('名称') or '',
+        'price': _to_float(quote.get('最新价')),
+        'change_pct': _to_float(quote.get('涨跌幅')),
+        'change': _to_float(quote.get('涨跌额')),
+        'volume': volume,
+        'amount': _to_float(quote.get('成交额')),
+        'high': _to_float(quote.get('最高')),
+        'low': _to_float(quote.get('最低')),
+        'open': _to_float(quote.get('今开')),
+        'prev_close': _to_float(quote.get('昨收')),
+        'source': source,
+    }
+
+
+def get_stock_realtime_quotes(stock_codes: List[str], cache_ttl_seconds: int = None,
+                              refresh_snapshot: bool = False) -> Dict[str, Dict]:
+    """
+    批量获取实时行情 {code -> quote record}
+    Serves from the shared spot snapshot while it is fresh; only misses are
+    fetched one by one on a bounded process-wide pool. When there are at least
+    QUOTE_SNAPSHOT_MIN_MISSES misses, one snapshot refresh replaces them.
+    refresh_snapshot=True always refreshes the snapshot first (if older than
+    cache_ttl_seconds), for callers polling the same codes repeatedly.
+    Codes without data are omitted.
+    """
+    codes = list(dict.fromkeys(c for c in (_normalize_a_stock_code(s) for s in stock_codes) if c))
+    quotes: Dict[str, Dict] = {}
+
+    def from_snapshot(by_code):
+        for code in codes:
+            if code not in quotes and by_code is not None and code in by_code:
+                quotes[code] = _quote_record(code, by_code[code], 'snapshot', volume_in_hands=True)
+
+    if refresh_snapshot:
+        from_snapshot(market_snapshot.get_by_code(max_age=cache_ttl_seconds))
+    elif market_snapshot.is_fresh(cache_ttl_seconds):
+        from_snapshot(market_snapshot.peek_by_code())
+
+    missing = [c for c in codes if c not in quotes]
+    if not refresh_snapshot and len(missing) >= max(1, QUOTE_SNAPSHOT_MIN_MISSES):
+        from_snapshot(market_snapshot.get_by_code(max_age=cache_ttl_seconds))
+        missing = [c for c in codes if c not in quotes]
+
+    futures = {code: _quote_executor.submit(get_stock_realtime_quote, code, use_cache=False) for code in missing}
+    for code, future in futures.items():
+        try:
+            quote = future.result()
+        except Exception as e:
+            print(f"Error fetching realtime quote for {code}: {e}")
+            continue
+        if quote:
+            quotes[code] = _quote_record(code, quote, 'single', volume_in_hands=False)
+
+    return {code: quotes[code] for code in codes if code in quotes}
+
+@limited('akshare')
 def get_stock_news_sentiment(stock_name: str) -> List[Dict]:
     """
     获取个股相关新闻（东方财富）
@@ -414,12 +469,22 @@ def get_stock_news_sentiment(stock_name: str) -> List[Dict]:
 # SECTION 4: 行业与板块数据 (Sector Data)
 # ============================================================================
 
+def get_industry_board_table() -> pd.DataFrame:
+    """东方财富行业板块行情表 (ak.stock_board_industry_name_em)，跨进程/重启共享，只读"""
+    return shared_frame('stock_board_industry_name_em', limited('akshare')(ak.stock_board_industry_name_em), A_SHARE_BOARD)
+
+
+def get_concept_board_table() -> pd.DataFrame:
+    """东方财富概念板块行情表 (ak.stock_board_concept_name_em)，跨进程/重启共享，只读"""
+    return shared_frame('stock_board_concept_name_em', limited('akshare')(ak.stock_board_concept_name_em), A_SHARE_BOARD)
+
+
 def get_sector_performance(sector_name: str = None) -> Dict:
     """
     获取板块行情表现
     """
     try:
-        df = ak.stock_board_industry_name_em()
+        df = get_industry_board_table()
         if not df.empty:
             if sector_name:
                 filtered = df[df['板块名称'].str.contains(sector_name, na=False, regex=False)]
@@ -430,6 +495,7 @@ def get_sector_performance(sector_name: str = None) -> Dict:
         print(f"Error fetching sector performance: {e}")
     return {}
 
+@limited('akshare')
 def get_sector_performance_ths(sector_name: str) -> Dict:
     """
     获取同花顺行业板块表现
@@ -494,7 +560,7 @@ def get_concept_board_performance(concept: str = None) -> Dict:
     获取概念板块表现（如：AI、新能源等）
     """
     try:
-        df = ak.stock_board_concept_name_em()
+        df = get_concept_board_table()
         if not df.empty:
             if concept:
                 filtered = df[df['板块名称'].str.contains(concept, na=False, regex=False)]
@@ -509,6 +575,7 @@ def get_concept_board_performance(concept: str = None) -> Dict:
 # SECTION 5: 原有函数（保留并优化）
 # ============================================================================
 
+@limited('akshare')
 def get_fund_info(fund_code: str):
     """
     Fetch basic fund information and net value history.
@@ -546,6 +613,7 @@ def get_fund_info(fund_code: str):
         print(f"Error fetching fund info for {fund_code}: {e}")
         return pd.DataFrame()
 
+@limited('akshare')
 def get_fund_holdings(fund_code: str, year: str = None):
     """
     Fetch the latest top 10 holdings for the fund.
@@ -594,6 +662,7 @@ def get_fund_holdings(fund_code: str, year: str = None):
         print(f"Error fetching holdings for {fund_code}: {e}")
         return pd.DataFrame()
 
+@limited('akshare')
 def get_market_indices():
     """
     Fetch key market indices for context (A50, Shanghai Composite, etc.)
@@ -636,6 +705,7 @@ def get_market_indices():
         print(f"Error fetching market indices: {e}")
         return {}
 
+@limited('akshare')
 def get_all_fund_list() -> List[Dict]:
 
     """
@@ -0,0 +1,204 @@
+"""
+Board Crawler - parallel constituent crawl for industry / concept boards.
+
+Fans ``stock_board_{industry,concept}_cons_em`` out over a bounded thread pool:
+
+- Token-bucket rate limiting shared by all workers (eastmoney throttles bursts).
+- Per-board retry with exponential backoff + jitter; boards that still fail
+  are reported instead of silently dropped.
+- Partial results are checkpointed to a JSON file, so an interrupted crawl
+  resumes with only the boards that are still missing.
+"""
+import json
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+
+from config.settings import BOARD_CRAWL_MAX_WORKERS, BOARD_CRAWL_RATE
+from src.storage.db import DB_PATH
+
+# board_type -> (board list API, constituents API)
+BOARD_APIS = {
+    'industry': ('stock_board_industry_name_em', 'stock_board_industry_cons_em'),
+    'concept': ('stock_board_concept_name_em', 'stock_board_concept_cons_em'),
+}
+
+
+class TokenBucket:
+    """Thread-safe token bucket: ``rate`` tokens/second, bursts up to ``capacity``."""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(1.0, rate))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: float = 1.0) -> float:
+        """Block until ``tokens`` are available; returns the seconds spent waiting."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return waited
+                wait = (tokens - self._tokens) / self.rate
+            time.sleep(wait)
+            waited += wait
+
+
+class BoardCrawler:
+    """Bounded-concurrency, rate-limited, resumable board constituent crawler."""
+
+    def __init__(self, ak_module=None, max_workers: int = None, rate: float = None,
+                 burst: float = None, max_retries: int = 3, backoff_base: float = 0.5,
+                 backoff_max: float = 8.0, checkpoint_dir: str = None,
+                 checkpoint_interval: float = 2.0):
+        if ak_module is None:
+            import akshare as ak_module
+        self.ak = ak_module
+        self.max_workers = max_workers or BOARD_CRAWL_MAX_WORKERS
+        self.bucket = TokenBucket(rate or BOARD_CRAWL_RATE, burst)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.checkpoint_dir = checkpoint_dir or os.path.dirname(os.path.abspath(DB_PATH))
+        self.checkpoint_interval = checkpoint_interval
+
+    # =========================================================================
+    # Checkpoint
+    # =========================================================================
+
+    def checkpoint_path(self, board_type: str) -> str:
+        return os.path.join(self.checkpoint_dir, f"board_crawl_{board_type}.json")
+
+    def _load_checkpoint(self, board_type: str) -> Dict[str, List[str]]:
+        """Boards finished earlier today by an interrupted crawl."""
+        path = self.checkpoint_path(board_type)
+        if not os.path.exists(path):
+            return {}
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('board_type') != board_type or data.get('date') != date.today().isoformat():
+                return {}
+            return data.get('members', {})
+        except Exception as e:
+            print(f"  ! 读取抓取断点失败: {e}")
+            return {}
+
+    def _save_checkpoint(self, board_type: str, members: Dict[str, List[str]]) -> None:
+        path = self.checkpoint_path(board_type)
+        tmp = f"{path}.tmp"
+        try:
+            os.makedirs(self.checkpoint_dir, exist_ok=True)
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump({'board_type': board_type, 'date': date.today().isoformat(), 'members': members},
+                          f, ensure_ascii=False)
+            os.replace(tmp, path)
+        except Exception as e:
+            print(f"  ! 保存抓取断点失败: {e}")
+
+    def _clear_checkpoint(self, board_type: str) -> None:
+        try:
+            os.remove(self.checkpoint_path(board_type))
+        except FileNotFoundError:
+            pass
+
+    # =========================================================================
+    # Crawl
+    # =========================================================================
+
+    def list_boards(self, board_type: str = 'industry') -> List[str]:
+        list_api, _ = BOARD_APIS[board_type]
+        self.bucket.acquire()
+        boards = getattr(self.ak, list_api)()
+        if boards is None or boards.empty or '板块名称' not in boards.columns:
+            return []
+        return [b for b in boards['板块名称'].astype(str).tolist() if b]
+
+    def fetch_constituents(self, board_type: str, board: str) -> List[str]:
+        """Constituent codes of one board, retried with exponential backoff."""
+        _, cons_api = BOARD_APIS[board_type]
+        fetch = getattr(self.ak, cons_api)
+        for attempt in range(self.max_retries + 1):
+            self.bucket.acquire()
+            try:
+                cons = fetch(symbol=board)
+                if cons is None or cons.empty or '代码' not in cons.columns:
+                    return []
+                return cons['代码'].astype(str).str.zfill(6).tolist()
+            except Exception:
+                if attempt >= self.max_retries:
+                    raise
+                delay = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+                time.sleep(delay + random.uniform(0, self.backoff_base))
+        return []
+
+    def crawl(self, board_type: str = 'industry', boards: List[str] = None, resume: bool = True) -> Dict:
+        """
+        Crawl all boards of a type.
+
+        Returns a dict with ``boards`` (board order), ``members`` {board -> codes},
+        ``failed`` {board -> error}, ``resumed`` (boards taken from the checkpoint)
+        and ``elapsed`` seconds. The checkpoint is removed once nothing failed.
+        """
+        start = time.time()
+        boards = list(dict.fromkeys(boards if boards is not None else self.list_boards(board_type)))
+        members = self._load_checkpoint(board_type) if resume else {}
+        board_set = set(boards)
+        members = {b: codes for b, codes in members.items() if b in board_set}
+        resumed = len(members)
+        pending = [b for b in boards if b not in members]
+        failed: Dict[str, str] = {}
+
+        if resumed:
+            print(f"  ↻ 从断点恢复 {resumed} 个板块，剩余 {len(pending)} 个")
+
+        last_saved = time.time()
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=f"board-{board_type}") as pool:
+                futures = {pool.submit(self.fetch_constituents, board_type, b): b for b in pending}
+                for future in as_completed(futures):
+                    board = futures[future]
+                    try:
+                        members[board] = future.result()
+                    except Exception as e:
+                        failed[board] = str(e)
+                        print(f"  ✗ 板块 {board} 成分获取失败: {e}")
+
+                    if time.time() - last_saved >= self.checkpoint_interval:
+                        self._save_checkpoint(board_type, members)
+                        last_saved = time.time()
+        finally:
+            # Interrupted or partially failed: keep what we have for the next run
+            if failed or len(members) < len(boards):
+                self._save_checkpoint(board_type, members)
+
+        if not failed and len(members) == len(boards):
+            self._clear_checkpoint(board_type)
+
+        return {
+            'board_type': board_type,
+            'boards': boards,
+            'members': members,
+            'failed': failed,
+            'resumed': resumed,
+            'elapsed': round(time.time() - start, 3),
+        }
+
+
+def to_membership_rows(result: Dict) -> List[Tuple[str, str, int]]:
+    """(code, board, rank) rows in board order, as stored by SectorIndex."""
+    rows: List[Tuple[str, str, int]] = []
+    for rank, board in enumerate(result['boards']):
+        for code in result['members'].get(board, []):
+            rows.append((code, board, rank))
+    return rows
@@ -0,0 +1,232 @@
+"""
+Market Snapshot - process-wide A-share spot table (ak.stock_zh_a_spot_em).
+
+Every consumer that needs the full market table (screeners, sentiment,
+detail/compare endpoints, holdings quote loops) reads from the shared
+``market_snapshot`` instance instead of downloading 5,000+ rows itself.
+
+- Single-flight refresh: concurrent callers wait for the one in-flight fetch.
+- The raw table goes through shared_frame (Redis / disk frame store), so
+  other workers and a restarted server reuse a fresh download.
+- Staleness budget comes from the session-aware TTL policy (short while
+  trading, valid until the next session while the market is shut).
+- Columnar view (DataFrame) and by-code view share one fetch. The by-code
+  view is a SpotSnapshot (NumPy column arrays + code -> row index) rather
+  than a dict of 5,000+ per-row dicts.
+"""
+import threading
+import time
+from collections.abc import Mapping
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+import akshare as ak
+import numpy as np
+import pandas as pd
+
+from src.cache.frame_store import shared_frame
+from src.cache.ttl_policy import ttl_policy, A_SHARE_SPOT
+from src.data_sources.rate_limit import limited
+
+SPOT_FRAME = 'stock_zh_a_spot_em'
+
+
+def _to_native(value: Any) -> Any:
+    """Unbox NumPy scalars so row values behave like the old to_dict() output."""
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+class SpotRow(Mapping):
+    """Read-only view of one snapshot row; supports row.get('最新价') like a dict."""
+
+    __slots__ = ('_snapshot', '_idx')
+
+    def __init__(self, snapshot: 'SpotSnapshot', idx: int):
+        self._snapshot = snapshot
+        self._idx = idx
+
+    def __getitem__(self, key: str) -> Any:
+        return _to_native(self._snapshot._columns[key][self._idx])
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._snapshot._columns)
+
+    def __len__(self) -> int:
+        return len(self._snapshot._columns)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {k: self[k] for k in self._snapshot._columns}
+
+    def __repr__(self) -> str:
+        return f"SpotRow({self.to_dict()!r})"
+
+
+class SpotSnapshot(Mapping):
+    """
+    Columnar by-code view of the spot table: {code -> SpotRow}.
+
+    Column arrays are taken from the source DataFrame without copying rows, so
+    building it costs one code -> row-index dict instead of per-row dicts.
+    """
+
+    def __init__(self, frame: pd.DataFrame, code_col: str = '代码'):
+        self.codes: np.ndarray = frame[code_col].astype(str).to_numpy()
+        self._columns: Dict[str, np.ndarray] = {
+            col: frame[col].to_numpy() for col in frame.columns if col != code_col
+        }
+        self._index: Dict[str, int] = dict(zip(self.codes.tolist(), range(len(self.codes))))
+
+    def __getitem__(self, code: str) -> SpotRow:
+        return SpotRow(self, self._index[code])
+
+    def __contains__(self, code: object) -> bool:
+        return code in self._index
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._index)
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    @property
+    def columns(self) -> List[str]:
+        return list(self._columns)
+
+    def column(self, name: str) -> np.ndarray:
+        """Whole column as a NumPy array (row order matches self.codes)."""
+        return self._columns[name]
+
+    def row_indices(self, codes: List[str]) -> np.ndarray:
+        """Row positions for the given codes; -1 where a code is missing."""
+        return np.fromiter((self._index.get(c, -1) for c in codes), dtype=np.int64, count=len(codes))
+
+
+class MarketSnapshotService:
+    """Shared, lazily refreshed A-share spot snapshot."""
+
+    def __init__(self, fetcher: Callable[[], pd.DataFrame] = None):
+        self._fetcher = fetcher or limited('akshare')(ak.stock_zh_a_spot_em)
+        self._state_lock = threading.Lock()
+        self._refresh_lock = threading.Lock()  # single-flight guard
+        self._frame: Optional[pd.DataFrame] = None
+        self._by_code: Optional[SpotSnapshot] = None
+        self._fetched_at: float = 0.0
+        self._fetch_count = 0
+        self._fetch_errors = 0
+
+    # =========================================================================
+    # Freshness
+    # =========================================================================
+
+    def staleness_budget(self, now: Optional[datetime] = None) -> float:
+        """Seconds a snapshot fetched now would stay fresh (TTL policy, A-share spot)."""
+        return float(ttl_policy.ttl(A_SHARE_SPOT, now.timestamp() if now else None))
+
+    def age(self) -> Optional[float]:
+        """Seconds since the last successful fetch, or None if never fetched."""
+        if self._frame is None:
+            return None
+        return time.time() - self._fetched_at
+
+    def is_fresh(self, max_age: Optional[float] = None) -> bool:
+        """Within max_age if given, otherwise within the TTL policy for when it was fetched."""
+        age = self.age()
+        if age is None:
+            return False
+        if max_age is None:
+            return ttl_policy.is_fresh(A_SHARE_SPOT, self._fetched_at)
+        return age < max(max_age, 1)
+
+    # =========================================================================
+    # Refresh
+    # =========================================================================
+
+    def refresh(self, max_age: Optional[float] = None, force: bool = False) -> bool:
+        """
+        Make sure the snapshot is within budget, fetching at most once across threads.
+
+        Returns True if a usable (possibly stale) snapshot is available.
+        """
+        if not force and self.is_fresh(max_age):
+            return True
+
+        requested_at = time.time()
+        with self._refresh_lock:
+            # Another thread may have refreshed while we waited for the lock
+            if self._fetched_at >= requested_at or (not force and self.is_fresh(max_age)):
+                return True
+
+            try:
+                df = shared_frame(SPOT_FRAME, self._fetcher, A_SHARE_SPOT, max_age=max_age, refresh=force)
+                if df is None or df.empty or '代码' not in df.columns:
+                    print("Market snapshot fetch returned no data, keeping previous snapshot")
+                    return self._frame is not None
+
+                df = df.reset_index(drop=True)
+                df['代码'] = df['代码'].astype(str).str.zfill(6)
+                by_code = SpotSnapshot(df)
+                with self._state_lock:
+                    self._frame = df
+                    self._by_code = by_code
+                    self._fetched_at = df.attrs.get('fetched_at', time.time())
+                    self._fetch_count += 1
+                return True
+            except Exception as e:
+                self._fetch_errors += 1
+                print(f"Error refreshing market snapshot: {e}")
+                return self._frame is not None
+
+    # =========================================================================
+    # Views
+    # =========================================================================
+
+    def get_frame(self, max_age: Optional[float] = None, force_refresh: bool = False) -> pd.DataFrame:
+        """
+        Columnar view of the full market. Shared across callers: treat as read-only
+        (copy before adding columns or sorting in place).
+        """
+        self.refresh(max_age=max_age, force=force_refresh)
+        frame = self._frame
+        return frame if frame is not None else pd.DataFrame()
+
+    def get_by_code(self, max_age: Optional[float] = None, force_refresh: bool = False) -> Optional[SpotSnapshot]:
+        """By-code view {code -> SpotRow}, or None if no snapshot is available."""
+        self.refresh(max_age=max_age, force=force_refresh)
+        return self.peek_by_code()
+
+    def peek_by_code(self) -> Optional[SpotSnapshot]:
+        """By-code view of whatever is cached, without triggering a fetch."""
+        with self._state_lock:
+            return self._by_code
+
+    def get_row(self, code: str, max_age: Optional[float] = None) -> Optional[SpotRow]:
+        by_code = self.get_by_code(max_age=max_age)
+        return by_code.get(code) if by_code else None
+
+    def peek_row(self, code: str) -> Optional[SpotRow]:
+        by_code = self.peek_by_code()
+        return by_code.get(code) if by_code else None
+
+    def get_rows(self, codes: List[str], max_age: Optional[float] = None) -> pd.DataFrame:
+        """Subset of the columnar view for the given codes."""
+        df = self.get_frame(max_age=max_age)
+        if df.empty:
+            return df
+        code_set = set(str(c).zfill(6) for c in codes)
+        return df[df['代码'].isin(code_set)]
+
+    def get_stats(self) -> Dict:
+        age = self.age()
+        return {
+            'rows': 0 if self._frame is None else len(self._frame),
+            'age_seconds': round(age, 1) if age is not None else None,
+            'staleness_budget': self.staleness_budget(),
+            'fetch_count': self._fetch_count,
+            'fetch_errors': self._fetch_errors,
+        }
+
+
+# Global singleton instance
+market_snapshot = MarketSnapshotService()
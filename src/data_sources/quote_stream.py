@@ -0,0 +1,182 @@
+"""
+Quote Stream - one server-side refresher pushing quote changes to subscribers.
+
+Browser tabs subscribe to a set of stock codes and/or the market indices. A
+single refresher task loads the union of all subscriptions (bulk quotes from
+the shared spot snapshot, indices from the cached indices loader), diffs it
+against the previous tick and pushes only changed fields to each subscriber.
+Upstream load depends on the set of subscribed codes, not on the number of
+open tabs.
+
+Messages to subscribers:
+- {"type": "snapshot", "quotes": {code: record}, "indices": {name: record}}
+  on (re)subscribe, with full records.
+- {"type": "update", "quotes": {code: changed fields}, "indices": {...}, "ts": ...}
+  after a tick that changed anything the subscriber follows.
+"""
+import asyncio
+import itertools
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
+
+from config.settings import QUOTE_STREAM_INTERVAL, QUOTE_STREAM_IDLE_INTERVAL
+from src.data_sources.trading_calendar import trading_calendar
+
+Record = Dict[str, Any]
+
+
+def diff_records(previous: Dict[str, Record], current: Dict[str, Record]) -> Dict[str, Record]:
+    """{key: changed fields} between two ticks; new keys carry the full record."""
+    changes: Dict[str, Record] = {}
+    for key, record in current.items():
+        before = previous.get(key)
+        if before is None:
+            changes[key] = dict(record)
+            continue
+        changed = {field: value for field, value in record.items() if before.get(field) != value}
+        if changed:
+            changes[key] = changed
+    return changes
+
+
+class _Subscriber:
+    __slots__ = ('codes', 'indices', 'queue')
+
+    def __init__(self):
+        self.codes: Set[str] = set()
+        self.indices = False
+        self.queue: asyncio.Queue = asyncio.Queue()
+
+
+class QuoteHub:
+    """Subscription registry plus the single refresher task (runs on the server's event loop)."""
+
+    def __init__(self, quote_loader: Callable[[List[str]], Dict[str, Record]],
+                 indices_loader: Callable[[], List[Record]]):
+        self._quote_loader = quote_loader
+        self._indices_loader = indices_loader
+        self._ids = itertools.count(1)
+        self._subscribers: Dict[int, _Subscriber] = {}
+        self._quotes: Dict[str, Record] = {}
+        self._indices: Dict[str, Record] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._ticks = 0
+        self._last_tick: Optional[float] = None
+
+    # =========================================================================
+    # Subscriptions
+    # =========================================================================
+
+    def connect(self) -> int:
+        sub_id = next(self._ids)
+        self._subscribers[sub_id] = _Subscriber()
+        return sub_id
+
+    def disconnect(self, sub_id: int) -> None:
+        self._subscribers.pop(sub_id, None)
+
+    def queue(self, sub_id: int) -> asyncio.Queue:
+        return self._subscribers[sub_id].queue
+
+    def subscribe(self, sub_id: int, codes: Iterable[str] = (), indices: Optional[bool] = None) -> None:
+        """Add codes (and optionally toggle indices); sends the known state at once, fetches the rest next tick."""
+        sub = self._subscribers[sub_id]
+        new_codes = {str(c).strip().zfill(6) for c in codes if str(c).strip()}
+        sub.codes |= new_codes
+        if indices is not None:
+            sub.indices = bool(indices)
+
+        sub.queue.put_nowait({
+            "type": "snapshot",
+            "quotes": {c: self._quotes[c] for c in sub.codes if c in self._quotes},
+            "indices": dict(self._indices) if sub.indices else {},
+        })
+        if any(c not in self._quotes for c in new_codes) or (sub.indices and not self._indices):
+            self._wake()
+        self._ensure_running()
+
+    def unsubscribe(self, sub_id: int, codes: Iterable[str] = (), indices: Optional[bool] = None) -> None:
+        sub = self._subscribers[sub_id]
+        sub.codes -= {str(c).strip().zfill(6) for c in codes}
+        if indices:
+            sub.indices = False
+
+    def _wanted(self):
+        codes: Set[str] = set()
+        indices = False
+        for sub in self._subscribers.values():
+            codes |= sub.codes
+            indices = indices or sub.indices
+        return sorted(codes), indices
+
+    # =========================================================================
+    # Refresher
+    # =========================================================================
+
+    def _wake(self) -> None:
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def _ensure_running(self) -> None:
+        if self._task is None or self._task.done():
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    @staticmethod
+    def interval() -> float:
+        return float(QUOTE_STREAM_INTERVAL if trading_calendar.is_trading_session() else QUOTE_STREAM_IDLE_INTERVAL)
+
+    async def _run(self) -> None:
+        while self._subscribers:
+            try:
+                await self.tick()
+            except Exception as e:
+                print(f"Quote stream refresh failed: {e}")
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.interval())
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+        self._task = None
+
+    async def tick(self) -> None:
+        """Load the union of all subscriptions once and push the differences."""
+        codes, want_indices = self._wanted()
+        if not codes and not want_indices:
+            return
+
+        quotes = await asyncio.to_thread(self._quote_loader, codes) if codes else {}
+        indices = {}
+        if want_indices:
+            rows = await asyncio.to_thread(self._indices_loader) or []
+            indices = {r.get('name') or r.get('code'): r for r in rows if isinstance(r, dict)}
+
+        quote_changes = diff_records(self._quotes, quotes)
+        index_changes = diff_records(self._indices, indices) if want_indices else {}
+        # Keep records of codes nobody follows any more out of the next diff
+        self._quotes = {c: quotes.get(c, self._quotes.get(c)) for c in codes if c in quotes or c in self._quotes}
+        if want_indices and indices:
+            self._indices = indices
+        self._ticks += 1
+        self._last_tick = time.time()
+
+        if not quote_changes and not index_changes:
+            return
+        for sub in list(self._subscribers.values()):
+            mine = {c: quote_changes[c] for c in sub.codes if c in quote_changes}
+            mine_idx = index_changes if sub.indices else {}
+            if mine or mine_idx:
+                sub.queue.put_nowait({"type": "update", "quotes": mine, "indices": mine_idx, "ts": self._last_tick})
+
+    def get_stats(self) -> Dict:
+        codes, indices = self._wanted()
+        return {
+            'subscribers': len(self._subscribers),
+            'codes': len(codes),
+            'indices': indices,
+            'ticks': self._ticks,
+            'last_tick': self._last_tick,
+            'interval': self.interval(),
+            'running': self._task is not None and not self._task.done(),
+        }
@@ -0,0 +1,125 @@
+"""
+Upstream Limits - process-wide concurrency caps per upstream service.
+
+Scheduled reports, user-triggered reports and the recommendation engine all
+hit the same few upstreams (AkShare/eastmoney, Tavily, the LLM provider).
+Callers wrap each upstream call in ``upstream_slot(name)`` (or decorate the
+function making it with ``@limited(name)``); at most ``limit`` holders per
+name run at once, the rest wait. Hold a slot only around the request itself,
+not around work that waits on other slots or caches. Names like
+``llm:gemini`` fall back to the limit of their prefix (``llm``).
+
+Waiting time and in-flight counts are tracked for observability.
+"""
+import functools
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, Optional
+
+from config.settings import AKSHARE_MAX_CONCURRENCY, TAVILY_MAX_CONCURRENCY, LLM_MAX_CONCURRENCY
+
+
+class UpstreamLimiter:
+    """Named bounded semaphores with wait/in-flight statistics."""
+
+    def __init__(self, limits: Dict[str, int]):
+        self._limits = dict(limits)
+        self._lock = threading.Lock()
+        self._semaphores: Dict[str, Optional[threading.BoundedSemaphore]] = {}
+        self._stats: Dict[str, Dict] = {}
+
+    def limit_for(self, name: str) -> Optional[int]:
+        """Configured limit for name (or its 'prefix:' family); None = unlimited."""
+        limit = self._limits.get(name, self._limits.get(name.split(':', 1)[0]))
+        return max(1, int(limit)) if limit else None
+
+    def _entry(self, name: str):
+        with self._lock:
+            if name not in self._semaphores:
+                limit = self.limit_for(name)
+                self._semaphores[name] = threading.BoundedSemaphore(limit) if limit else None
+                self._stats[name] = {
+                    'limit': limit, 'in_flight': 0, 'waiting': 0, 'calls': 0,
+                    'wait_total': 0.0, 'wait_max': 0.0, 'cancelled': 0,
+                }
+            return self._semaphores[name], self._stats[name]
+
+    @contextmanager
+    def slot(self, name: str, cancel: Optional[threading.Event] = None, poll: float = 0.5) -> Iterator[bool]:
+        """
+        Hold one slot of ``name`` for the duration of the block.
+
+        Yields True once the slot is held. If ``cancel`` is set while waiting,
+        yields False without a slot; the caller should skip the upstream call.
+        """
+        semaphore, stats = self._entry(name)
+        start = time.time()
+        with self._lock:
+            stats['waiting'] += 1
+
+        acquired = True
+        if semaphore is not None:
+            while not semaphore.acquire(timeout=poll):
+                if cancel is not None and cancel.is_set():
+                    acquired = False
+                    break
+
+        waited = time.time() - start
+        with self._lock:
+            stats['waiting'] -= 1
+            if acquired:
+                stats['in_flight'] += 1
+                stats['calls'] += 1
+                stats['wait_total'] += waited
+                stats['wait_max'] = max(stats['wait_max'], waited)
+            else:
+                stats['cancelled'] += 1
+
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                with self._lock:
+                    stats['in_flight'] -= 1
+                if semaphore is not None:
+                    semaphore.release()
+
+    def get_stats(self) -> Dict[str, Dict]:
+        with self._lock:
+            out = {}
+            for name, s in self._stats.items():
+                out[name] = {
+                    'limit': s['limit'],
+                    'in_flight': s['in_flight'],
+                    'waiting': s['waiting'],
+                    'calls': s['calls'],
+                    'cancelled': s['cancelled'],
+                    'avg_wait': round(s['wait_total'] / s['calls'], 3) if s['calls'] else 0.0,
+                    'max_wait': round(s['wait_max'], 3),
+                }
+            return out
+
+
+# Global singleton instance
+upstream_limiter = UpstreamLimiter({
+    'akshare': AKSHARE_MAX_CONCURRENCY,
+    'tavily': TAVILY_MAX_CONCURRENCY,
+    'llm': LLM_MAX_CONCURRENCY,
+})
+
+
+def upstream_slot(name: str, cancel: Optional[threading.Event] = None):
+    """Shorthand for ``upstream_limiter.slot(name, cancel)``."""
+    return upstream_limiter.slot(name, cancel)
+
+
+def limited(name: str) -> Callable[[Callable], Callable]:
+    """Decorator: each call of the function holds one slot of ``name``."""
+    def decorator(fn: Callable) -> Callable:
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with upstream_slot(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,197 @@
+"""
+Sector Index - persisted stock -> industry board membership.
+
+Crawling every board's constituents takes one HTTP call per board (~90
+industry boards, several hundred concept boards), so the result is stored in SQLite (``stock_sectors``) and reused:
+
+- Loaded lazily from the database on first use.
+- Refreshed at most once per trading day. A stale index is served immediately
+  while a background refresh runs; only an empty index blocks on a crawl.
+- Queryable by code (primary sector / all sectors) and by sector (codes).
+"""
+import threading
+import time
+from datetime import date
+from typing import Callable, Dict, List, Optional, Tuple
+
+from src.data_sources.board_crawler import BoardCrawler, to_membership_rows
+from src.data_sources.trading_calendar import trading_calendar
+from src.storage.db import get_stock_sector_rows, get_stock_sector_refreshed_date, replace_stock_sectors
+
+# (code, sector, rank) - rank is the board's position in the board list
+MembershipRow = Tuple[str, str, int]
+# A crawler returns (rows, complete); incomplete crawls never replace a full index
+Crawler = Callable[[], Tuple[List[MembershipRow], bool]]
+
+
+def crawl_membership(board_type: str = 'industry') -> Tuple[List[MembershipRow], bool]:
+    """Crawl constituents of every board of a type with the parallel BoardCrawler."""
+    try:
+        result = BoardCrawler().crawl(board_type)
+    except Exception as e:
+        print(f"  ! 获取{board_type}板块成分失败: {e}")
+        return [], False
+
+    if result['failed']:
+        print(f"  ! {len(result['failed'])} 个板块抓取失败，下次刷新时从断点续抓")
+    print(f"  ✓ 板块成分: {len(result['members'])}/{len(result['boards'])} 个板块, 用时 {result['elapsed']}s")
+    return to_membership_rows(result), not result['failed'] and bool(result['boards'])
+
+
+class SectorIndex:
+    """Lazily loaded, daily refreshed stock <-> sector membership index."""
+
+    # After a failed crawl, don't try again for this many seconds
+    retry_interval = 600
+
+    def __init__(self, board_type: str = 'industry', crawler: Crawler = None):
+        self.board_type = board_type
+        self._crawler = crawler or (lambda: crawl_membership(board_type))
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()  # single-flight crawl
+        self._refresh_thread: Optional[threading.Thread] = None
+        self._loaded = False
+        self._primary: Dict[str, str] = {}
+        self._sectors_by_code: Dict[str, List[str]] = {}
+        self._codes_by_sector: Dict[str, List[str]] = {}
+        self._refreshed_date: Optional[str] = None
+        self._last_attempt: float = 0.0
+
+    # =========================================================================
+    # Loading / refresh
+    # =========================================================================
+
+    def _install(self, rows: List[MembershipRow], refreshed_date: Optional[str]) -> None:
+        primary: Dict[str, str] = {}
+        sectors_by_code: Dict[str, List[str]] = {}
+        codes_by_sector: Dict[str, List[str]] = {}
+        for code, sector, _ in sorted(rows, key=lambda r: r[2]):
+            primary.setdefault(code, sector)  # first board wins, as in the old crawl
+            sectors_by_code.setdefault(code, []).append(sector)
+            codes_by_sector.setdefault(sector, []).append(code)
+
+        with self._lock:
+            self._primary = primary
+            self._sectors_by_code = sectors_by_code
+            self._codes_by_sector = codes_by_sector
+            self._refreshed_date = refreshed_date
+            self._loaded = True
+
+    def _ensure_loaded(self) -> None:
+        if self._loaded:
+            return
+        with self._refresh_lock:
+            if self._loaded:
+                return
+            try:
+                rows = [(r['code'], r['sector'], r['rank']) for r in get_stock_sector_rows(self.board_type)]
+                refreshed_date = get_stock_sector_refreshed_date(self.board_type)
+            except Exception as e:
+                print(f"  ! 读取行业索引失败: {e}")
+                rows, refreshed_date = [], None
+            self._install(rows, refreshed_date)
+
+    def is_stale(self, today: Optional[date] = None) -> bool:
+        """Empty/partial, or not yet refreshed on this trading day (non-trading days keep the last index)."""
+        if not self._primary or self._refreshed_date is None:
+            return True
+        today = today or date.today()
+        if not trading_calendar.is_trading_day(today):
+            return False
+        return self._refreshed_date != today.isoformat()
+
+    def refresh(self, force: bool = False) -> bool:
+        """Crawl and persist the membership now. Concurrent callers share one crawl."""
+        with self._refresh_lock:
+            if not force and not self.is_stale():
+                return True
+            if not force and time.time() - self._last_attempt < self.retry_interval:
+                return bool(self._primary)
+
+            self._last_attempt = time.time()
+            rows, complete = self._crawler()
+            if not rows:
+                print("  ! 行业成分抓取为空，保留现有索引")
+                return bool(self._primary)
+            if not complete:
+                if self._primary:
+                    print("  ! 行业成分抓取不完整，保留现有索引")
+                    return True
+                # Nothing to serve yet: use the partial map in memory, stay stale
+                self._install(rows, None)
+                return True
+
+            refreshed_date = date.today().isoformat()
+            try:
+                replace_stock_sectors(rows, self.board_type, refreshed_date)
+            except Exception as e:
+                print(f"  ! 保存行业索引失败: {e}")
+            self._install(rows, refreshed_date)
+            return True
+
+    def refresh_async(self) -> None:
+        """Refresh in a daemon thread unless one is already running."""
+        with self._lock:
+            if self._refresh_thread and self._refresh_thread.is_alive():
+                return
+            self._refresh_thread = threading.Thread(target=self.refresh, daemon=True, name=f"sector-index-{self.board_type}")
+            self._refresh_thread.start()
+
+    def ensure_fresh(self) -> None:
+        self._ensure_loaded()
+        if not self.is_stale():
+            return
+        if self._primary:
+            self.refresh_async()  # serve the previous day's index meanwhile
+        else:
+            self.refresh()
+
+    # =========================================================================
+    # Queries
+    # =========================================================================
+
+    def get_sector_map(self) -> Dict[str, str]:
+        """{code -> primary sector}. Shared: treat as read-only."""
+        self.ensure_fresh()
+        return self._primary
+
+    def get_sector(self, code: str) -> str:
+        self.ensure_fresh()
+        return self._primary.get(str(code).zfill(6), '')
+
+    def get_sectors(self, code: str) -> List[str]:
+        """All boards the stock belongs to, primary first."""
+        self.ensure_fresh()
+        return list(self._sectors_by_code.get(str(code).zfill(6), []))
+
+    def get_codes(self, sector: str, fuzzy: bool = False) -> List[str]:
+        """Constituent codes of a sector; fuzzy matches sector names by substring."""
+        self.ensure_fresh()
+        if not fuzzy:
+            return list(self._codes_by_sector.get(sector, []))
+        codes: List[str] = []
+        seen = set()
+        for name, members in self._codes_by_sector.items():
+            if sector in name:
+                for code in members:
+                    if code not in seen:
+                        seen.add(code)
+                        codes.append(code)
+        return codes
+
+    def get_sector_names(self) -> List[str]:
+        self.ensure_fresh()
+        return list(self._codes_by_sector)
+
+    def get_stats(self) -> Dict:
+        return {
+            'board_type': self.board_type,
+            'stocks': len(self._primary),
+            'sectors': len(self._codes_by_sector),
+            'refreshed_date': self._refreshed_date,
+            'refreshing': bool(self._refresh_thread and self._refresh_thread.is_alive()),
+        }
+
+
+# Global singleton instance
+sector_index = SectorIndex()
@@ -0,0 +1,137 @@
+"""
+Trading Calendar - A-share trading days and intraday session phases.
+
+Side-effect free (no scheduler, no network at import) so caches and data
+sources can ask "is the market trading right now?" without importing the
+scheduler. The trading-day list comes from akshare and is refreshed daily;
+weekdays are assumed to be trading days if it cannot be fetched.
+
+Session phases of a trading day (Asia/Shanghai wall clock):
+- pre_open    before 09:15
+- auction     09:15-09:30 opening call auction, 14:57-15:00 closing auction
+- continuous  09:30-11:30, 13:00-14:57
+- lunch       11:30-13:00
+- closed      from 15:00
+- holiday     the whole day, on non-trading days
+"""
+import logging
+import threading
+import time
+from datetime import date, datetime, time as dtime, timedelta
+from typing import Optional, Set
+
+logger = logging.getLogger(__name__)
+
+PRE_OPEN = 'pre_open'
+AUCTION = 'auction'
+CONTINUOUS = 'continuous'
+LUNCH = 'lunch'
+CLOSED = 'closed'
+HOLIDAY = 'holiday'
+
+SESSION_PHASES = (PRE_OPEN, AUCTION, CONTINUOUS, LUNCH, CLOSED, HOLIDAY)
+TRADING_PHASES = (AUCTION, CONTINUOUS)
+
+# (start, end, phase) for a trading day; times outside these ranges are covered below
+_INTRADAY = (
+    (dtime(9, 15), dtime(9, 30), AUCTION),
+    (dtime(9, 30), dtime(11, 30), CONTINUOUS),
+    (dtime(11, 30), dtime(13, 0), LUNCH),
+    (dtime(13, 0), dtime(14, 57), CONTINUOUS),
+    (dtime(14, 57), dtime(15, 0), AUCTION),
+)
+# Times at which a trading phase begins after a non-trading one
+_SESSION_STARTS = (dtime(9, 15), dtime(13, 0))
+# After a failed calendar fetch, wait this long before trying again (caches ask on every lookup)
+_REFRESH_RETRY_SECONDS = 600
+
+
+class TradingCalendar:
+    """Trading calendar utility using akshare data"""
+    _instance = None
+    _trading_dates: Set[str] = set()
+    _last_refresh: Optional[date] = None
+    _retry_after: float = 0.0
+    _refresh_lock = threading.Lock()
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(TradingCalendar, cls).__new__(cls)
+        return cls._instance
+
+    def refresh_calendar(self) -> bool:
+        """Refresh trading calendar from akshare, cache for the day"""
+        today = date.today()
+        if self._last_refresh == today and self._trading_dates:
+            return True
+
+        try:
+            import akshare as ak
+            df = ak.tool_trade_date_hist_sina()
+            # Column is 'trade_date' with format like '2024-01-02'
+            self._trading_dates = set(df['trade_date'].astype(str).tolist())
+            self._last_refresh = today
+            logger.info(f"Trading calendar refreshed, {len(self._trading_dates)} trading dates loaded")
+            return True
+        except Exception as e:
+            logger.error(f"Failed to refresh trading calendar: {e}")
+            return False
+
+    def is_trading_day(self, check_date: Optional[date] = None) -> bool:
+        """Check if a given date is a trading day"""
+        if check_date is None:
+            check_date = date.today()
+
+        # Refresh calendar if needed (one thread fetches, failures are retried after a pause)
+        if not self._trading_dates or self._last_refresh != date.today():
+            if time.time() >= self._retry_after:
+                with self._refresh_lock:
+                    if (not self._trading_dates or self._last_refresh != date.today()) \
+                            and time.time() >= self._retry_after:
+                        if not self.refresh_calendar():
+                            self._retry_after = time.time() + _REFRESH_RETRY_SECONDS
+                            logger.warning("Using fallback: treating weekdays as trading days")
+            if not self._trading_dates:
+                # Fallback: assume weekdays are trading days if API fails
+                return check_date.weekday() < 5
+
+        date_str = check_date.strftime('%Y-%m-%d')
+        return date_str in self._trading_dates
+
+    # =========================================================================
+    # Session phases
+    # =========================================================================
+
+    def session_phase(self, now: Optional[datetime] = None) -> str:
+        """Phase of the A-share session at now (see module docstring)."""
+        now = now or datetime.now()
+        if not self.is_trading_day(now.date()):
+            return HOLIDAY
+        t = now.time()
+        if t < dtime(9, 15):
+            return PRE_OPEN
+        for start, end, phase in _INTRADAY:
+            if start <= t < end:
+                return phase
+        return CLOSED
+
+    def is_trading_session(self, now: Optional[datetime] = None) -> bool:
+        """Auction or continuous trading right now."""
+        return self.session_phase(now) in TRADING_PHASES
+
+    def next_session_start(self, now: Optional[datetime] = None, max_days: int = 30) -> datetime:
+        """Start of the next auction/continuous phase strictly after now."""
+        now = now or datetime.now()
+        day = now.date()
+        for _ in range(max_days):
+            if self.is_trading_day(day):
+                for start in _SESSION_STARTS:
+                    candidate = datetime.combine(day, start)
+                    if candidate > now:
+                        return candidate
+            day += timedelta(days=1)
+        return now + timedelta(days=1)
+
+
+# Global trading calendar instance
+trading_calendar = TradingCalendar()
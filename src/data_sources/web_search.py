@@ -4,6 +4,7 @@ import sys
 import threading
 from typing import List, Dict, Optional
 from datetime import datetime
+from src.data_sources.rate_limit import upstream_slot
 
 # Add project root to sys.path to import config
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
@@ -107,7 +108,8 @@ class WebSearch:
             
             try:
                 # 2. Execute search (Release lock during IO)
-                response = search_func(client)
+                with upstream_slot('tavily'):
+                    response = search_func(client)
                 
                 # 3. Success: Rotate client (Load Balancing)
                 with self._lock:
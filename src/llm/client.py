@@ -1,8 +1,12 @@
 from abc import ABC, abstractmethod
+import asyncio
+import hashlib
 import os
 import sys
+import threading
+from typing import Dict, Iterator, Optional, Tuple
 from google import genai
-from openai import OpenAI
+from openai import OpenAI, AsyncOpenAI
 
 # Add project root to sys.path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
@@ -11,17 +15,36 @@ from config.settings import (
     LLM_PROVIDER,
     OPENAI_API_KEY, OPENAI_BASE_URL, OPENAI_MODEL
 )
+from src.llm.concurrency import async_provider_semaphore
 
 class BaseLLMClient(ABC):
+    # Concurrency caps (src/llm/concurrency.py) are keyed by this name
+    provider = "unknown"
+
     @abstractmethod
     def generate_content(self, prompt: str) -> str:
         pass
 
+    def generate_content_stream(self, prompt: str) -> Iterator[str]:
+        """Yield the completion in chunks as they arrive. Default: one chunk."""
+        yield self.generate_content(prompt)
+
+    async def agenerate_content(self, prompt: str) -> str:
+        """Async completion, bounded by the provider's in-flight cap (LLM_MAX_CONCURRENCY)."""
+        async with async_provider_semaphore(self.provider):
+            return await self._agenerate_content(prompt)
+
+    async def _agenerate_content(self, prompt: str) -> str:
+        """Default: run the blocking call in a worker thread. Providers override with native async."""
+        return await asyncio.to_thread(self.generate_content, prompt)
+
 class GoogleGeminiClient(BaseLLMClient):
-    def __init__(self):
-        api_key = os.getenv("GEMINI_API_KEY")
-        api_endpoint = os.getenv("GEMINI_API_ENDPOINT")
-        model = os.getenv("GEMINI_MODEL", "gemini-2.0-flash-exp")
+    provider = "gemini"
+
+    def __init__(self, api_key: str = None, model: str = None, api_endpoint: str = None):
+        api_key = api_key or os.getenv("GEMINI_API_KEY")
+        api_endpoint = api_endpoint or os.getenv("GEMINI_API_ENDPOINT")
+        model = model or os.getenv("GEMINI_MODEL", "gemini-2.0-flash-exp")
 
         if not api_key:
             raise ValueError("GEMINI_API_KEY is not set in environment variables.")
@@ -48,11 +71,42 @@ class GoogleGeminiClient(BaseLLMClient):
             print(f"Error generating content with Gemini: {e}")
             return f"Error: Could not generate analysis. Details: {str(e)}"
 
+    def generate_content_stream(self, prompt: str) -> Iterator[str]:
+        try:
+            produced = False
+            for chunk in self.client.models.generate_content_stream(
+                model=self.model_name,
+                contents=prompt
+            ):
+                if chunk.text:
+                    produced = True
+                    yield chunk.text
+            if not produced:
+                yield "Error: No text returned from model."
+        except Exception as e:
+            print(f"Error streaming content with Gemini: {e}")
+            yield f"Error: Could not generate analysis. Details: {str(e)}"
+
+    async def _agenerate_content(self, prompt: str) -> str:
+        try:
+            response = await self.client.aio.models.generate_content(
+                model=self.model_name,
+                contents=prompt
+            )
+            if response.text:
+                return response.text
+            return "Error: No text returned from model."
+        except Exception as e:
+            print(f"Error generating content with Gemini: {e}")
+            return f"Error: Could not generate analysis. Details: {str(e)}"
+
 class OpenAIClient(BaseLLMClient):
-    def __init__(self):
-        api_key = os.getenv("OPENAI_API_KEY")
-        base_url = os.getenv("OPENAI_BASE_URL")
-        model = os.getenv("OPENAI_MODEL", "gpt-4o")
+    provider = "openai"
+
+    def __init__(self, api_key: str = None, model: str = None, base_url: str = None):
+        api_key = api_key or os.getenv("OPENAI_API_KEY")
+        base_url = base_url or os.getenv("OPENAI_BASE_URL")
+        model = model or os.getenv("OPENAI_MODEL", "gpt-4o")
 
         if not api_key:
             raise ValueError("OPENAI_API_KEY is not set in environment variables.")
@@ -63,6 +117,15 @@ class OpenAIClient(BaseLLMClient):
             
         self.client = OpenAI(**client_kwargs)
         self.model_name = model
+        self._client_kwargs = client_kwargs
+        self._async_client: Optional[AsyncOpenAI] = None
+
+    @property
+    def async_client(self) -> AsyncOpenAI:
+        """Lazily created; its connection pool is reused by every agenerate_content call."""
+        if self._async_client is None:
+            self._async_client = AsyncOpenAI(**self._client_kwargs)
+        return self._async_client
 
     def generate_content(self, prompt: str) -> str:
         try:
@@ -78,15 +141,87 @@ class OpenAIClient(BaseLLMClient):
             print(f"Error generating content with OpenAI: {e}")
             return f"Error: Could not generate analysis. Details: {str(e)}"
 
+    def generate_content_stream(self, prompt: str) -> Iterator[str]:
+        try:
+            stream = self.client.chat.completions.create(
+                model=self.model_name,
+                messages=[
+                    {"role": "system", "content": "You are a professional financial analyst."},
+                    {"role": "user", "content": prompt}
+                ],
+                stream=True
+            )
+            for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        except Exception as e:
+            print(f"Error streaming content with OpenAI: {e}")
+            yield f"Error: Could not generate analysis. Details: {str(e)}"
+
+    async def _agenerate_content(self, prompt: str) -> str:
+        try:
+            response = await self.async_client.chat.completions.create(
+                model=self.model_name,
+                messages=[
+                    {"role": "system", "content": "You are a professional financial analyst."},
+                    {"role": "user", "content": prompt}
+                ]
+            )
+            return response.choices[0].message.content
+        except Exception as e:
+            print(f"Error generating content with OpenAI: {e}")
+            return f"Error: Could not generate analysis. Details: {str(e)}"
+
+# =============================================================================
+# Client registry
+# =============================================================================
+
+# (provider, model, endpoint, key fingerprint) -> client; clients hold HTTP connection pools
+_client_registry: Dict[Tuple[str, str, str, str], BaseLLMClient] = {}
+_registry_lock = threading.Lock()
+
+
+def _client_config(provider: str) -> Tuple[str, str, str]:
+    """(api_key, model, endpoint) for a provider, read from the environment at call time."""
+    if provider == "gemini":
+        return (os.getenv("GEMINI_API_KEY") or "",
+                os.getenv("GEMINI_MODEL", "gemini-2.0-flash-exp"),
+                os.getenv("GEMINI_API_ENDPOINT") or "")
+    return (os.getenv("OPENAI_API_KEY") or "",
+            os.getenv("OPENAI_MODEL", "gpt-4o"),
+            os.getenv("OPENAI_BASE_URL") or "")
+
+
 def get_llm_client() -> BaseLLMClient:
     """
-    Factory function to return the configured LLM client.
+    Return the configured LLM client.
+
+    Clients are created lazily and shared process-wide per (provider, model,
+    endpoint, API key), so every analyst and background task reuses one warm
+    connection pool. Changing settings at runtime simply selects a new entry.
     """
     provider = os.getenv("LLM_PROVIDER", "gemini").lower()
-    
-    if provider == "gemini":
-        return GoogleGeminiClient()
-    elif provider == "openai" or provider == "openai_compatible":
-        return OpenAIClient()
-    else:
+    if provider == "openai_compatible":
+        provider = "openai"
+    if provider not in ("gemini", "openai"):
         raise ValueError(f"Unsupported LLM_PROVIDER: {provider}")
+
+    api_key, model, endpoint = _client_config(provider)
+    key_fingerprint = hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:12]
+    registry_key = (provider, model, endpoint, key_fingerprint)
+
+    with _registry_lock:
+        client = _client_registry.get(registry_key)
+        if client is None:
+            if provider == "gemini":
+                client = GoogleGeminiClient(api_key=api_key, model=model, api_endpoint=endpoint)
+            else:
+                client = OpenAIClient(api_key=api_key, model=model, base_url=endpoint)
+            _client_registry[registry_key] = client
+        return client
+
+
+def clear_llm_clients() -> None:
+    """Drop cached clients (e.g. after API keys were changed in settings)."""
+    with _registry_lock:
+        _client_registry.clear()
@@ -0,0 +1,47 @@
+"""
+LLM Concurrency - process-wide caps on in-flight completions per provider.
+
+Threaded callers take an ``llm:<provider>`` slot from the shared upstream
+limiter (src/data_sources/rate_limit.py); async callers
+(BaseLLMClient.agenerate_content) get an asyncio.Semaphore per provider and
+event loop. Both use LLM_MAX_CONCURRENCY.
+
+Kept free of provider SDK imports so callers that only need the caps (e.g. the
+recommendation engine) don't pull in google-genai / openai.
+"""
+import asyncio
+import threading
+import weakref
+from typing import Dict, Optional
+
+from config.settings import LLM_MAX_CONCURRENCY
+from src.data_sources.rate_limit import upstream_slot
+
+_lock = threading.Lock()
+
+# asyncio primitives belong to one event loop: loop -> {provider -> semaphore}
+_async_semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, asyncio.Semaphore]]" = weakref.WeakKeyDictionary()
+
+
+def client_provider(client) -> str:
+    return getattr(client, 'provider', type(client).__name__)
+
+
+def llm_slot(provider: str, cancel: Optional[threading.Event] = None):
+    """
+    Context manager holding one in-flight slot for provider. Yields False
+    (without a slot) if cancel is set while waiting.
+    """
+    return upstream_slot(f"llm:{provider}", cancel)
+
+
+def async_provider_semaphore(provider: str) -> asyncio.Semaphore:
+    """Semaphore bounding in-flight async completions for one provider on the running loop."""
+    loop = asyncio.get_running_loop()
+    with _lock:
+        per_loop = _async_semaphores.get(loop)
+        if per_loop is None:
+            per_loop = _async_semaphores[loop] = {}
+        if provider not in per_loop:
+            per_loop[provider] = asyncio.Semaphore(max(1, LLM_MAX_CONCURRENCY))
+        return per_loop[provider]
@@ -0,0 +1,197 @@
+"""
+LLM Response Cache - content-addressed, persistent cache of completions.
+
+Several users following the same fund or stock on the same day produce
+byte-identical prompts. Responses are stored in SQLite (``llm_response_cache``)
+under sha256(provider, model, normalized prompt), so an identical prompt is
+answered without another paid LLM round-trip.
+
+- TTL per report type (LLM_CACHE_TTL), LRU eviction by entry count and size.
+- Error responses ("Error: ...") are never stored.
+- Storage failures degrade to a plain LLM call.
+- Only a miss takes one of the provider's concurrency slots (llm_slot), so
+  hits are never queued behind in-flight completions. A streamed miss gives
+  its slot back when the upstream stream ends, not when the consumer has
+  read the last chunk.
+"""
+import hashlib
+import queue
+import re
+import threading
+import time
+from typing import Dict, Iterator, Optional
+
+from config.settings import LLM_CACHE_ENABLED, LLM_CACHE_MAX_ENTRIES, LLM_CACHE_MAX_MB, LLM_CACHE_TTL
+from src.storage.db import (
+    get_llm_cached_response,
+    put_llm_cached_response,
+    prune_llm_response_cache,
+    get_llm_response_cache_summary,
+)
+from src.llm.concurrency import client_provider, llm_slot
+
+_TRAILING_SPACE = re.compile(r'[ \t]+\n')
+_BLANK_LINES = re.compile(r'\n{3,}')
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Whitespace-only differences (line endings, trailing spaces, blank runs) don't change the key."""
+    text = prompt.replace('\r\n', '\n').replace('\r', '\n')
+    text = _TRAILING_SPACE.sub('\n', text)
+    text = _BLANK_LINES.sub('\n\n', text)
+    return text.strip()
+
+
+def _is_error(response: str) -> bool:
+    return not response or response.startswith("Error:")
+
+
+class LLMResponseCache:
+    """Persistent prompt-hash -> response cache with hit/miss counters."""
+
+    def __init__(self, enabled: bool = LLM_CACHE_ENABLED, max_entries: int = LLM_CACHE_MAX_ENTRIES,
+                 max_mb: float = LLM_CACHE_MAX_MB, ttls: Dict[str, int] = None):
+        self.enabled = enabled
+        self.max_entries = max_entries
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.ttls = ttls or LLM_CACHE_TTL
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'stores': 0, 'evictions': 0, 'errors': 0}
+
+    def _count(self, key: str, n: int = 1) -> None:
+        with self._lock:
+            self._stats[key] += n
+
+    def cache_key(self, client, prompt: str) -> str:
+        provider = getattr(client, 'provider', type(client).__name__)
+        model = getattr(client, 'model_name', '')
+        payload = f"{provider}\x00{model}\x00{normalize_prompt(prompt)}"
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def ttl_for(self, report_type: str) -> int:
+        return self.ttls.get(report_type, self.ttls.get('default', 3600))
+
+    # =========================================================================
+    # Lookup / store
+    # =========================================================================
+
+    def lookup(self, key: str):
+        try:
+            response = get_llm_cached_response(key, time.time())
+        except Exception as e:
+            self._count('errors')
+            print(f"  ! LLM缓存读取失败: {e}")
+            return None
+        self._count('hits' if response is not None else 'misses')
+        return response
+
+    def store(self, key: str, client, report_type: str, response: str) -> None:
+        if _is_error(response):
+            return
+        now = time.time()
+        try:
+            put_llm_cached_response(
+                key, getattr(client, 'provider', type(client).__name__), getattr(client, 'model_name', ''),
+                report_type, response, self.ttl_for(report_type), now
+            )
+            self._count('stores')
+            self._count('evictions', prune_llm_response_cache(now, self.max_entries, self.max_bytes))
+        except Exception as e:
+            self._count('errors')
+            print(f"  ! LLM缓存写入失败: {e}")
+
+    # =========================================================================
+    # Generation
+    # =========================================================================
+
+    def _complete(self, client, prompt: str, cancel: Optional[threading.Event] = None) -> Optional[str]:
+        with llm_slot(client_provider(client), cancel) as acquired:
+            if not acquired or (cancel is not None and cancel.is_set()):
+                return None
+            return client.generate_content(prompt)
+
+    def generate(self, client, prompt: str, report_type: str = 'default',
+                 cancel: Optional[threading.Event] = None) -> Optional[str]:
+        """
+        client.generate_content(prompt), answered from the cache when possible.
+        Returns None if cancel is set before a miss gets a provider slot.
+        """
+        if not self.enabled:
+            return self._complete(client, prompt, cancel)
+
+        key = self.cache_key(client, prompt)
+        cached = self.lookup(key)
+        if cached is not None:
+            print(f"  ⚡ LLM缓存命中 ({report_type})")
+            return cached
+
+        response = self._complete(client, prompt, cancel)
+        if response is not None:
+            self.store(key, client, report_type, response)
+        return response
+
+    def _stream(self, client, prompt: str) -> Iterator[str]:
+        """
+        client.generate_content_stream(prompt), read under a provider slot by a
+        worker thread so a slow consumer (e.g. an SSE client) doesn't hold the slot.
+        """
+        chunks = queue.Queue()
+        end = object()
+
+        def pump():
+            try:
+                with llm_slot(client_provider(client)):
+                    for chunk in client.generate_content_stream(prompt):
+                        chunks.put(chunk)
+            except Exception as e:
+                chunks.put(e)
+            finally:
+                chunks.put(end)
+
+        threading.Thread(target=pump, name="llm-stream", daemon=True).start()
+        while True:
+            chunk = chunks.get()
+            if chunk is end:
+                return
+            if isinstance(chunk, Exception):
+                raise chunk
+            yield chunk
+
+    def generate_stream(self, client, prompt: str, report_type: str = 'default') -> Iterator[str]:
+        """Streaming variant: a hit is yielded as one chunk, a miss is stored once it completes."""
+        if not self.enabled:
+            yield from self._stream(client, prompt)
+            return
+
+        key = self.cache_key(client, prompt)
+        cached = self.lookup(key)
+        if cached is not None:
+            print(f"  ⚡ LLM缓存命中 ({report_type})")
+            yield cached
+            return
+
+        parts = []
+        failed = False
+        for chunk in self._stream(client, prompt):
+            failed = failed or chunk.startswith("Error:")
+            parts.append(chunk)
+            yield chunk
+        if not failed:
+            self.store(key, client, report_type, "".join(parts))
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self._stats)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = round(stats['hits'] / lookups, 3) if lookups else 0.0
+        stats['enabled'] = self.enabled
+        try:
+            stats['stored'] = get_llm_response_cache_summary()
+        except Exception as e:
+            stats['stored'] = {}
+            print(f"  ! LLM缓存统计失败: {e}")
+        return stats
+
+
+# Global singleton instance
+llm_response_cache = LLMResponseCache()
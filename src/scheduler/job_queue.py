@@ -0,0 +1,122 @@
+"""
+Analysis Job Queue - bounded worker pool with priorities for report jobs.
+
+Cron triggers only enqueue; a fixed number of worker threads
+(ANALYSIS_WORKERS) run the analyses. User-triggered work is queued ahead of
+cron work, and jobs of equal priority run in submission order.
+
+Queue depth, wait time and run time are tracked for observability.
+"""
+import itertools
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List
+
+from config.settings import ANALYSIS_WORKERS
+
+PRIORITY_USER = 0
+PRIORITY_CRON = 10
+
+_PRIORITY_LABELS = {PRIORITY_USER: 'user', PRIORITY_CRON: 'cron'}
+
+
+class AnalysisJobQueue:
+    """Priority queue drained by a fixed pool of daemon worker threads."""
+
+    def __init__(self, workers: int = ANALYSIS_WORKERS):
+        self.workers = max(1, workers)
+        self._queue: queue.PriorityQueue = queue.PriorityQueue()
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self._threads: List[threading.Thread] = []
+        self._running: Dict[int, Dict[str, Any]] = {}
+        self._recent: deque = deque(maxlen=50)
+        self._totals: Dict[str, Dict[str, float]] = {}
+
+    def _ensure_workers(self) -> None:
+        with self._lock:
+            while len(self._threads) < self.workers:
+                t = threading.Thread(target=self._worker, daemon=True,
+                                     name=f"analysis-worker-{len(self._threads)}")
+                self._threads.append(t)
+                t.start()
+
+    def submit(self, name: str, fn: Callable, *args, priority: int = PRIORITY_CRON, **kwargs) -> Future:
+        """Queue fn(*args, **kwargs); lower priority values run first."""
+        self._ensure_workers()
+        future: Future = Future()
+        seq = next(self._seq)
+        self._queue.put((priority, seq, {
+            'name': name, 'fn': fn, 'args': args, 'kwargs': kwargs,
+            'future': future, 'priority': priority, 'queued_at': time.time(),
+        }))
+        return future
+
+    def _worker(self) -> None:
+        while True:
+            _, seq, job = self._queue.get()
+            try:
+                future: Future = job['future']
+                if not future.set_running_or_notify_cancel():
+                    continue
+
+                started = time.time()
+                wait = started - job['queued_at']
+                with self._lock:
+                    self._running[seq] = {'name': job['name'], 'started': started}
+
+                ok = True
+                try:
+                    future.set_result(job['fn'](*job['args'], **job['kwargs']))
+                except BaseException as e:
+                    ok = False
+                    print(f"  ❌ 分析任务失败 {job['name']}: {e}")
+                    future.set_exception(e)
+                finally:
+                    self._record(seq, job, wait, time.time() - started, ok)
+            finally:
+                self._queue.task_done()
+
+    def _record(self, seq: int, job: Dict, wait: float, run: float, ok: bool) -> None:
+        label = _PRIORITY_LABELS.get(job['priority'], str(job['priority']))
+        with self._lock:
+            self._running.pop(seq, None)
+            t = self._totals.setdefault(label, {
+                'completed': 0, 'failed': 0, 'wait_total': 0.0, 'wait_max': 0.0, 'run_total': 0.0, 'run_max': 0.0,
+            })
+            t['completed' if ok else 'failed'] += 1
+            t['wait_total'] += wait
+            t['wait_max'] = max(t['wait_max'], wait)
+            t['run_total'] += run
+            t['run_max'] = max(t['run_max'], run)
+            self._recent.append({
+                'name': job['name'], 'priority': label, 'ok': ok,
+                'wait': round(wait, 2), 'run': round(run, 2),
+            })
+
+    def get_stats(self) -> Dict[str, Any]:
+        now = time.time()
+        with self._lock:
+            by_priority = {}
+            for label, t in self._totals.items():
+                n = t['completed'] + t['failed']
+                by_priority[label] = {
+                    'completed': t['completed'],
+                    'failed': t['failed'],
+                    'avg_wait': round(t['wait_total'] / n, 2) if n else 0.0,
+                    'max_wait': round(t['wait_max'], 2),
+                    'avg_run': round(t['run_total'] / n, 2) if n else 0.0,
+                    'max_run': round(t['run_max'], 2),
+                }
+            return {
+                'workers': self.workers,
+                'depth': self._queue.qsize(),
+                'running': [
+                    {'name': r['name'], 'seconds': round(now - r['started'], 1)} for r in self._running.values()
+                ],
+                'by_priority': by_priority,
+                'recent': list(self._recent),
+            }
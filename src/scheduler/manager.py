@@ -1,68 +1,27 @@
 import os
+import threading
+import time
+import zlib
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.cron import CronTrigger
 from apscheduler.triggers.interval import IntervalTrigger
 import logging
 import asyncio
 from datetime import datetime, date
-from typing import Dict, Optional, Set
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set, Tuple
 from src.storage.db import get_active_funds, get_fund_by_code, get_active_stocks, get_stock_by_code
 from src.analysis.pre_market import PreMarketAnalyst
 from src.analysis.post_market import PostMarketAnalyst
 from src.analysis.dashboard import DashboardService
+from src.analysis.strategies.market_context import MarketContext
 from src.report_gen import save_report, save_stock_report
+from src.data_sources.trading_calendar import TradingCalendar, trading_calendar  # re-exported
+from src.scheduler.job_queue import AnalysisJobQueue, PRIORITY_CRON
+from config.settings import SCHEDULER_JITTER_SECONDS, MARKET_CONTEXT_TTL
 
 logger = logging.getLogger(__name__)
 
 
-class TradingCalendar:
-    """Trading calendar utility using akshare data"""
-    _instance = None
-    _trading_dates: Set[str] = set()
-    _last_refresh: Optional[date] = None
-
-    def __new__(cls):
-        if cls._instance is None:
-            cls._instance = super(TradingCalendar, cls).__new__(cls)
-        return cls._instance
-
-    def refresh_calendar(self) -> bool:
-        """Refresh trading calendar from akshare, cache for the day"""
-        today = date.today()
-        if self._last_refresh == today and self._trading_dates:
-            return True
-
-        try:
-            import akshare as ak
-            df = ak.tool_trade_date_hist_sina()
-            # Column is 'trade_date' with format like '2024-01-02'
-            self._trading_dates = set(df['trade_date'].astype(str).tolist())
-            self._last_refresh = today
-            logger.info(f"Trading calendar refreshed, {len(self._trading_dates)} trading dates loaded")
-            return True
-        except Exception as e:
-            logger.error(f"Failed to refresh trading calendar: {e}")
-            return False
-
-    def is_trading_day(self, check_date: Optional[date] = None) -> bool:
-        """Check if a given date is a trading day"""
-        if check_date is None:
-            check_date = date.today()
-
-        # Refresh calendar if needed
-        if not self._trading_dates or self._last_refresh != date.today():
-            if not self.refresh_calendar():
-                # Fallback: assume weekdays are trading days if API fails
-                logger.warning("Using fallback: treating weekdays as trading days")
-                return check_date.weekday() < 5
-
-        date_str = check_date.strftime('%Y-%m-%d')
-        return date_str in self._trading_dates
-
-
-# Global trading calendar instance
-trading_calendar = TradingCalendar()
-
 class SchedulerManager:
     _instance = None
     
@@ -71,6 +30,9 @@ class SchedulerManager:
             cls._instance = super(SchedulerManager, cls).__new__(cls)
             cls._instance.scheduler = BackgroundScheduler()
             cls._instance.scheduler.start()
+            cls._instance.job_queue = AnalysisJobQueue()
+            cls._instance._market_contexts = {}
+            cls._instance._market_contexts_lock = threading.Lock()
         return cls._instance
 
     def start(self):
@@ -80,16 +42,18 @@ class SchedulerManager:
         self.add_dashboard_refresh_job()
         
     def refresh_all_jobs(self):
-        """Clear all and reload from DB (All users)"""
+        """Clear all and reload from DB (All users), one job per (asset, mode, time slot)"""
         self.scheduler.remove_all_jobs()
-        # Fetch ALL active funds from ALL users
-        funds = get_active_funds(user_id=None)
-        for fund in funds:
-            self.add_fund_jobs(fund)
-        # Fetch ALL active stocks from ALL users
-        stocks = get_active_stocks(user_id=None)
-        for stock in stocks:
-            self.add_stock_jobs(stock)
+        # Fetch ALL active funds / stocks from ALL users
+        for kind, items in (('fund', get_active_funds(user_id=None)), ('stock', get_active_stocks(user_id=None))):
+            by_code: Dict[str, List[Dict]] = {}
+            for item in items:
+                by_code.setdefault(item['code'], []).append(item)
+            jobs_before = len(self.scheduler.get_jobs())
+            for code, subscribers in by_code.items():
+                self.sync_asset_jobs(kind, code, subscribers)
+            print(f"Scheduled {kind} reports: {len(items)} subscriptions -> "
+                  f"{len(self.scheduler.get_jobs()) - jobs_before} coalesced jobs")
         # Re-add dashboard job since we removed all
         self.add_dashboard_refresh_job()
 
@@ -111,60 +75,190 @@ class SchedulerManager:
         try:
             # Report dir is not critical for global market data, just pass current dir
             service = DashboardService(os.getcwd())
-            service.get_full_dashboard(force_refresh=True)
+            # Sections still fresh under the TTL policy (e.g. all of them after the close) are not re-fetched
+            service.get_full_dashboard()
             print("Dashboard cache refreshed.")
         except Exception as e:
             print(f"Error refreshing dashboard cache: {e}")
 
-    def add_fund_jobs(self, fund: Dict):
-        """Add Pre/Post market jobs for a single fund"""
-        code = fund['code']
-        # Ensure we have user_id, fallback to None (Admin/Legacy)
-        user_id = fund.get('user_id') 
-        
-        # Pre-market
-        if fund.get('pre_market_time'):
-            try:
-                hour, minute = fund['pre_market_time'].split(':')
-                job_id = f"pre_{code}_{user_id}"
-                self.scheduler.add_job(
-                    self.run_analysis_task,
-                    trigger=CronTrigger(hour=hour, minute=minute),
-                    id=job_id,
-                    args=[code, 'pre', user_id],
-                    replace_existing=True
-                )
-                print(f"Scheduled PRE-market for {code} (User {user_id}) at {hour}:{minute}")
-            except Exception as e:
-                print(f"Error scheduling PRE task for {code}: {e}")
+    # =========================================================================
+    # Market context shared by the reports of one run
+    # =========================================================================
 
-        # Post-market
-        if fund.get('post_market_time'):
+    def _market_context(self, mode: str, run: str = 'manual') -> MarketContext:
+        """
+        Market-wide inputs shared by all reports of a mode and run (a scheduled
+        time slot, or 'manual' for user-triggered work) for MARKET_CONTEXT_TTL seconds.
+        """
+        now = time.time()
+        with self._market_contexts_lock:
+            for key, ctx in list(self._market_contexts.items()):
+                if now - ctx.created_at > MARKET_CONTEXT_TTL:
+                    del self._market_contexts[key]
+            ctx = self._market_contexts.get((mode, run))
+            if ctx is None:
+                ctx = self._market_contexts[(mode, run)] = MarketContext()
+            return ctx
+
+    def _analyst(self, mode: str, run: str = 'manual'):
+        analyst_cls = PreMarketAnalyst if mode == 'pre' else PostMarketAnalyst
+        return analyst_cls(self._market_context(mode, run))
+
+    # =========================================================================
+    # Coalesced report jobs
+    # =========================================================================
+    # Scheduled reports are registered per (asset kind, code, mode, time slot)
+    # rather than per subscription. When a job fires, the analysis runs once
+    # per distinct analysis profile and the report is saved for every
+    # subscriber, so cost scales with distinct assets, not with users.
+
+    @staticmethod
+    def _slot(value) -> Optional[str]:
+        """'8:30' / '08:30' -> '08:30'; None if unset or malformed."""
+        try:
+            hour, minute = str(value).strip().split(':')
+            return f"{int(hour):02d}:{int(minute):02d}"
+        except ValueError:
+            return None
+
+    @staticmethod
+    def _job_prefix(kind: str, mode: str, code: str) -> str:
+        return f"{'stock_' if kind == 'stock' else ''}{mode}_{code}_"
+
+    @staticmethod
+    def _subscribers(kind: str, code: str) -> List[Dict]:
+        """Active subscriptions of all users to one asset."""
+        if kind == 'stock':
+            return get_active_stocks(user_id=None, code=code)
+        return get_active_funds(user_id=None, code=code)
+
+    @staticmethod
+    def _analysis_profile(kind: str, item: Dict) -> tuple:
+        """Fields that feed the analysis; subscribers with equal profiles share one report."""
+        if kind == 'stock':
+            return (item.get('name'), item.get('sector') or '')
+        focus = item.get('focus') or []
+        return (item.get('name'), item.get('style') or '', tuple(focus) if isinstance(focus, list) else str(focus))
+
+    @staticmethod
+    def _stock_info(stock: Dict) -> Dict:
+        """Build stock_info dict for strategy"""
+        return {
+            "type": "stock",
+            "code": stock['code'],
+            "name": stock['name'],
+            "sector": stock.get('sector', ''),
+        }
+
+    @staticmethod
+    def _jittered_time(job_id: str, mode: str, slot: str) -> Tuple[int, int, int]:
+        """
+        Deterministic start offset inside SCHEDULER_JITTER_SECONDS, so jobs
+        sharing a slot don't all hit the upstreams in the same second. The
+        same job always gets the same offset; pre-market jobs are kept before 09:15.
+        """
+        hour, minute = (int(x) for x in slot.split(':'))
+        base = hour * 3600 + minute * 60
+        window = SCHEDULER_JITTER_SECONDS
+        if mode == 'pre' and base < 9 * 3600 + 15 * 60:
+            window = min(window, max(0, 9 * 3600 + 15 * 60 - 1 - base))
+        fire = base + (zlib.crc32(job_id.encode('utf-8')) % (window + 1) if window > 0 else 0)
+        fire %= 24 * 3600
+        return fire // 3600, (fire % 3600) // 60, fire % 60
+
+    def sync_asset_jobs(self, kind: str, code: str, subscribers: Optional[List[Dict]] = None):
+        """Make the coalesced jobs of one asset match its active subscriptions in the DB."""
+        if subscribers is None:
+            subscribers = self._subscribers(kind, code)
+
+        wanted: Dict[str, Tuple[str, str]] = {}
+        for item in subscribers:
+            for mode in ('pre', 'post'):
+                slot = self._slot(item.get(f'{mode}_market_time'))
+                if slot:
+                    wanted[f"{self._job_prefix(kind, mode, code)}{slot.replace(':', '')}"] = (mode, slot)
+
+        prefixes = tuple(self._job_prefix(kind, mode, code) for mode in ('pre', 'post'))
+        for job in self.scheduler.get_jobs():
+            if job.id.startswith(prefixes) and job.id not in wanted:
+                self.scheduler.remove_job(job.id)
+                print(f"Removed job {job.id}")
+
+        for job_id, (mode, slot) in wanted.items():
+            if self.scheduler.get_job(job_id):
+                continue
             try:
-                hour, minute = fund['post_market_time'].split(':')
-                job_id = f"post_{code}_{user_id}"
+                hour, minute, second = self._jittered_time(job_id, mode, slot)
                 self.scheduler.add_job(
-                    self.run_analysis_task,
-                    trigger=CronTrigger(hour=hour, minute=minute),
+                    self.enqueue_coalesced_task,
+                    trigger=CronTrigger(hour=hour, minute=minute, second=second),
                     id=job_id,
-                    args=[code, 'post', user_id],
+                    args=[kind, code, mode, slot],
                     replace_existing=True
                 )
-                print(f"Scheduled POST-market for {code} (User {user_id}) at {hour}:{minute}")
+                print(f"Scheduled {'STOCK ' if kind == 'stock' else ''}{mode.upper()}-market for {code} at {slot} "
+                      f"(starts {hour:02d}:{minute:02d}:{second:02d})")
             except Exception as e:
-                print(f"Error scheduling POST task for {code}: {e}")
+                print(f"Error scheduling {mode.upper()} task for {kind} {code}: {e}")
+
+    def add_fund_jobs(self, fund: Dict):
+        """(Re)register the Pre/Post market jobs of a fund after a subscription changed"""
+        self.sync_asset_jobs('fund', fund['code'])
 
     def remove_fund_jobs(self, code: str):
-        """
-        Remove jobs for a fund. 
-        Note: This naive implementation removes jobs matching ID pattern.
-        """
-        # We need to find jobs starting with pre_{code}_ or post_{code}_
-        # Iterate all jobs and match
-        for job in self.scheduler.get_jobs():
-            if job.id.startswith(f"pre_{code}_") or job.id.startswith(f"post_{code}_"):
-                self.scheduler.remove_job(job.id)
-                print(f"Removed job {job.id}")
+        """Drop jobs no remaining subscriber of the fund needs"""
+        self.sync_asset_jobs('fund', code)
+
+    def enqueue_coalesced_task(self, kind: str, code: str, mode: str, slot: str):
+        """Cron callback: hand the job to the analysis worker pool at cron priority."""
+        self.job_queue.submit(f"{mode}:{kind}:{code}@{slot}", self.run_coalesced_task,
+                              kind, code, mode, slot, priority=PRIORITY_CRON)
+
+    def run_coalesced_task(self, kind: str, code: str, mode: str, slot: str):
+        """Worker for a coalesced job: analyze once per profile, save for every subscriber."""
+        if not trading_calendar.is_trading_day():
+            print(f"Skipping {mode.upper()}-market task for {kind} {code} - not a trading day")
+            return
+
+        subscribers = [
+            item for item in self._subscribers(kind, code)
+            if self._slot(item.get(f'{mode}_market_time')) == slot
+        ]
+        if not subscribers:
+            print(f"No active subscribers for {kind} {code} at {slot}. Skipping.")
+            return
+
+        groups: Dict[tuple, List[Dict]] = {}
+        for item in subscribers:
+            groups.setdefault(self._analysis_profile(kind, item), []).append(item)
+
+        print(f"Executing {mode.upper()}-market task for {kind} {code} at {slot}: "
+              f"{len(subscribers)} subscribers, {len(groups)} analyses")
+
+        analyst = self._analyst(mode, slot)
+        for members in groups.values():
+            item = members[0]
+            try:
+                if kind == 'stock':
+                    report = analyst.analyze_item(self._stock_info(item))
+                else:
+                    report = analyst.analyze_fund(item)
+            except Exception as e:
+                logger.error(f"Task failed for {kind} {code}: {e}")
+                import traceback
+                traceback.print_exc()
+                continue
+
+            if not report:
+                continue
+            for member in members:
+                try:
+                    if kind == 'stock':
+                        save_stock_report(report, mode, member['name'], member['code'], user_id=member.get('user_id'))
+                    else:
+                        save_report(report, mode, member['name'], member['code'], user_id=member.get('user_id'))
+                except Exception as e:
+                    logger.error(f"Saving report for {kind} {code} (User {member.get('user_id')}) failed: {e}")
 
     def run_analysis_task(self, fund_code: str, mode: str, user_id: Optional[int] = None):
         """Worker function"""
@@ -188,12 +282,8 @@ class SchedulerManager:
             # Run analysis in thread to avoid blocking scheduler (though scheduler is threaded by default, good practice)
             # Actually apscheduler runs in thread/process pool executor.
             
-            if mode == 'pre':
-                analyst = PreMarketAnalyst()
-                report = analyst.analyze_fund(fund)
-            elif mode == 'post':
-                analyst = PostMarketAnalyst()
-                report = analyst.analyze_fund(fund)
+            if mode in ('pre', 'post'):
+                report = self._analyst(mode).analyze_fund(fund)
             
             if report:
                 save_report(report, mode, fund['name'], fund['code'], user_id=user_id)
@@ -204,48 +294,12 @@ class SchedulerManager:
             traceback.print_exc()
 
     def add_stock_jobs(self, stock: Dict):
-        """Add Pre/Post market jobs for a single stock"""
-        code = stock['code']
-        user_id = stock.get('user_id')
-
-        # Pre-market
-        if stock.get('pre_market_time'):
-            try:
-                hour, minute = stock['pre_market_time'].split(':')
-                job_id = f"stock_pre_{code}_{user_id}"
-                self.scheduler.add_job(
-                    self.run_stock_analysis_task,
-                    trigger=CronTrigger(hour=hour, minute=minute),
-                    id=job_id,
-                    args=[code, 'pre', user_id],
-                    replace_existing=True
-                )
-                print(f"Scheduled STOCK PRE-market for {code} (User {user_id}) at {hour}:{minute}")
-            except Exception as e:
-                print(f"Error scheduling STOCK PRE task for {code}: {e}")
-
-        # Post-market
-        if stock.get('post_market_time'):
-            try:
-                hour, minute = stock['post_market_time'].split(':')
-                job_id = f"stock_post_{code}_{user_id}"
-                self.scheduler.add_job(
-                    self.run_stock_analysis_task,
-                    trigger=CronTrigger(hour=hour, minute=minute),
-                    id=job_id,
-                    args=[code, 'post', user_id],
-                    replace_existing=True
-                )
-                print(f"Scheduled STOCK POST-market for {code} (User {user_id}) at {hour}:{minute}")
-            except Exception as e:
-                print(f"Error scheduling STOCK POST task for {code}: {e}")
+        """(Re)register the Pre/Post market jobs of a stock after a subscription changed"""
+        self.sync_asset_jobs('stock', stock['code'])
 
     def remove_stock_jobs(self, code: str):
-        """Remove jobs for a stock."""
-        for job in self.scheduler.get_jobs():
-            if job.id.startswith(f"stock_pre_{code}_") or job.id.startswith(f"stock_post_{code}_"):
-                self.scheduler.remove_job(job.id)
-                print(f"Removed stock job {job.id}")
+        """Drop jobs no remaining subscriber of the stock needs"""
+        self.sync_asset_jobs('stock', code)
 
     def run_stock_analysis_task(self, stock_code: str, mode: str, user_id: Optional[int] = None):
         """Worker function for stock analysis"""
@@ -264,20 +318,10 @@ class SchedulerManager:
 
         report = ""
         try:
-            # Build stock_info dict for strategy
-            stock_info = {
-                "type": "stock",
-                "code": stock['code'],
-                "name": stock['name'],
-                "sector": stock.get('sector', ''),
-            }
-
-            if mode == 'pre':
-                analyst = PreMarketAnalyst()
-                report = analyst.analyze_item(stock_info)
-            elif mode == 'post':
-                analyst = PostMarketAnalyst()
-                report = analyst.analyze_item(stock_info)
+            stock_info = self._stock_info(stock)
+
+            if mode in ('pre', 'post'):
+                report = self._analyst(mode).analyze_item(stock_info)
 
             if report:
                 save_stock_report(report, mode, stock['name'], stock['code'], user_id=user_id)
@@ -287,5 +331,65 @@ class SchedulerManager:
             import traceback
             traceback.print_exc()
 
+    # =========================================================================
+    # Streaming (SSE) variants of the analysis tasks
+    # =========================================================================
+
+    def stream_analysis_task(self, fund_code: str, mode: str, user_id: Optional[int] = None) -> Iterator[Tuple[str, Any]]:
+        """Like run_analysis_task, but yields (event, payload) as the report is written."""
+        if not trading_calendar.is_trading_day():
+            yield "error", f"Skipping {mode.upper()}-market task for fund {fund_code} - not a trading day"
+            return
+
+        fund = get_fund_by_code(fund_code, user_id=user_id)
+        if not fund or not fund.get('is_active'):
+            yield "error", f"Fund {fund_code} is inactive or deleted"
+            return
+
+        yield from self._stream_report(
+            fund, mode,
+            lambda report: save_report(report, mode, fund['name'], fund['code'], user_id=user_id)
+        )
+
+    def stream_stock_analysis_task(self, stock_code: str, mode: str, user_id: Optional[int] = None) -> Iterator[Tuple[str, Any]]:
+        """Like run_stock_analysis_task, but yields (event, payload) as the report is written."""
+        if not trading_calendar.is_trading_day():
+            yield "error", f"Skipping STOCK {mode.upper()}-market task for {stock_code} - not a trading day"
+            return
+
+        stock = get_stock_by_code(stock_code, user_id=user_id)
+        if not stock or not stock.get('is_active'):
+            yield "error", f"Stock {stock_code} is inactive or deleted"
+            return
+
+        yield from self._stream_report(
+            self._stock_info(stock), mode,
+            lambda report: save_stock_report(report, mode, stock['name'], stock['code'], user_id=user_id)
+        )
+
+    def _stream_report(self, item: Dict, mode: str, save: Callable[[str], str]) -> Iterator[Tuple[str, Any]]:
+        """
+        Relay the analyst's status/token events and save the finished report.
+        If the consumer stops early (client disconnected), nothing is saved.
+        """
+        analyst = self._analyst(mode)
+        parts = []
+        try:
+            for event, payload in analyst.analyze_fund_stream(item):
+                if event == "token":
+                    parts.append(payload)
+                yield event, payload
+        except Exception as e:
+            logger.error(f"Streaming task failed for {item.get('code')}: {e}")
+            import traceback
+            traceback.print_exc()
+            yield "error", str(e)
+            return
+
+        report = "".join(parts)
+        if report:
+            filepath = save(report)
+            yield "done", {"filename": os.path.basename(filepath)}
+
 # Global instance
 scheduler_manager = SchedulerManager()
\ No newline at end of file
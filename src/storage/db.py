@@ -115,6 +115,43 @@ def init_db():
         )
     ''')
 
+    # 8. Create Stock Sector Index Tables (board membership, refreshed daily)
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS stock_sectors (
+            board_type TEXT NOT NULL DEFAULT 'industry', -- industry, concept
+            code TEXT NOT NULL,
+            sector TEXT NOT NULL,
+            rank INTEGER DEFAULT 0, -- board order; lowest rank is the primary sector
+            PRIMARY KEY (board_type, code, sector)
+        )
+    ''')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_stock_sectors_sector ON stock_sectors(board_type, sector)')
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS stock_sector_meta (
+            board_type TEXT PRIMARY KEY,
+            refreshed_date TEXT,
+            stock_count INTEGER,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+    # 9. Create LLM Response Cache Table (content-addressed by provider/model/prompt hash)
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS llm_response_cache (
+            cache_key TEXT PRIMARY KEY, -- sha256(provider, model, normalized prompt)
+            provider TEXT,
+            model TEXT,
+            report_type TEXT,
+            response TEXT NOT NULL,
+            size INTEGER NOT NULL,
+            created_at REAL NOT NULL,
+            expires_at REAL NOT NULL,
+            last_access REAL NOT NULL,
+            hit_count INTEGER DEFAULT 0
+        )
+    ''')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_llm_response_cache_access ON llm_response_cache(last_access)')
+
     # 3. Migration: Add user_id to funds if not exists
     try:
         c.execute('ALTER TABLE funds ADD COLUMN user_id INTEGER REFERENCES users(id)')
@@ -223,13 +260,16 @@ def get_all_funds(user_id: int = None) -> List[Dict]:
     conn.close()
     return [_parse_focus(f) for f in funds]
 
-def get_active_funds(user_id: int = None) -> List[Dict]:
+def get_active_funds(user_id: int = None, code: str = None) -> List[Dict]:
     conn = get_db_connection()
     sql = 'SELECT * FROM funds WHERE is_active = 1'
     params = []
     if user_id:
         sql += ' AND user_id = ?'
         params.append(user_id)
+    if code:
+        sql += ' AND code = ?'
+        params.append(code)
         
     funds = conn.execute(sql, tuple(params)).fetchall()
     conn.close()
@@ -317,7 +357,7 @@ def get_all_stocks(user_id: int) -> List[Dict]:
     return [dict(s) for s in stocks]
 
 
-def get_active_stocks(user_id: int = None) -> List[Dict]:
+def get_active_stocks(user_id: int = None, code: str = None) -> List[Dict]:
     """Get stocks with is_active = 1 for scheduled analysis."""
     conn = get_db_connection()
     sql = 'SELECT * FROM stocks WHERE is_active = 1'
@@ -325,6 +365,9 @@ def get_active_stocks(user_id: int = None) -> List[Dict]:
     if user_id:
         sql += ' AND user_id = ?'
         params.append(user_id)
+    if code:
+        sql += ' AND code = ?'
+        params.append(code)
 
     stocks = conn.execute(sql, tuple(params)).fetchall()
     conn.close()
@@ -644,3 +687,120 @@ def delete_user_preferences(user_id: int):
     conn.execute('DELETE FROM user_investment_preferences WHERE user_id = ?', (user_id,))
     conn.commit()
     conn.close()
+
+# --- Stock Sector Index ---
+
+def get_stock_sector_rows(board_type: str = 'industry') -> List[Dict]:
+    """All (code, sector, rank) memberships for a board type, primary sector first."""
+    conn = get_db_connection()
+    rows = conn.execute(
+        'SELECT code, sector, rank FROM stock_sectors WHERE board_type = ? ORDER BY rank, code',
+        (board_type,)
+    ).fetchall()
+    conn.close()
+    return [dict(r) for r in rows]
+
+def get_stock_sector_refreshed_date(board_type: str = 'industry') -> Optional[str]:
+    conn = get_db_connection()
+    row = conn.execute(
+        'SELECT refreshed_date FROM stock_sector_meta WHERE board_type = ?', (board_type,)
+    ).fetchone()
+    conn.close()
+    return row['refreshed_date'] if row else None
+
+def replace_stock_sectors(rows: List[tuple], board_type: str = 'industry', refreshed_date: str = None):
+    """Atomically replace the memberships of a board type with (code, sector, rank) rows."""
+    refreshed_date = refreshed_date or datetime.now().strftime('%Y-%m-%d')
+    conn = get_db_connection()
+    try:
+        with conn:
+            conn.execute('DELETE FROM stock_sectors WHERE board_type = ?', (board_type,))
+            conn.executemany(
+                'INSERT OR IGNORE INTO stock_sectors (board_type, code, sector, rank) VALUES (?, ?, ?, ?)',
+                [(board_type, code, sector, rank) for code, sector, rank in rows]
+            )
+            conn.execute('''
+                INSERT INTO stock_sector_meta (board_type, refreshed_date, stock_count, updated_at)
+                VALUES (?, ?, ?, CURRENT_TIMESTAMP)
+                ON CONFLICT(board_type) DO UPDATE SET
+                    refreshed_date = excluded.refreshed_date,
+                    stock_count = excluded.stock_count,
+                    updated_at = CURRENT_TIMESTAMP
+            ''', (board_type, refreshed_date, len({code for code, _, _ in rows})))
+    finally:
+        conn.close()
+
+# --- LLM Response Cache ---
+
+def get_llm_cached_response(cache_key: str, now: float) -> Optional[str]:
+    """Cached response if present and unexpired; records the access for LRU eviction."""
+    conn = get_db_connection()
+    try:
+        with conn:
+            row = conn.execute(
+                'SELECT response FROM llm_response_cache WHERE cache_key = ? AND expires_at > ?',
+                (cache_key, now)
+            ).fetchone()
+            if not row:
+                return None
+            conn.execute(
+                'UPDATE llm_response_cache SET last_access = ?, hit_count = hit_count + 1 WHERE cache_key = ?',
+                (now, cache_key)
+            )
+            return row['response']
+    finally:
+        conn.close()
+
+def put_llm_cached_response(cache_key: str, provider: str, model: str, report_type: str,
+                            response: str, ttl: float, now: float):
+    conn = get_db_connection()
+    try:
+        with conn:
+            conn.execute('''
+                INSERT INTO llm_response_cache
+                    (cache_key, provider, model, report_type, response, size, created_at, expires_at, last_access, hit_count)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, 0)
+                ON CONFLICT(cache_key) DO UPDATE SET
+                    report_type = excluded.report_type,
+                    response = excluded.response,
+                    size = excluded.size,
+                    created_at = excluded.created_at,
+                    expires_at = excluded.expires_at,
+                    last_access = excluded.last_access
+            ''', (cache_key, provider, model, report_type, response, len(response.encode('utf-8')),
+                  now, now + ttl, now))
+    finally:
+        conn.close()
+
+def prune_llm_response_cache(now: float, max_entries: int, max_bytes: int) -> int:
+    """Drop expired entries, then least recently used ones beyond the count/size limits."""
+    conn = get_db_connection()
+    try:
+        with conn:
+            removed = conn.execute('DELETE FROM llm_response_cache WHERE expires_at <= ?', (now,)).rowcount
+            removed += conn.execute('''
+                DELETE FROM llm_response_cache WHERE cache_key IN (
+                    SELECT cache_key FROM llm_response_cache ORDER BY last_access DESC LIMIT -1 OFFSET ?
+                )
+            ''', (max_entries,)).rowcount
+            removed += conn.execute('''
+                DELETE FROM llm_response_cache WHERE cache_key IN (
+                    SELECT cache_key FROM (
+                        SELECT cache_key, SUM(size) OVER (ORDER BY last_access DESC) AS running
+                        FROM llm_response_cache
+                    ) WHERE running > ?
+                )
+            ''', (max_bytes,)).rowcount
+            return removed
+    finally:
+        conn.close()
+
+def get_llm_response_cache_summary() -> Dict:
+    """Entry count, total bytes and stored hit count per report type."""
+    conn = get_db_connection()
+    rows = conn.execute('''
+        SELECT report_type, COUNT(*) AS entries, COALESCE(SUM(size), 0) AS bytes, COALESCE(SUM(hit_count), 0) AS hits
+        FROM llm_response_cache GROUP BY report_type
+    ''').fetchall()
+    conn.close()
+    return {r['report_type']: {'entries': r['entries'], 'bytes': r['bytes'], 'hits': r['hits']} for r in rows}
@@ -185,6 +185,52 @@ export const fetchMarketIndices = async (): Promise<IndexData[]> => {
     return response.data;
 };
 
+// --- Realtime quote stream (WebSocket) ---
+
+export interface QuoteStreamMessage {
+  type: 'snapshot' | 'update';
+  quotes: Record<string, Partial<Quote>>;
+  indices: Record<string, Partial<IndexData>>;
+  ts?: number;
+}
+
+const quoteStreamUrl = (): string => {
+  const base = API_BASE.startsWith('http') ? API_BASE : `${window.location.origin}${API_BASE}`;
+  const token = localStorage.getItem('token') || '';
+  return `${base.replace(/^http/, 'ws')}/ws/quotes?token=${encodeURIComponent(token)}`;
+};
+
+/**
+ * Subscribe to pushed quote / index changes. Reconnects (and re-subscribes)
+ * after connection loss. Returns a function that closes the stream.
+ */
+export const subscribeQuotes = (
+  subscription: { codes?: string[]; indices?: boolean },
+  onMessage: (message: QuoteStreamMessage) => void,
+): (() => void) => {
+  let socket: WebSocket | null = null;
+  let closed = false;
+  let retry: ReturnType<typeof setTimeout> | undefined;
+
+  const connect = () => {
+    socket = new WebSocket(quoteStreamUrl());
+    socket.onopen = () => {
+      socket?.send(JSON.stringify({ action: 'subscribe', codes: subscription.codes || [], indices: !!subscription.indices }));
+    };
+    socket.onmessage = (event) => onMessage(JSON.parse(event.data));
+    socket.onclose = () => {
+      if (!closed) retry = setTimeout(connect, 5000);
+    };
+  };
+  connect();
+
+  return () => {
+    closed = true;
+    if (retry) clearTimeout(retry);
+    socket?.close();
+  };
+};
+
 export const fetchFundNavHistory = async (code: string): Promise<NavPoint[]> => {
     const response = await api.get(`/market/funds/${code}/nav`);
     return response.data;
@@ -255,6 +301,26 @@ export const deleteStock = async (code: string): Promise<void> => {
   await api.delete(`/stocks/${code}`);
 };
 
+export interface Quote {
+  code: string;
+  name: string;
+  price: number | null;
+  change_pct: number | null;
+  change: number | null;
+  volume: number | null;
+  amount: number | null;
+  high: number | null;
+  low: number | null;
+  open: number | null;
+  prev_close: number | null;
+  source: 'snapshot' | 'single';
+}
+
+export const fetchQuotesBatch = async (codes: string[]): Promise<{ quotes: Record<string, Quote>; missing: string[] }> => {
+  const response = await api.post('/quotes/batch', { codes });
+  return response.data;
+};
+
 export interface MarketStock {
     code: string;
     name: string;
@@ -393,13 +459,25 @@ export interface RecommendationResult {
         risk_warning?: string;
     };
     metadata?: {
-        screening_time?: number;
+        // Older reports store a plain number of seconds
+        screening_time?: number | ScreeningTiming;
         llm_time?: number;
         total_time?: number;
         personalized?: boolean;
     };
 }
 
+export interface ScreeningTiming {
+    total: number;
+    per_screener: Record<string, number>;
+    critical_path?: {
+        screener: string;
+        seconds: number;
+        shared_data_wait: number;
+    } | null;
+    shared_fetches?: Record<string, number>;
+}
+
 export interface RecommendationRequest {
     mode: 'short' | 'long' | 'all';
     force_refresh?: boolean;
@@ -419,6 +497,7 @@ export interface TaskStatusResponse {
     status: 'pending' | 'running' | 'completed' | 'failed';
     progress: string;
     mode: string;
+    partial?: RecommendationResult;  // blocks already finished while the task is running
     result?: RecommendationResult;
     completed_at?: string;
     error?: string;
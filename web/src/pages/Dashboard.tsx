@@ -15,7 +15,7 @@ import BoltIcon from '@mui/icons-material/Bolt';
 import PublicIcon from '@mui/icons-material/Public';
 import StorageIcon from '@mui/icons-material/Storage';
 import TimelineIcon from '@mui/icons-material/Timeline';
-import { fetchDashboardOverview, fetchDashboardStats, fetchMarketIndices,  } from '../api';
+import { fetchDashboardOverview, fetchDashboardStats, fetchMarketIndices, subscribeQuotes } from '../api';
 import type {IndexData} from '../api';
 // --- Utility Components ---
 
@@ -77,13 +77,29 @@ export default function DashboardPage() {
     const loadAll = () => {
         loadOverview();
         loadStats();
-        loadIndices();
     };
 
     useEffect(() => {
         loadAll();
+        loadIndices();
         const interval = setInterval(loadAll, 120000); // Relaxed interval to 1 min since backend updates every 3 min
-        return () => clearInterval(interval);
+        // Indices are pushed by the quote stream
+        const unsubscribe = subscribeQuotes({ indices: true }, (message) => {
+            const changes = message.indices;
+            if (!Object.keys(changes).length) return;
+            setIndices(prev => {
+                const merged = prev.map(idx => changes[idx.name] ? { ...idx, ...changes[idx.name] } : idx);
+                const known = new Set(prev.map(idx => idx.name));
+                Object.entries(changes).forEach(([name, idx]) => {
+                    if (!known.has(name)) merged.push(idx as IndexData);
+                });
+                return merged;
+            });
+        });
+        return () => {
+            clearInterval(interval);
+            unsubscribe();
+        };
     }, []);
 
     if (loading && !data) return <Box className="h-screen flex items-center justify-center"><CircularProgress size={24} className="text-slate-400"/></Box>;
@@ -55,12 +55,26 @@ import {
 import type {RecommendationResult,
     RecommendationStock,
     RecommendationFund,
+    ScreeningTiming,
     TaskStatusResponse,} from '../api';
 
 import PreferencesModal from '../components/PreferencesModal';
 
 // --- Utility Components ---
 
+// screening_time is a number in older reports, a per-screener breakdown in newer ones
+const screeningSeconds = (timing?: number | ScreeningTiming) =>
+    typeof timing === 'number' ? timing : timing?.total;
+
+const screeningBreakdown = (timing?: number | ScreeningTiming) => {
+    if (!timing || typeof timing === 'number') return undefined;
+    const parts = Object.entries(timing.per_screener || {}).map(([name, secs]) => `${name}: ${secs.toFixed(1)}s`);
+    if (timing.critical_path) {
+        parts.push(`critical path: ${timing.critical_path.screener} (${timing.critical_path.seconds.toFixed(1)}s)`);
+    }
+    return parts.join('\n');
+};
+
 const NumberMono = ({ children, className = "", style = {} }: { children: React.ReactNode, className?: string, style?: React.CSSProperties }) => (
     <span className={`font-mono tracking-tight ${className}`} style={{ ...style, fontVariantNumeric: 'tabular-nums' }}>
         {children}
@@ -1270,6 +1284,9 @@ export default function RecommendationsPage() {
                     response.task_id,
                     (status: TaskStatusResponse) => {
                         setGeneratingProgress(status.progress || '');
+                        if (status.partial) {
+                            setData(status.partial);
+                        }
                     },
                     5000,  // Poll every 5 seconds
                     200    // Max 200 attempts (~10 minutes)
@@ -1394,7 +1411,8 @@ export default function RecommendationsPage() {
                     {data.metadata && (
                         <Box className="flex gap-3 ml-4">
                             <Chip
-                                label={`${t('recommendations.metadata.screening_time')}: ${data.metadata.screening_time?.toFixed(1)}s`}
+                                label={`${t('recommendations.metadata.screening_time')}: ${screeningSeconds(data.metadata.screening_time)?.toFixed(1)}s`}
+                                title={screeningBreakdown(data.metadata.screening_time)}
                                 size="small"
                                 className="h-5 text-[10px] bg-slate-100"
                             />
@@ -48,7 +48,8 @@ import {
   searchMarketStocks,
   fetchStockDetails,
   fetchStockHistory,
-  analyzeStock
+  analyzeStock,
+  subscribeQuotes
 } from '../api';
 
 import type { MarketStock, StockItem, StockDetails, NavPoint } from '../api';
@@ -170,6 +171,24 @@ export default function StocksPage() {
     loadStocks();
   }, []);
 
+  // Live prices for the watch list, pushed by the server instead of re-polling /stocks
+  const watchedCodes = stocks.map(s => s.code).join(',');
+  useEffect(() => {
+    if (!watchedCodes) return;
+    return subscribeQuotes({ codes: watchedCodes.split(',') }, (message) => {
+      setStocks(prev => prev.map(stock => {
+        const quote = message.quotes[stock.code.padStart(6, '0')];
+        if (!quote) return stock;
+        return {
+          ...stock,
+          ...(quote.price != null && { price: quote.price }),
+          ...(quote.change_pct != null && { change_pct: quote.change_pct }),
+          ...(quote.volume != null && { volume: quote.volume }),
+        };
+      }));
+    });
+  }, [watchedCodes]);
+
   const loadStocks = async () => {
     setLoading(true);
     try {